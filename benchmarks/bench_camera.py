@@ -0,0 +1,105 @@
+"""Thumbnail decode throughput and memory for the camera gallery.
+
+Writes a set of camera-sized JPEGs to a scratch directory, then thumbnails
+all of them: full decode then scale (what a naive gallery does) against
+decoding straight at thumbnail size, on one thread and on the
+ThumbnailPipeline, with the results kept in the byte-budgeted LRU:
+
+    python benchmarks/bench_camera.py [--captures N] [--size 1920x1080]
+"""
+import argparse
+import importlib.util
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor, QImage
+
+import camera
+
+
+def max_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_gui():
+    spec = importlib.util.spec_from_file_location("new_gui", ROOT / "new.gui.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_captures(root, count, width, height):
+    image = QImage(width, height, QImage.Format.Format_RGB32)
+    paths = []
+    for i in range(count):
+        image.fill(QColor.fromHsv(i * 7 % 360, 160, 200))
+        for y in range(0, height, 64):  # some detail, so the JPEG is not trivially small
+            image.setPixelColor(i % width, y, QColor("black"))
+        path = root / f"capture-{i:05d}.jpg"
+        image.save(str(path), quality=85)
+        paths.append(path)
+    return paths
+
+
+def full_then_scale(path, size):
+    image = QImage(str(path))
+    return image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--captures", type=int, default=400)
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--budget-mib", type=int, default=camera.THUMBNAIL_BUDGET >> 20)
+    args = parser.parse_args()
+    width, height = map(int, args.size.split("x"))
+
+    gui = load_gui()
+    root = Path(tempfile.mkdtemp(prefix="nanolab-camera-"))
+    paths = write_captures(root, args.captures, width, height)
+    disk = sum(path.stat().st_size for path in paths)
+    print(f"{len(paths)} captures of {width}x{height}, {disk / len(paths) / 1024:.0f} KiB each")
+
+    for name, decode in (("full decode + scale", lambda path: full_then_scale(path, gui.THUMBNAIL_SIZE)),
+                         ("scaled decode", gui.decode_thumbnail)):
+        start = time.perf_counter()
+        for path in paths:
+            decode(path)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<22} 1 thread    {len(paths) / elapsed:7.0f} thumbnails/s")
+
+    cache = camera.ByteLRU(args.budget_mib << 20)
+    done = threading.Event()
+    lock = threading.Lock()
+    remaining = [len(paths)]
+
+    def on_done(path, image):
+        with lock:  # the gallery does this on the GUI thread instead
+            cache.put(path, image, image.sizeInBytes())
+            remaining[0] -= 1
+            if not remaining[0]:
+                done.set()
+
+    pipeline = camera.ThumbnailPipeline(gui.decode_thumbnail, on_done, max_queued=len(paths))
+    start = time.perf_counter()
+    for path in paths:
+        pipeline.request(path)
+    done.wait()
+    elapsed = time.perf_counter() - start
+    pipeline.shutdown()
+    print(f"{'scaled decode':<22} {pipeline.workers} workers  {len(paths) / elapsed:7.0f} thumbnails/s")
+    print(f"cache: {cache.summary()}, {cache.evictions} evicted, max RSS {max_rss_mib():.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""SD card download throughput against the line's bandwidth, by window size, and resume after a disconnect.
+
+Downloads a ``--size`` file from an emulated NanoLab whose replies leave no
+faster than a ``--baud`` serial line, and that takes ``--latency`` seconds
+per request. Window 1 is stop-and-wait: the line is idle while each request
+travels and is handled. Wider windows keep it busy. Then the connection is
+dropped part way through a download, and the download resumes from its
+``.part`` file on a new link. The result is checked byte for byte:
+
+    python benchmarks/bench_download.py [--size 65536] [--baud 115200] [--latency 0.005] [--windows 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from command_scheduler import CommandScheduler
+from device_link import SerialLink
+from emulator import EmulatedNanoLab
+from sd_download import CHUNK, SdCard
+from wire_protocol import Ack, FileData, FileInfo
+
+
+class Device:
+    """The parts of a DeviceController an SdCard uses"""
+
+    def __init__(self, url, window):
+        self.sd = SdCard(self, window=window)
+        self.link = SerialLink(url, on_message=self.on_message)
+        self.commands = CommandScheduler(self.link, bulk_window=window)
+        self.link.start()
+        self.commands.start()
+        while self.link.state != "open":
+            time.sleep(0.01)
+
+    def on_message(self, seq, message):
+        if type(message) is Ack:
+            self.commands.on_ack(message)
+        elif type(message) is FileData:
+            self.commands.complete(seq)
+            self.sd.on_message(seq, message)
+        elif type(message) is FileInfo:
+            self.sd.on_message(seq, message)
+
+    def close(self):
+        self.commands.stop()
+        self.link.stop()
+
+
+def listing(device):
+    done = []
+    device.sd.list_files(done.append)
+    while not done:
+        time.sleep(0.01)
+    return done[0][0]
+
+
+def wait(download, timeout=120):
+    deadline = time.monotonic() + timeout
+    while download.state in ("waiting", "running") and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=65536, help="bytes in the file")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds the device takes per request")
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    data = os.urandom(args.size)
+    bandwidth = args.baud / 10
+    print(f"{args.size / 1024:,.0f} KiB file in {CHUNK} B chunks over {args.baud} baud "
+          f"({bandwidth / 1024:.1f} KiB/s), device takes {args.latency * 1e3:.1f} ms per request")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lab = EmulatedNanoLab(latency=args.latency, files={"log.csv": data}, baud=args.baud).start()
+        for window in args.windows:
+            device = Device(lab.url, window)
+            path = Path(tmp, f"window-{window}.csv")
+            start = time.perf_counter()
+            download = device.sd.download(listing(device), path)
+            wait(download)
+            elapsed = time.perf_counter() - start
+            device.close()
+            ok = download.done and path.read_bytes() == data
+            print(f"window {window:2d}  |  {elapsed:6.2f} s  |  {args.size / elapsed / 1024:5.1f} KiB/s  |  "
+                  f"{args.size / elapsed / bandwidth:4.0%} of the line  |  {'ok' if ok else 'FAILED'}")
+
+        window = max(args.windows)
+        path = Path(tmp, "resumed.csv")
+        device = Device(lab.url, window)
+        download = device.sd.download(listing(device), path)
+        while download.offset < args.size // 2:
+            time.sleep(0.01)
+        lab.drop_connection()
+        wait(download, 5)
+        device.close()
+        print(f"dropped at {download.offset:,} of {args.size:,} B ({download.state}: {download.error})")
+        device = Device(lab.url, window)
+        download = device.sd.download(listing(device), path)
+        resumed_from = download.offset
+        wait(download)
+        device.close()
+        lab.stop()
+        ok = download.done and path.read_bytes() == data
+        print(f"resumed from {resumed_from:,} B, fetched {download.bytes_this_session:,} B  |  "
+              f"{'ok' if ok else 'FAILED'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Export throughput and memory for CSV and binary exports.
+
+Fills a scratch column store, then exports every column in each format,
+reporting rows/s, output MiB/s and resident memory, which should not grow
+with the number of rows exported:
+
+    python benchmarks/bench_export.py [--rows N] [--dir PATH]
+"""
+import argparse
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+import export
+from storage import TELEMETRY_COLUMNS, ColumnStore
+
+RATE_HZ = 250
+
+
+def max_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--batch", type=int, default=25_000)
+    parser.add_argument("--dir", help="scratch location (default: a temporary directory)")
+    args = parser.parse_args()
+    root = Path(args.dir or tempfile.mkdtemp(prefix="nanolab-export-"))
+
+    rng = np.random.default_rng(0)
+    template = {name: rng.standard_normal(args.batch).astype(dtype) for name, dtype in TELEMETRY_COLUMNS.items()}
+    step = np.arange(args.batch) / RATE_HZ
+    store = ColumnStore(root / "store")
+    for first in range(0, args.rows, args.batch):
+        template["time"] = first / RATE_HZ + step
+        store.append(template)
+    store.flush()
+    t0, t1 = store.span
+    print(f"store: {store.rows:,} rows, max RSS {max_rss_mib():.0f} MiB")
+
+    for fmt, suffix in (("binary", ".nlb"), ("csv", ".csv")):
+        path = root / ("export" + suffix)
+        start = time.perf_counter()
+        rows = export.export(store, path, t0, t1, list(TELEMETRY_COLUMNS), fmt)
+        elapsed = time.perf_counter() - start
+        size = path.stat().st_size / 2**20
+        print(f"{fmt:>6}: {rows:,} rows in {elapsed:.2f} s ({rows / elapsed / 1e6:.2f} M rows/s, "
+              f"{size / elapsed:.0f} MiB/s, {size:.0f} MiB), max RSS {max_rss_mib():.0f} MiB")
+        path.unlink()
+
+    store.close()
+    if not args.dir:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Fleet push time: concurrent against one device after another.
+
+Starts emulated NanoLabs with random processing delays on local TCP ports
+and pushes the same settings update to all of them, first a device at a
+time, then with Fleet.push:
+
+    python benchmarks/bench_fleet.py [--labs 10 40 100] [--latency 0.02] [--jitter 0.1]
+"""
+import argparse
+import random
+import sys
+import time
+from array import array
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import wire_protocol
+from emulator import EmulatedNanoLab
+from fleet import Fleet, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labs", type=int, nargs="+", default=[10, 40, 100])
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    args = parser.parse_args()
+    message = wire_protocol.SetFields(array("B", range(13)), array("H", [1] * 13))
+
+    for count in args.labs:
+        rng = random.Random(count)
+        labs = [EmulatedNanoLab(latency=args.latency + rng.uniform(0, args.jitter)).start() for _ in range(count)]
+        fleet = Fleet(lab.url for lab in labs)
+        fleet.wait_open()
+
+        start = time.perf_counter()
+        for lab in labs:
+            fleet.push_and_wait(message, [lab.url])
+        one_by_one = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = fleet.push_and_wait(message)
+        elapsed = time.perf_counter() - start
+        print(f"{count:4d} labs: one by one {one_by_one * 1e3:7.0f} ms  |  concurrent {summarize(results, elapsed)}")
+
+        fleet.close()
+        for lab in labs:
+            lab.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Headless benchmarks for the GUI's hot paths, written to a JSON file.
+
+Runs under Qt's offscreen platform, so it needs no display. Startup is
+measured in fresh processes; everything else in one window with all pages
+built:
+
+    python benchmarks/bench_gui.py [--output gui.json] [--baseline previous.json]
+
+Every result is the median and max in milliseconds over its runs. With
+``--baseline``, results whose median got more than ``--tolerance`` slower
+are listed and the exit status is 1, so a release can be checked against
+the last one.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("NANOLAB_DATA", tempfile.mkdtemp(prefix="nanolab-bench-"))
+
+NOISE_MS = 1.0  # differences smaller than this are never reported as regressions
+
+# Run in a fresh interpreter: import the GUI, then show the window and wait for its first frame
+STARTUP_SCRIPT = """
+import importlib.util, json, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("new_gui", sys.argv[1])
+gui = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(gui)
+imported = time.perf_counter()
+app = gui.QApplication([])
+window = gui.MainWindow()
+window.PREWARM_PAGES = False
+window.show()
+while window.first_frame_ms is None:
+    app.processEvents()
+print("BENCH " + json.dumps({"import": (imported - start) * 1e3,
+                             "first_frame": (time.perf_counter() - start) * 1e3}))
+"""
+
+
+def load_gui():
+    spec = importlib.util.spec_from_file_location("new_gui", ROOT / "new.gui.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def summarize(times):
+    return {"median_ms": statistics.median(times), "max_ms": max(times), "runs": len(times)}
+
+
+def timed(fn, repeat, after=None):
+    """Time ``fn()`` (then ``after()``, e.g. processing the events it posted) ``repeat`` times."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        if after is not None:
+            after()
+        times.append((time.perf_counter() - start) * 1e3)
+    return summarize(times)
+
+
+def bench_startup(repeat):
+    runs = {"import": [], "first_frame": []}
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, str(ROOT / "new.gui.py")],
+                             cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        line = next(line for line in out.splitlines() if line.startswith("BENCH "))
+        for name, value in json.loads(line[len("BENCH "):]).items():
+            runs[name].append(value)
+    return {name: summarize(times) for name, times in runs.items()}
+
+
+def bench_window(gui, app, repeat):
+    results = {}
+
+    def construct():
+        window = gui.MainWindow()
+        window.PREWARM_PAGES = False
+        window.close()
+        window.deleteLater()
+
+    results["main_window_construct"] = timed(construct, repeat, app.processEvents)
+
+    window = gui.MainWindow()
+    window.PREWARM_PAGES = False
+    window.resize(1000, 800)
+    window.show()
+    app.processEvents()
+    results["build_all_pages"] = timed(lambda: [window.page(name) for name in window.page_factories], 1)
+
+    names = list(window.page_factories)
+    cycle = iter(names * repeat)
+    results["switch_to"] = timed(lambda: window.switch_to(next(cycle)), repeat * 2, app.processEvents)
+    results["go_back"] = timed(window.go_back, repeat, app.processEvents)
+    results["go_forward"] = timed(window.go_forward, repeat, app.processEvents)
+    window.switch_to("led")
+    app.processEvents()
+    results["toggle_theme"] = timed(window.toggle_theme, repeat * 2, app.processEvents)
+
+    # A drag delivers one valueChanged per step; labels and summary follow once per frame
+    for name in ("led", "water", "camera"):
+        page = window.page(name)
+        window.switch_to(name)
+        app.processEvents()
+        steps = [(slider, value) for slider in page.sliders.values()
+                 for value in list(range(slider.minimum(), slider.maximum() + 1)) * 2]
+
+        def drag_step(it=iter(steps)):
+            slider, value = next(it)
+            slider.setValue(value)
+
+        results[f"slider_step_{name}"] = timed(drag_step, len(steps), app.processEvents)
+    window.close()
+    return results
+
+
+def bench_graph(app, repeat, points=100_000):
+    import numpy as np
+    from graph_canvas import GraphCanvas
+
+    canvas = GraphCanvas()
+    canvas.resize(800, 400)
+    canvas.show()
+    app.processEvents()
+    x = np.linspace(0, 100, points)
+    y = np.sin(x)
+    canvas.start_live(xlim=(0, 100), ylim=(-1.5, 1.5))
+    canvas.set_live_data(0, x, y)
+    results = {"graph_full_draw": timed(canvas.draw, repeat)}
+    canvas.draw()
+
+    def frame(shift=iter(np.linspace(0, 1, repeat * 4))):
+        canvas.set_live_data(0, x, y + next(shift) * 0.1)
+        canvas.draw_live()
+
+    results["graph_blit_frame"] = timed(frame, repeat * 4)
+    canvas.close()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Names of results whose median is more than ``tolerance`` slower than in ``baseline``."""
+    slower = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if result["median_ms"] > old["median_ms"] * (1 + tolerance) and result["median_ms"] - old["median_ms"] > NOISE_MS:
+            slower.append(name)
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="bench_gui.json")
+    parser.add_argument("--baseline", help="an earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--startup-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = bench_startup(args.startup_runs)
+    gui = load_gui()
+    from PyQt6.QtCore import QT_VERSION_STR
+    app = gui.QApplication([])
+    results.update(bench_window(gui, app, args.repeat))
+    results.update(bench_graph(app, args.repeat))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "platform": platform.platform(),
+            "qpa": os.environ["QT_QPA_PLATFORM"],
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+
+    width = max(map(len, results))
+    for name, result in results.items():
+        print(f"{name:<{width}}  median {result['median_ms']:8.2f} ms  max {result['max_ms']:8.2f} ms  ({result['runs']} runs)")
+    print(f"written to {args.output}")
+
+    if args.baseline:
+        slower = compare(results, json.loads(Path(args.baseline).read_text())["results"], args.tolerance)
+        for name in slower:
+            print(f"REGRESSION: {name}")
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Startup time and memory: the headless daemon against the GUI.
+
+Each is started in fresh processes on a loop:// link. The daemon is timed
+to a running link; the GUI to its first frame, under Qt's offscreen
+platform. Peak resident memory is read in the same process:
+
+    python benchmarks/bench_headless.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+GUI_SCRIPT = """
+import importlib.util, json, resource, sys, time
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location("new_gui", sys.argv[1])
+gui = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(gui)
+app = gui.QApplication([])
+window = gui.MainWindow()
+window.PREWARM_PAGES = False
+window.show()
+while window.first_frame_ms is None:
+    app.processEvents()
+print(json.dumps({"startup_ms": (time.perf_counter() - start) * 1e3,
+                  "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def run(command, repeat):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", NANOLAB_PORT="loop://",
+               NANOLAB_DATA=tempfile.mkdtemp(prefix="nanolab-bench-"))
+    results = []
+    for _ in range(repeat):
+        out = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(next(line for line in out.splitlines() if line.startswith("{"))))
+    return (statistics.median(r["startup_ms"] for r in results), statistics.median(r["max_rss_mib"] for r in results),
+            results[0].get("qt_imported", True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    daemon = run([sys.executable, "nanolabd.py", "--port", "loop://", "--startup-only"], args.repeat)
+    gui = run([sys.executable, "-c", GUI_SCRIPT, str(ROOT / "new.gui.py")], args.repeat)
+    for name, (startup, rss, qt) in (("daemon", daemon), ("GUI", gui)):
+        print(f"{name:<7} startup {startup:6.0f} ms  |  peak RSS {rss:6.1f} MiB  |  Qt {'imported' if qt else 'not imported'}")
+    print(f"daemon: {gui[0] / daemon[0]:.1f}x faster to start, {gui[1] - daemon[1]:.0f} MiB less memory")
+
+
+if __name__ == "__main__":
+    main()
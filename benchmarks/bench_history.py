@@ -0,0 +1,62 @@
+"""Settings history load time and by-date lookup latency.
+
+Records years of revisions to a scratch history, reopens it, then times
+"settings in effect at T" and day-to-day diffs at random dates:
+
+    python benchmarks/bench_history.py [--revisions N] [--years Y]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from settings_history import SettingsHistory
+from settings_model import SCHEMA
+
+DAY = 86400
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--revisions", type=int, default=50_000)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+    path = Path(tempfile.mkdtemp(prefix="nanolab-history-")) / "settings_history.bin"
+
+    rng = random.Random(0)
+    span = args.years * 365 * DAY
+    first = time.time() - span
+    values = [field.default if field.default is not None else 0 for field in SCHEMA]
+    history = SettingsHistory(path)
+    start = time.perf_counter()
+    for i in range(args.revisions):
+        field = rng.randrange(len(SCHEMA))
+        values[field] = rng.randint(SCHEMA[field].minimum, min(SCHEMA[field].maximum, 300))
+        history.record(values, when=first + span * i / args.revisions)
+    elapsed = time.perf_counter() - start
+    print(f"record: {len(history):,} revisions in {elapsed:.2f} s ({path.stat().st_size / 1024:.0f} KiB on disk)")
+
+    start = time.perf_counter()
+    history = SettingsHistory(path)
+    print(f"load: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    days = [first + rng.uniform(0, span) for _ in range(args.lookups)]
+    start = time.perf_counter()
+    for when in days:
+        history.at(when)
+    print(f"at: {(time.perf_counter() - start) / args.lookups * 1e6:.2f} us per lookup")
+
+    start = time.perf_counter()
+    for when in days:
+        history.diff(when, when + DAY)
+        history.count_between(when, when + DAY)
+    print(f"diff: {(time.perf_counter() - start) / args.lookups * 1e6:.2f} us per day-to-day comparison")
+
+
+if __name__ == "__main__":
+    main()
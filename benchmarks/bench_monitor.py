@@ -0,0 +1,84 @@
+"""Rolling sensor statistics: cost per sample against window length.
+
+Streams batches of one channel through a RollingWindow and, for
+comparison, recomputes the same statistics by rescanning the window after
+every batch, as a naive implementation would:
+
+    python benchmarks/bench_monitor.py [--rate 250] [--batch 25] [--seconds 1200]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sensor_monitor import RollingWindow, SensorMonitor
+from telemetry import CHANNELS
+
+
+def stream(rate, batch, seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    dt = 1 / rate
+    level = 21.0
+    for start in range(0, int(rate * seconds), batch):
+        times = (start + np.arange(batch)) * dt
+        values = level + np.cumsum(rng.normal(0, 0.01, batch))
+        level = values[-1]
+        yield times, values
+
+
+def incremental(window, batches):
+    rolling = RollingWindow(window)
+    start = time.perf_counter()
+    for times, values in batches:
+        rolling.extend(times, values)
+        rolling.stats()
+    return time.perf_counter() - start, rolling.stats()
+
+
+def rescan(window, batches):
+    all_times, all_values = [], []
+    start = time.perf_counter()
+    for times, values in batches:
+        all_times.append(times)
+        all_values.append(values)
+        t, v = np.concatenate(all_times), np.concatenate(all_values)
+        keep = t > t[-1] - window
+        t, v = t[keep], v[keep]
+        all_times, all_values = [t], [v]
+        v.min(), v.max(), v.mean(), v.std()
+    return time.perf_counter() - start, (len(v), v.min(), v.max(), v.mean(), v.std())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=250, help="samples per second")
+    parser.add_argument("--batch", type=int, default=25, help="samples per TelemetryBatch")
+    parser.add_argument("--seconds", type=int, default=1200, help="length of the stream")
+    args = parser.parse_args()
+    samples = args.rate * args.seconds
+    batches = list(stream(args.rate, args.batch, args.seconds))
+
+    for window in (10, 60, 600):
+        fast, stats = incremental(window, batches)
+        slow, reference = rescan(window, batches)
+        same = stats.count == reference[0] and np.allclose(stats[1:5], reference[1:])
+        print(f"window {window:5d} s ({window * args.rate:8,} samples)  |  incremental "
+              f"{fast / samples * 1e9:6.0f} ns/sample  |  rescan {slow / samples * 1e9:7.0f} ns/sample  |  "
+              f"{'same' if same else 'DIFFERENT'} stats")
+
+    monitor = SensorMonitor()
+    start = time.perf_counter()
+    for times, values in batches:
+        monitor.extend({"time": times, **{name: values for name in CHANNELS}})
+    elapsed = time.perf_counter() - start
+    print(f"SensorMonitor, {len(CHANNELS)} channels x {len(next(iter(monitor.windows.values())))} windows "
+          f"and {len(monitor.alarms)} alarms: {samples / elapsed:,.0f} rows/s "
+          f"({samples / elapsed / args.rate:,.0f}x real time)")
+
+
+if __name__ == "__main__":
+    main()
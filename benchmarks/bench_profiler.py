@@ -0,0 +1,67 @@
+"""Profiler overhead per traced slot call, and stall detection.
+
+Times a traced no-op against the bare function with the profiler stopped
+and running, then blocks the main thread between heartbeats to check that
+the stall is reported with the stack it was stuck in:
+
+    python benchmarks/bench_profiler.py [--calls 1000000] [--stall-ms 250]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from profiler import HEARTBEAT_MS, PROFILER, traced
+
+
+class Page:
+    def update_summary(self):
+        pass
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for value in range(calls):
+        fn(value)  # a signal argument the slot does not take
+    return (time.perf_counter() - start) / calls
+
+
+def blocking_slot(seconds):
+    time.sleep(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    parser.add_argument("--stall-ms", type=float, default=250, help="how long the injected stall blocks")
+    args = parser.parse_args()
+
+    page = Page()
+    bare = per_call(lambda value: page.update_summary(), args.calls)
+    slot = traced(Page.update_summary).__get__(page)
+    stopped = per_call(slot, args.calls)
+    PROFILER.start()
+    running = per_call(slot, args.calls)
+    PROFILER.stop()
+    print(f"bare call {bare * 1e9:5.0f} ns  |  traced, profiler stopped {stopped * 1e9:5.0f} ns  |  "
+          f"running {running * 1e9:5.0f} ns ({len(PROFILER.events):,} events kept)")
+
+    # The main thread beats on time once, then blocks in a slot before its next beat
+    PROFILER.start()
+    PROFILER.beat()
+    time.sleep(HEARTBEAT_MS / 1e3)
+    PROFILER.beat()
+    blocking_slot(args.stall_ms / 1e3)
+    PROFILER.beat()
+    PROFILER.stop()
+    stalls = [event for event in PROFILER.events if event["name"] == "stall"]
+    caught = bool(stalls) and "blocking_slot" in stalls[0]["args"]["stack"]
+    print(f"injected {args.stall_ms:.0f} ms stall: {PROFILER.summary()}  |  "
+          f"stack {'names blocking_slot' if caught else 'MISSING'}")
+    return 0 if caught else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Compare the binary wire protocol with the old text settings lines.
+
+Reports encoded size, time on the wire at common Arduino baud rates, and
+encode/decode time per message:
+
+    python benchmarks/bench_protocol.py [--number N]
+"""
+import argparse
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import wire_protocol
+from wire_protocol import CameraSettings, PumpSettings, Schedule
+
+BAUD_RATES = (9600, 115200)
+
+# (name, message, text line as the settings pages printed it)
+CASES = [
+    ("led", wire_protocol.led_from_hex("#ff8800", 12, 2, 12),
+     "LED Settings: Color=#ff8800, Duration=12h, Frequency=2x/day, Interval=12h"),
+    ("pump", PumpSettings(30, 4, 6),
+     "Water Pump: Duration=30s, Frequency=4x/day, Interval=6h"),
+    ("camera", CameraSettings(3, 8),
+     "Camera Settings: Frequency=3x/day, Interval=8h"),
+    ("schedule", Schedule(20744, 20774),
+     "Schedule saved: 2026-10-18 to 2026-11-17"),
+]
+
+_FIELD = re.compile(r"(\w+)=([^,\s]+)")
+
+
+def encode_text(line):
+    return line.encode() + b"\n"
+
+
+def decode_text(data):
+    """Roughly what a device has to do with a text line: split, then parse each field."""
+    fields = {}
+    for key, value in _FIELD.findall(data.decode()):
+        value = value.rstrip("hsx/day")
+        fields[key] = int(value[1:], 16) if value.startswith("#") else value
+    return fields
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args()
+    n = args.number
+
+    header = f"{'message':<10}{'text B':>8}{'binary B':>10}{'saved':>8}"
+    header += "".join(f"{'ms @' + str(b):>12}" for b in BAUD_RATES)
+    header += f"{'text enc/dec us':>18}{'bin enc/dec us':>18}"
+    print(header)
+    for name, message, line in CASES:
+        text = encode_text(line)
+        frame = wire_protocol.encode(message, seq=1)
+        assert wire_protocol.decode(frame) == (1, message)
+
+        # 10 bits per byte on the wire (8N1)
+        wire = "".join(f"{len(text) * 10e3 / b:>6.1f}/{len(frame) * 10e3 / b:<5.2f}" for b in BAUD_RATES)
+        text_enc = timeit.timeit(lambda: encode_text(line), number=n) / n * 1e6
+        text_dec = timeit.timeit(lambda: decode_text(text), number=n) / n * 1e6
+        bin_enc = timeit.timeit(lambda: wire_protocol.encode(message, 1), number=n) / n * 1e6
+        bin_dec = timeit.timeit(lambda: wire_protocol.decode(frame), number=n) / n * 1e6
+        print(f"{name:<10}{len(text):>8}{len(frame):>10}{1 - len(frame) / len(text):>8.0%} {wire}"
+              f"{text_enc:>9.2f}/{text_dec:<8.2f}{bin_enc:>9.2f}/{bin_dec:<8.2f}")
+
+
+if __name__ == "__main__":
+    main()
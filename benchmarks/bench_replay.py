@@ -0,0 +1,155 @@
+"""Replay a recorded session through ingest, storage and the Data Results plot at several speeds.
+
+Without ``--recording``, first records ``--record-seconds`` of an emulated
+NanoLab streaming ``--rate`` samples a second and a capture a second. Each
+replay (``replay://`` link, recording.py) feeds a fresh DeviceController.
+That controller writes to the ring buffers, a ColumnStore on disk and the
+sensor monitor, and a real DataResultsPage (Qt offscreen) plots the live
+minute. For each speed (1x, 10x, ... or "max") it reports:
+- sustained samples per second;
+- samples lost between the recording and the store;
+- p50/p99 end-to-end latency, from when a batch was due off the wire to
+  the end of the first plot refresh that showed it.
+
+    python benchmarks/bench_replay.py [--recording session.nlr] [--speeds 1 10 100 max] [--rate 2000]
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import wire_protocol
+from camera import CaptureStore
+from controller import DeviceController
+from device_link import SerialLink
+from emulator import EmulatedNanoLab
+from recording import read_recording
+from sensor_monitor import SensorMonitor
+from settings_history import SettingsHistory
+from settings_model import DeviceSettings
+from storage import ColumnStore
+from telemetry import Telemetry
+
+
+def load_gui():
+    spec = importlib.util.spec_from_file_location("new_gui", ROOT / "new.gui.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def record(directory, seconds, rate):
+    lab = EmulatedNanoLab(telemetry_hz=rate, camera_fps=1, seed=0).start()
+    link = SerialLink(lab.url, record=directory)
+    link.start()
+    time.sleep(seconds)
+    link.stop()
+    lab.stop()
+    return link.recorder.path if link.recorder else next(Path(directory).glob("*.nlr"))
+
+
+def recorded_samples(frames):
+    samples = 0
+    for _, frame in frames:
+        try:
+            _, message = wire_protocol.decode(frame)
+        except wire_protocol.ProtocolError:
+            continue
+        if type(message) is wire_protocol.TelemetryBatch:
+            samples += len(message.temperature)
+    return samples
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float("nan")
+
+
+def replay(gui, app, path, speed, root):
+    store = ColumnStore(root / "telemetry")
+    telemetry = Telemetry(store=store, monitor=SensorMonitor())
+    ended = threading.Event()
+    device = DeviceController(DeviceSettings(), SettingsHistory(root / "history.bin"), telemetry,
+                              CaptureStore(root / "camera"),
+                              on_state=lambda state, detail: state in ("closed", "error") and ended.set())
+    page = gui.DataResultsPage(telemetry, device.sd, lambda: None)
+    page.show()
+
+    # (samples ingested so far, when the batch was due) for every batch, until a refresh shows it
+    waiting = deque()
+    latencies = []
+    ingest = telemetry.ingest
+
+    def timed_ingest(batch):
+        ingest(batch)
+        waiting.append((telemetry.samples, device.link.due))
+
+    def timed_refresh():
+        shown = telemetry.samples
+        page.refresh()
+        done = time.perf_counter()
+        while waiting and waiting[0][0] <= shown:
+            latencies.append(done - waiting.popleft()[1])
+
+    telemetry.ingest = timed_ingest
+    page.timer.timeout.disconnect()
+    page.timer.timeout.connect(timed_refresh)
+
+    url = f"replay://{path}?speed={speed}"
+    start = time.perf_counter()
+    device.connect_to(url)
+    while not ended.is_set() or waiting:
+        app.processEvents()
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    lag = device.link.lag
+    corrupt = device.link.stats.corrupt
+    device.close()
+    store.flush()
+    rows = store.rows
+    store.close()
+    page.timer.stop()
+    page.deleteLater()
+    return telemetry.samples, rows, elapsed, latencies, lag, corrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recording", help="a .nlr file to replay (default: record one from an emulated lab)")
+    parser.add_argument("--record-seconds", type=float, default=10.0)
+    parser.add_argument("--rate", type=int, default=2000, help="samples per second when recording")
+    parser.add_argument("--speeds", nargs="+", default=["1", "10", "100", "max"])
+    args = parser.parse_args()
+    gui = load_gui()
+    app = gui.QApplication([])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        path = Path(args.recording) if args.recording else record(tmp / "recordings", args.record_seconds, args.rate)
+        _, frames = read_recording(path)
+        samples = recorded_samples(frames)
+        duration = frames[-1][0] if frames else 0.0
+        size = path.stat().st_size
+        print(f"{path.name}: {len(frames):,} frames, {samples:,} samples over {duration:.1f} s, "
+              f"{size / 1024:,.0f} KiB ({size / max(samples, 1):.1f} B per sample incl. captures)")
+
+        for i, speed in enumerate(args.speeds):
+            ingested, rows, elapsed, latencies, lag, corrupt = replay(gui, app, path.resolve(), speed, tmp / f"run-{i}")
+            name = "max" if speed == "max" else f"{float(speed):g}x"
+            print(f"{name:>5s}  |  {elapsed:6.2f} s  |  {ingested / elapsed:10,.0f} samples/s  |  "
+                  f"lost {samples - rows:,} (ingested {ingested:,}, stored {rows:,}, {corrupt} corrupt frames)  |  "
+                  f"latency p50 {percentile(latencies, 0.5) * 1e3:6.1f} / p99 {percentile(latencies, 0.99) * 1e3:6.1f} ms"
+                  + (f"  |  fell {lag * 1e3:.0f} ms behind" if speed != "max" else ""), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Schedule compiler: timeline, conflict check and device table for a long project.
+
+Compiles the default settings and the busiest ones the sliders allow (every
+device 24 times a day) over a year, and checks the table plays back to
+the same outputs as the timeline:
+
+    python benchmarks/bench_schedule.py [--days 365] [--repeat 20]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import schedule_compiler
+from settings_model import DeviceSettings
+
+BUSIEST = {
+    "led.frequency": 24, "led.interval_h": 1, "led.duration_h": 2,
+    "pump.frequency": 24, "pump.interval_h": 1, "pump.duration_s": 300,
+    "camera.frequency": 24, "camera.interval_h": 1,
+}
+
+
+def best(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3, result
+
+
+def plays_back(timeline, table):
+    """Whether the table's output at a sample of instants matches the runs in the timeline"""
+    times, masks = schedule_compiler.read_table(table)
+    rng = np.random.default_rng(0)
+    for t in rng.integers(times[0], times[-1], 200):
+        expected = 0
+        running = (timeline.start <= t) & (timeline.end > t)
+        for device in np.unique(timeline.device[running]):
+            expected |= 1 << int(device)
+        if masks[np.searchsorted(times, t, side="right") - 1] != expected:
+            return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, changes in (("default", {}), ("busiest", BUSIEST)):
+        settings = DeviceSettings()
+        settings.update({"schedule.start_day": 20000, "schedule.end_day": 20000 + args.days - 1, **changes})
+        compile_ms, timeline = best(lambda: schedule_compiler.compile_schedule(settings), args.repeat)
+        conflict_ms, (conflicts, _) = best(lambda: schedule_compiler.find_conflicts(timeline), args.repeat)
+        table_ms, table = best(lambda: schedule_compiler.to_table(timeline), args.repeat)
+        total = compile_ms + conflict_ms + table_ms
+        print(f"{name:<8} {args.days} days  {len(timeline):6d} runs  {conflicts:6d} conflicts  "
+              f"{len(table) / 1024:6.1f} KiB  |  expand {compile_ms:5.1f} ms  conflicts {conflict_ms:5.1f} ms  "
+              f"table {table_ms:5.1f} ms  total {total:5.1f} ms  |  "
+              f"playback {'ok' if plays_back(timeline, table) else 'WRONG'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Safety-command latency behind a bulk transfer, with and without the command scheduler.
+
+Queues a bulk transfer of CameraChunk frames to an emulated NanoLab that
+takes ``--latency`` seconds per message. Part way through, a safety command
+is sent, and its time to Ack is measured. First everything goes straight to
+the link, as before the scheduler, then through a CommandScheduler. Three
+keyed LED changes are queued behind the transfer as well, to show them
+merged into one command:
+
+    python benchmarks/bench_scheduler.py [--chunks 400] [--chunk-bytes 240] [--latency 0.002]
+"""
+import argparse
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import wire_protocol
+from command_scheduler import BULK, CONTROL, SAFETY, CommandScheduler
+from device_link import SerialLink
+from emulator import EmulatedNanoLab
+from settings_model import FIELD_IDS
+from wire_protocol import Ack, CameraChunk, SetFields
+
+STOP_PUMP = SetFields(array("B", [FIELD_IDS["pump.duration_s"]]), array("H", [0]))
+
+
+def led(red):
+    return SetFields(array("B", [FIELD_IDS["led.red"], FIELD_IDS["led.green"], FIELD_IDS["led.blue"]]),
+                     array("H", [red, 0, 0]))
+
+
+class Acks:
+    """Ack arrival times by seq, filled on the link's worker thread"""
+
+    def __init__(self):
+        self.times = {}
+        self.scheduler = None
+        self.event = threading.Event()
+
+    def __call__(self, seq, message):
+        if type(message) is Ack:
+            self.times[message.seq] = time.perf_counter()
+            if self.scheduler is not None:
+                self.scheduler.on_ack(message)
+            self.event.set()
+
+    def wait(self, seq, timeout=60):
+        deadline = time.perf_counter() + timeout
+        while seq not in self.times and time.perf_counter() < deadline:
+            self.event.wait(0.01)
+            self.event.clear()
+        return self.times.get(seq)
+
+
+def chunks(count, size):
+    data = array("B", bytes(size))
+    return [CameraChunk(1, 0, i, count, data) for i in range(count)]
+
+
+def run(device, bulk, use_scheduler, head_start):
+    acks = Acks()
+    link = SerialLink(device.url, on_message=acks)
+    link.start()
+    scheduler = None
+    if use_scheduler:
+        scheduler = acks.scheduler = CommandScheduler(link)
+        scheduler.start()
+        send = lambda message, priority, key=None: scheduler.submit(message, priority, key).seq
+    else:
+        send = lambda message, priority, key=None: link.send_message(message)
+    bulk_seqs = [send(message, BULK) for message in bulk]
+    led_seqs = [send(led(red), CONTROL, "led") for red in (10, 20, 30)]
+    time.sleep(head_start)
+    start = time.perf_counter()
+    safety = send(STOP_PUMP, SAFETY)
+    safety_ms = (acks.wait(safety) - start) * 1e3
+    finished = acks.wait(bulk_seqs[-1])
+    total = (finished - start) if finished else float("nan")
+    metrics = scheduler.metrics() if scheduler else None
+    if scheduler:
+        scheduler.stop()
+    link.stop()
+    return safety_ms, total, led_seqs, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=400, help="frames in the bulk transfer")
+    parser.add_argument("--chunk-bytes", type=int, default=240)
+    parser.add_argument("--latency", type=float, default=0.002, help="seconds the device takes per message")
+    parser.add_argument("--head-start", type=float, default=0.1, help="seconds of transfer before the safety command")
+    args = parser.parse_args()
+    bulk = chunks(args.chunks, args.chunk_bytes)
+    frame = len(wire_protocol.encode(bulk[0]))
+    print(f"bulk transfer: {args.chunks} x {frame} B frames, device takes {args.latency * 1e3:.1f} ms per message")
+
+    for use_scheduler in (False, True):
+        device = EmulatedNanoLab(latency=args.latency).start()
+        safety_ms, total, led_seqs, metrics = run(device, bulk, use_scheduler, args.head_start)
+        device.stop()
+        name = "CommandScheduler" if use_scheduler else "straight to link"
+        print(f"{name:17s}  |  safety command acked after {safety_ms:7.1f} ms  |  "
+              f"transfer done {total * 1e3:6.0f} ms after it  |  device handled {device.received} messages")
+        if metrics:
+            for priority, m in metrics.items():
+                latency = m["latency_ms"]
+                print(f"    {priority:8s} submitted {m['submitted']:4d}  acked {m['acked']:4d}  "
+                      f"superseded {m['superseded']:2d}  resent {m['resent']:2d}  "
+                      + (f"latency p50 {latency[0]:7.1f}  p99 {latency[1]:7.1f} ms" if latency else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Resource simulator: a year-long project, and sweeps over candidate settings.
+
+Checks ``simulate`` against sampling the timeline every second, then
+times a sweep of every pump setting the sliders allow:
+
+    python benchmarks/bench_simulator.py [--days 365]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import schedule_compiler
+import simulator
+from settings_model import DeviceSettings
+
+PUMP_SWEEP = ("pump.duration_s", "pump.frequency", "pump.interval_h")
+
+
+def per_second(settings, days):
+    """Seconds on per day of each device, from a sample of the outputs every second of the first ``days`` days"""
+    timeline = schedule_compiler.compile_schedule(settings)
+    times, masks = timeline.edges()
+    start = settings["schedule.start_day"] * schedule_compiler.DAY
+    on = np.zeros((days, len(schedule_compiler.DEVICES)), np.int64)
+    for day in range(days):
+        seconds = np.arange(start + day * schedule_compiler.DAY, start + (day + 1) * schedule_compiler.DAY)
+        index = np.searchsorted(times, seconds, side="right") - 1
+        state = np.where(index >= 0, masks[np.maximum(index, 0)], 0)
+        for i in range(on.shape[1]):
+            on[day, i] = ((state >> i) & 1).sum()
+    return on
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    settings = DeviceSettings()
+    settings.update({"schedule.start_day": 20000, "schedule.end_day": 20000 + args.days - 1,
+                     "led.duration_h": 5, "led.frequency": 6, "led.interval_h": 3, "pump.duration_s": 120})
+
+    start = time.perf_counter()
+    days, usage = simulator.simulate(settings)
+    elapsed = time.perf_counter() - start
+    print(f"project   {len(days)} days in {elapsed * 1e3:6.1f} ms  |  {usage.water_l.sum():,.1f} L water, "
+          f"{usage.led_s.sum() / 3600:,.0f} h LED, {usage.energy_wh.sum() / 1000:,.2f} kWh")
+
+    check = min(len(days), 7)
+    start = time.perf_counter()
+    sampled = per_second(settings, check)
+    elapsed = time.perf_counter() - start
+    exact = np.array_equal(sampled, np.column_stack([usage.led_s, usage.pump_s, usage.camera_s])[:check])
+    print(f"sampling every second: {check} days in {elapsed * 1e3:6.1f} ms "
+          f"(~{elapsed / check * len(days):.1f} s for the project)  |  {'same' if exact else 'DIFFERENT'} on-times")
+
+    start = time.perf_counter()
+    grid, swept = simulator.sweep(settings, {key: simulator.full_range(key) for key in PUMP_SWEEP})
+    elapsed = time.perf_counter() - start
+    count = len(swept.water_l)
+    within = swept.water_l <= 1.0
+    print(f"sweep     {count:,} pump settings in {elapsed * 1e3:6.0f} ms ({count / elapsed:,.0f}/s)  |  "
+          f"{within.sum():,} use at most 1 L/day")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Soak test: many streaming emulated NanoLabs, each with its own DeviceController, in one process.
+
+Every lab streams ``--rate`` sensor samples a second and a camera capture
+every ``1 / --camera-fps`` seconds. It corrupts a ``--corrupt`` fraction of
+its writes and drops its connection every ``--disconnect-every`` seconds
+on average. Each controller ingests into its own ring buffers and captures
+folder, reconnects when its link fails, and sends a settings change every
+``--push-every`` seconds. Every ``--report-every`` seconds a line shows
+throughput, losses, Ack latency and peak memory, which should level off:
+
+    python benchmarks/bench_soak.py [--labs 50] [--rate 1000] [--seconds 30] [--pty]
+"""
+import argparse
+import random
+import resource
+import sys
+import tempfile
+import time
+from array import array
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import wire_protocol
+from camera import CaptureStore
+from command_scheduler import PRIORITY_NAMES
+from controller import DeviceController
+from emulator import EmulatedNanoLab
+from settings_history import SettingsHistory
+from settings_model import FIELD_IDS, DeviceSettings
+from telemetry import Telemetry
+
+RECONNECT_DELAY = 0.2  # seconds between checks for failed links
+
+
+def max_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Lab:
+    """One emulated NanoLab and the controller that talks to it"""
+
+    def __init__(self, index, root, args):
+        self.emulator = EmulatedNanoLab(pty=args.pty, telemetry_hz=args.rate, camera_fps=args.camera_fps,
+                                        frame_bytes=args.frame_bytes, noise=args.noise, corrupt=args.corrupt,
+                                        disconnect_every=args.disconnect_every, seed=index).start()
+        self.telemetry = Telemetry(capacity=1 << 13)  # fills in seconds, so memory levels off within the run
+        self.captures = CaptureStore(root / f"camera-{index}")
+        self.device = DeviceController(DeviceSettings(), SettingsHistory(root / f"history-{index}.bin"),
+                                       self.telemetry, self.captures, on_message=self.on_message)
+        self.pushed = {}  # seq -> time sent
+        self.latencies = []
+        self.timed_out = 0
+        self.corrupt_frames = 0  # of links already replaced
+        self.reconnects = 0
+        self.device.connect_to(self.emulator.url)
+
+    def on_message(self, seq, message):
+        # On the link's worker thread
+        if type(message) is wire_protocol.Ack:
+            sent = self.pushed.pop(message.seq, None)
+            if sent is None:
+                return
+            if message.status == wire_protocol.ACK_OK:
+                self.latencies.append(time.monotonic() - sent)
+            else:
+                self.timed_out += 1
+
+    def check_link(self):
+        if self.device.link.state in ("error", "closed"):
+            self.corrupt_frames += self.device.link.stats.corrupt
+            self.reconnects += 1
+            self.device.connect_to(self.emulator.url)
+
+    def push(self, rng):
+        message = wire_protocol.SetFields(array("B", [FIELD_IDS["led.red"]]), array("H", [rng.randrange(256)]))
+        sent = time.monotonic()
+        seq = self.device.send(message, key="soak")
+        if seq is not None:
+            self.pushed[seq] = sent
+
+    def close(self):
+        self.device.close()
+        self.emulator.stop()
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float("nan")
+
+
+def report(labs, elapsed, since, start_samples):
+    samples = sum(lab.telemetry.samples for lab in labs)
+    sent = sum(lab.emulator.samples_sent for lab in labs)
+    lost = sum(lab.emulator.samples_lost for lab in labs)
+    latencies = [latency for lab in labs for latency in lab.latencies]
+    corrupt = sum(lab.corrupt_frames + lab.device.link.stats.corrupt for lab in labs)
+    print(f"{elapsed:6.1f} s  |  {(samples - start_samples) / since:9,.0f} samples/s in  |  "
+          f"{samples:,} of {sent:,} sent ({lost:,} lost offline)  |  "
+          f"gaps {sum(lab.telemetry.gaps for lab in labs)}  |  corrupt {corrupt}  |  "
+          f"captures {sum(lab.captures.frames for lab in labs)}/{sum(lab.emulator.frames_sent for lab in labs)}  |  "
+          f"reconnects {sum(lab.reconnects for lab in labs)}  |  "
+          f"Ack p50 {percentile(latencies, 0.5) * 1e3:.0f} / p99 {percentile(latencies, 0.99) * 1e3:.0f} ms, "
+          f"{sum(lab.timed_out for lab in labs)} failed  |  max RSS {max_rss_mib():.0f} MiB", flush=True)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labs", type=int, default=50)
+    parser.add_argument("--rate", type=int, default=1000, help="sensor samples per second per lab")
+    parser.add_argument("--camera-fps", type=float, default=0.2)
+    parser.add_argument("--frame-bytes", type=int, default=20_000)
+    parser.add_argument("--noise", type=float, default=1.0)
+    parser.add_argument("--corrupt", type=float, default=1e-4, help="fraction of writes with a corrupted byte")
+    parser.add_argument("--disconnect-every", type=float, default=20.0, help="mean seconds between disconnects")
+    parser.add_argument("--push-every", type=float, default=1.0, help="seconds between settings changes")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--report-every", type=float, default=5.0)
+    parser.add_argument("--pty", action="store_true", help="serve the labs on pseudo-terminals")
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.monotonic()
+        labs = [Lab(i, Path(tmp), args) for i in range(args.labs)]
+        print(f"{args.labs} labs at {args.rate:,} Hz ({args.labs * args.rate:,} samples/s), "
+              f"started in {time.monotonic() - start:.2f} s; max RSS {max_rss_mib():.0f} MiB")
+        start = last_report = next_push = time.monotonic()
+        counted = 0
+        while time.monotonic() - start < args.seconds:
+            time.sleep(RECONNECT_DELAY)
+            now = time.monotonic()
+            for lab in labs:
+                lab.check_link()
+            if now >= next_push:
+                for lab in labs:
+                    lab.push(rng)
+                next_push += args.push_every
+            if now - last_report >= args.report_every:
+                counted = report(labs, now - start, now - last_report, counted)
+                last_report = now
+        metrics = [lab.device.commands.metrics() for lab in labs]
+        for name in PRIORITY_NAMES:
+            submitted = sum(m[name]["submitted"] for m in metrics)
+            if submitted:
+                print(f"    {name:8s} submitted {submitted:6d}  acked {sum(m[name]['acked'] for m in metrics):6d}  "
+                      f"resent {sum(m[name]['resent'] for m in metrics):4d}  "
+                      f"timed out {sum(m[name]['timed_out'] for m in metrics):4d}")
+        for lab in labs:
+            lab.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Column store write speed, open time and range-query latency.
+
+Appends rows in telemetry-sized batches to a scratch store, reopens it and
+runs range queries straight off the memory maps, reporting resident memory
+along the way:
+
+    python benchmarks/bench_storage.py [--rows N] [--dir PATH]
+"""
+import argparse
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from storage import TELEMETRY_COLUMNS, ColumnStore
+
+RATE_HZ = 250
+
+
+def max_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000_000)
+    parser.add_argument("--batch", type=int, default=25_000)
+    parser.add_argument("--dir", help="store location (default: a temporary directory)")
+    args = parser.parse_args()
+    root = Path(args.dir or tempfile.mkdtemp(prefix="nanolab-store-"))
+
+    rng = np.random.default_rng(0)
+    template = {name: rng.standard_normal(args.batch).astype(dtype) for name, dtype in TELEMETRY_COLUMNS.items()}
+    step = np.arange(args.batch) / RATE_HZ
+
+    store = ColumnStore(root)
+    start = time.perf_counter()
+    for first in range(0, args.rows, args.batch):
+        template["time"] = first / RATE_HZ + step
+        store.append(template)
+    store.close()
+    elapsed = time.perf_counter() - start
+    row_bytes = sum(np.dtype(dtype).itemsize for dtype in TELEMETRY_COLUMNS.values())
+    print(f"write: {store.rows:,} rows in {elapsed:.2f} s ({store.rows / elapsed / 1e6:.1f} M rows/s, "
+          f"{store.rows * row_bytes / elapsed / 2**20:.0f} MiB/s), {len(store.index)} blocks")
+
+    rss = max_rss_mib()
+    start = time.perf_counter()
+    store = ColumnStore(root)
+    print(f"open: {(time.perf_counter() - start) * 1e3:.2f} ms for {store.rows:,} rows")
+
+    first, last = store.span
+    for seconds in (60, 3600, 86400):
+        t0 = rng.uniform(first, max(first, last - seconds))
+        start = time.perf_counter()
+        rows = store.count(t0, t0 + seconds)
+        count_ms = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        total = sum(float(part["temperature"].sum()) for part in store.iter_range(t0, t0 + seconds, ["temperature"]))
+        scan_ms = (time.perf_counter() - start) * 1e3
+        print(f"range {seconds:>6} s: locate {rows:>10,} rows in {count_ms:.2f} ms, "
+              f"scan a column in {scan_ms:.1f} ms (mean {total / max(rows, 1):+.3f})")
+    print(f"max RSS {max_rss_mib():.0f} MiB (before reopening: {rss:.0f} MiB)")
+
+    store.close()
+    if not args.dir:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
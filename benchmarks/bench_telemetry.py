@@ -0,0 +1,98 @@
+"""Telemetry ingest throughput and memory.
+
+Streams TelemetryBatch frames through a SerialLink on pyserial's loop://
+handler into the ring buffers, then checks that every sample arrived, how
+long each batch took to ingest, and that resident memory stayed flat:
+
+    python benchmarks/bench_telemetry.py [--rate HZ] [--seconds S] [--soak-samples N]
+"""
+import argparse
+import resource
+import sys
+import time
+from array import array
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+import wire_protocol
+from device_link import SerialLink
+from telemetry import CHANNELS, Telemetry
+
+
+def make_batch(t0_ms, n, dt_us, rng):
+    return wire_protocol.TelemetryBatch(
+        t0_ms, dt_us,
+        array("h", (2100 + rng.integers(-50, 50, n)).tolist()),
+        array("H", (4500 + rng.integers(-100, 100, n)).tolist()),
+        array("I", (101325 + rng.integers(-20, 20, n)).tolist()),
+        array("B", rng.integers(0, 2, n).tolist()),
+    )
+
+
+def max_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=1000, help="aggregate samples/s over all channels")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--batch-ms", type=int, default=100)
+    parser.add_argument("--soak-samples", type=int, default=20_000_000,
+                        help="samples per channel pushed straight into the buffers afterwards")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    # --- real-time stream over the loop:// link ---
+    per_channel = args.rate // len(CHANNELS)
+    n = max(1, per_channel * args.batch_ms // 1000)
+    dt_us = 1_000_000 // per_channel
+    telemetry = Telemetry()
+    ingest_times = []
+
+    def on_message(seq, message):
+        t = time.perf_counter()
+        telemetry.ingest(message)
+        ingest_times.append(time.perf_counter() - t)
+
+    link = SerialLink("loop://", on_message=on_message)
+    link.start()
+    batches = int(args.seconds * 1000 / args.batch_ms)
+    start = time.perf_counter()
+    for i in range(batches):
+        link.send(wire_protocol.encode(make_batch(i * args.batch_ms, n, dt_us, rng), i))
+        time.sleep(max(0.0, start + (i + 1) * args.batch_ms / 1000 - time.perf_counter()))
+    deadline = time.perf_counter() + 2
+    while telemetry.batches < batches and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    link.stop()
+
+    sent = batches * n
+    ingest_us = np.array(ingest_times) * 1e6
+    print(f"stream: {args.rate} samples/s aggregate, {batches} batches of {n} samples/channel")
+    print(f"  received {telemetry.samples}/{sent} samples per channel, "
+          f"{sent - telemetry.samples} lost, {telemetry.gaps} gaps, {link.stats.corrupt} corrupt frames")
+    print(f"  ingest per batch: median {np.median(ingest_us):.1f} us, max {ingest_us.max():.1f} us")
+
+    # --- soak: far more samples than the buffers hold ---
+    telemetry = Telemetry()
+    batch = make_batch(0, 1000, dt_us, rng)
+    rounds = args.soak_samples // 1000
+    rss_warm = None
+    start = time.perf_counter()
+    for i in range(rounds):
+        telemetry.ingest(batch._replace(t0_ms=i * 1000 * dt_us // 1000))
+        if rss_warm is None and telemetry.samples > telemetry.capacity:
+            rss_warm = max_rss_mib()  # every buffer page has now been touched once
+    elapsed = time.perf_counter() - start
+    print(f"soak: {telemetry.samples:,} samples/channel in {elapsed:.2f} s "
+          f"({telemetry.samples * len(CHANNELS) / elapsed / 1e6:.1f} M samples/s aggregate)")
+    print(f"  buffers {telemetry.nbytes() / 2**20:.1f} MiB, "
+          f"max RSS after first lap {rss_warm:.1f} MiB, at end {max_rss_mib():.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
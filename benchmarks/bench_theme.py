@@ -0,0 +1,63 @@
+"""Theme toggle latency with every page constructed.
+
+Builds the main window offscreen, constructs all pages, then times
+``toggle_theme`` including the re-polish and repaint it causes, and the
+first switch to another page afterwards, which restyles that page:
+
+    python benchmarks/bench_theme.py [--toggles N]
+"""
+import argparse
+import importlib.util
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("NANOLAB_DATA", tempfile.mkdtemp(prefix="nanolab-theme-"))
+
+
+def load_gui():
+    spec = importlib.util.spec_from_file_location("new_gui", ROOT / "new.gui.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--toggles", type=int, default=20)
+    args = parser.parse_args()
+
+    gui = load_gui()
+    app = gui.QApplication([])
+    window = gui.MainWindow()
+    window.PREWARM_PAGES = False
+    for name in window.page_factories:
+        window.page(name)
+    window.show()
+    app.processEvents()
+
+    toggles, switches = [], []
+    pages = ["led", "data", "schedule", "storage", "water", "camera"]
+    for i in range(args.toggles):
+        start = time.perf_counter()
+        window.toggle_theme()
+        app.processEvents()
+        toggles.append((time.perf_counter() - start) * 1e3)
+        start = time.perf_counter()
+        window.switch_to(pages[i % len(pages)])
+        app.processEvents()
+        switches.append((time.perf_counter() - start) * 1e3)
+    for label, times in (("toggle_theme", toggles), ("next switch_to", switches)):
+        print(f"{label:>14} with {len(window.pages)} pages: median {statistics.median(times):.1f} ms, "
+              f"max {max(times):.1f} ms over {len(times)} runs")
+    window.close()
+
+
+if __name__ == "__main__":
+    main()
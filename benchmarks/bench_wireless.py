@@ -0,0 +1,65 @@
+"""Wireless link: pipelined commands against request/response lockstep.
+
+Sends a burst of settings updates through TcpLink to an emulated bridge
+with network latency and frame loss, once with one command in flight at a
+time and once pipelined, and checks the bridge ends up with the last value:
+
+    python benchmarks/bench_wireless.py [--commands 200] [--latency 0.02] [--loss 0.02]
+"""
+import argparse
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import wire_protocol
+from emulator import EmulatedBridge
+from settings_model import FIELD_IDS
+from tcp_link import MAX_IN_FLIGHT, TcpLink
+
+FIELD = FIELD_IDS["pump.frequency"]
+
+
+def run(commands, window, latency, loss):
+    bridge = EmulatedBridge(latency=latency, loss=loss, seed=0).start()
+    acked = set()
+    all_acked = threading.Event()
+
+    def on_message(seq, message):
+        if type(message) is wire_protocol.Ack:
+            acked.add(message.seq)
+            if len(acked) == commands:
+                all_acked.set()
+
+    link = TcpLink(bridge.url, on_message=on_message, window=window)
+    link.start()
+    start = time.perf_counter()
+    for i in range(commands):
+        link.send_message(wire_protocol.SetFields(array("B", [FIELD]), array("H", [i % 24 + 1])))
+    all_acked.wait(120)
+    elapsed = time.perf_counter() - start
+    link.stop()
+    bridge.stop()
+    correct = bridge.settings[FIELD] == (commands - 1) % 24 + 1
+    return (f"{len(acked)}/{commands} acked in {elapsed * 1e3:7.0f} ms  |  {link.retransmits} resent  |  "
+            f"{link.stats.frames_sent / max(link.stats.writes, 1):4.1f} frames/write  |  "
+            f"final value {'ok' if correct else 'WRONG'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--commands", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds the bridge delays each reply")
+    parser.add_argument("--loss", type=float, default=0.02, help="fraction of frames lost each way")
+    args = parser.parse_args()
+
+    for loss in (0.0, args.loss):
+        for name, window in (("lockstep", 1), ("pipelined", MAX_IN_FLIGHT)):
+            print(f"loss {loss:4.0%}  {name:<9}  {run(args.commands, window, args.latency, loss)}")
+
+
+if __name__ == "__main__":
+    main()
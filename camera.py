@@ -0,0 +1,252 @@
+"""Camera captures: reassembly, storage on disk and bounded thumbnailing.
+
+The NanoLab sends each capture as a run of CameraChunk messages. The device
+link's worker thread feeds them to ``CaptureStore.ingest``, which reassembles
+the frame and writes it to the captures directory. Image files dropped into
+that directory by hand (for testing without a camera) are picked up the
+same way, by ``CaptureStore.scan``.
+
+Thumbnails are decoded by a ``ThumbnailPipeline`` on a small thread pool and
+kept in a ``ByteLRU`` with a fixed byte budget. The pipeline queues at most
+``max_queued`` requests and serves the newest first, so scrolling quickly
+through thousands of captures decodes what is on screen now instead of
+everything that went past. Nothing here grows with the number of captures
+except the list of their paths.
+
+This module has no GUI code: the decoder is passed in by the caller.
+"""
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import wire_protocol
+from storage import data_dir
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+CHUNK_SIZE = 512              # bytes per CameraChunk, ~45 ms at 115200 baud
+MAX_PENDING_FRAMES = 4        # partly received captures kept while newer ones arrive
+THUMBNAIL_BUDGET = 64 << 20   # bytes of decoded thumbnails kept in memory
+
+
+def captures_dir():
+    """Where camera captures are kept: ``data_dir()/camera``."""
+    return data_dir() / "camera"
+
+
+def split_frame(data, frame_id, t_ms, size=CHUNK_SIZE):
+    """The CameraChunk messages that carry one capture, as the device sends them."""
+    count = max(1, -(-len(data) // size))
+    return [wire_protocol.CameraChunk(frame_id, t_ms, i, count, array("B", data[i * size:(i + 1) * size]))
+            for i in range(count)]
+
+
+class FrameAssembler:
+    """Joins CameraChunk messages back into whole captures.
+
+    Chunks may arrive for a few captures at once; beyond ``max_pending``
+    unfinished captures the oldest is dropped and counted, so a lost chunk
+    costs one capture and never memory.
+    """
+
+    def __init__(self, max_pending=MAX_PENDING_FRAMES):
+        self.max_pending = max_pending
+        self.pending = OrderedDict()  # frame_id -> [chunks, chunks still missing]
+        self.dropped = 0
+
+    def add(self, chunk):
+        """Add one CameraChunk; returns the capture's bytes once it is complete, else None."""
+        entry = self.pending.get(chunk.frame_id)
+        if entry is None or len(entry[0]) != chunk.count:
+            entry = self.pending[chunk.frame_id] = [[None] * chunk.count, chunk.count]
+            while len(self.pending) > self.max_pending:
+                self.pending.popitem(last=False)
+                self.dropped += 1
+        parts = entry[0]
+        if not 0 <= chunk.index < len(parts):
+            return None
+        if parts[chunk.index] is None:
+            entry[1] -= 1
+        parts[chunk.index] = chunk.data
+        if entry[1]:
+            return None
+        del self.pending[chunk.frame_id]
+        return b"".join(part.tobytes() for part in parts)
+
+
+class CaptureStore:
+    """The image files in one directory, oldest first."""
+
+    def __init__(self, root):
+        self.root = root
+        self.paths = []
+        self.frames = 0  # captures received from the device
+        self.assembler = FrameAssembler()
+        self._names = set()
+        self._mtime = None
+
+    def ingest(self, chunk):
+        """Add a CameraChunk from the device; writes the capture once all its chunks are in.
+
+        Called on the device link's worker thread; only touches the disk.
+        """
+        data = self.assembler.add(chunk)
+        if data is not None:
+            self.save(data, chunk.frame_id)
+
+    def save(self, data, frame_id=0):
+        """Write one capture; the file appears whole or not at all. Returns its path."""
+        suffix = ".png" if data.startswith(b"\x89PNG") else ".jpg"
+        path = self.root / f"{time.strftime('%Y%m%d-%H%M%S')}-{frame_id:08x}{suffix}"
+        self.root.mkdir(parents=True, exist_ok=True)
+        part = path.with_name(path.name + ".part")
+        part.write_bytes(data)
+        part.replace(path)
+        self.frames += 1
+        return path
+
+    def scan(self):
+        """Pick up captures written since the last scan; returns the new paths.
+
+        The directory is only listed when its modification time has changed.
+        """
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if mtime == self._mtime:
+            return []
+        self._mtime = mtime
+        with os.scandir(self.root) as entries:
+            names = sorted(entry.name for entry in entries
+                           if entry.name not in self._names and os.path.splitext(entry.name)[1].lower() in IMAGE_SUFFIXES)
+        self._names.update(names)
+        new = [self.root / name for name in names]
+        self.paths.extend(new)
+        return new
+
+
+class ByteLRU:
+    """Least-recently-used mapping holding at most ``budget`` bytes of values.
+
+    Sizes are given by the caller, so values can be anything (QImage,
+    QPixmap, bytes). Not thread-safe; use it from one thread.
+    """
+
+    def __init__(self, budget=THUMBNAIL_BUDGET):
+        self.budget = budget
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()  # key -> (value, size)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, value, size):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[1]
+        self._items[key] = (value, size)
+        self.nbytes += size
+        while self.nbytes > self.budget and len(self._items) > 1:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+
+    def clear(self):
+        self._items.clear()
+        self.nbytes = 0
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups * 100 if lookups else 0
+        return f"{len(self)} cached ({self.nbytes / 2**20:.1f} of {self.budget / 2**20:.0f} MiB, {hit_rate:.0f}% hits)"
+
+
+class ThumbnailPipeline:
+    """Decodes thumbnails on a thread pool, most recently requested first.
+
+    ``decode(key)`` runs on a worker and returns the thumbnail, or None if it
+    cannot be decoded; ``on_done(key, thumbnail)`` is then called on that
+    worker and must be thread-safe (Qt code should emit a signal). A key is
+    never decoded twice at once, and only as many decodes as there are
+    workers are handed to the pool, so the backlog is the bounded request
+    queue alone.
+    """
+
+    def __init__(self, decode, on_done, workers=None, max_queued=256):
+        self.decode = decode
+        self.on_done = on_done
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_queued = max_queued
+        self.decoded = 0
+        self.failed = 0
+        self.skipped = 0  # requests dropped from the queue before a worker got to them
+        self._queued = OrderedDict()  # newest request last
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="thumbnail")
+
+    def request(self, key):
+        """Ask for ``key``'s thumbnail; cheap, and repeated requests are merged."""
+        with self._lock:
+            if self._closed or key in self._in_flight:
+                return
+            self._queued[key] = None
+            self._queued.move_to_end(key)
+            if len(self._queued) > self.max_queued:
+                self._queued.popitem(last=False)
+                self.skipped += 1
+        self._pump()
+
+    def cancel_pending(self):
+        """Forget queued requests, e.g. when the gallery is hidden; running decodes finish."""
+        with self._lock:
+            self._queued.clear()
+
+    def _pump(self):
+        with self._lock:
+            while not self._closed and self._queued and len(self._in_flight) < self.workers:
+                key, _ = self._queued.popitem(last=True)
+                self._in_flight.add(key)
+                self._executor.submit(self._run, key)
+
+    def _run(self, key):
+        try:
+            thumbnail = self.decode(key)
+        except Exception:
+            thumbnail = None
+        with self._lock:
+            self._in_flight.discard(key)
+            if thumbnail is None:
+                self.failed += 1
+            else:
+                self.decoded += 1
+            closed = self._closed
+        if not closed:
+            self.on_done(key, thumbnail)
+            self._pump()
+
+    def shutdown(self):
+        """Drop queued requests and wait for the running decodes."""
+        with self._lock:
+            self._closed = True
+            self._queued.clear()
+        self._executor.shutdown(wait=True)
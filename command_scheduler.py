@@ -0,0 +1,318 @@
+"""Prioritized outbound commands with acknowledgements, retries and deduplication.
+
+A link sends frames in the order they are queued, so a safety command
+queued behind a bulk transfer waits for all of it. ``CommandScheduler``
+sits between the controller and the link and decides what goes next:
+
+- Commands wait in one queue per priority (SAFETY, CONTROL, BULK), and the
+  most urgent waiting command is always sent first.
+- Only ``window`` commands are handed to the link at a time, and at most
+  ``bulk_window`` of them bulk, so the link's own queue stays short. A bulk
+  transfer is a stream of small commands, and it is preempted between any
+  two of them. SAFETY commands skip the window, so at most ``window``
+  frames are ever ahead of one.
+- A command is resent with the same sequence number if its Ack does not
+  come within its ``timeout``, up to ``retries`` times. After that it fails
+  with status TIMED_OUT. A resend never carries a value that a newer
+  command with the same key has replaced, since it would arrive after it.
+  Retransmission is done here only: a link that would also resend on its
+  own (TcpLink) has its ``resend`` turned off, or every lost frame would go
+  out twice.
+- A command submitted with a ``key`` replaces a waiting command with the
+  same key. SetFields are merged, the newest value of each field winning,
+  so three LED color changes queued behind a transfer go out as one.
+
+``on_done(command)`` is called when a command is acknowledged or refused
+(on the thread that passed in the Ack), times out (on the scheduler's
+thread) or is superseded; it must be cheap and thread-safe. A command
+submitted with its own ``on_done`` reports to that instead. ``metrics()`` reports
+the queue depth and the submit-to-Ack latency for each priority.
+"""
+import itertools
+import threading
+import time
+from array import array
+from collections import deque
+
+from wire_protocol import ACK_OK, SetFields
+
+SAFETY, CONTROL, BULK = 0, 1, 2
+PRIORITY_NAMES = ("safety", "control", "bulk")
+
+ACK_TIMEOUT = 0.5  # seconds to wait for an Ack before resending
+RETRIES = 3  # resends before a command fails
+WINDOW = 8  # commands awaiting their Ack at once
+BULK_WINDOW = 4  # of which bulk
+RETRY_FULL = 0.01  # seconds before trying again when the link's queue is full
+LATENCY_SAMPLES = 1024
+
+# Statuses of commands that never got an Ack from the device
+TIMED_OUT = "timed out"
+SUPERSEDED = "superseded"
+
+
+class Command:
+    """One message on its way to the device; ``status`` is None until it is done."""
+
+    __slots__ = ("message", "priority", "key", "timeout", "retries", "seq", "on_done", "order", "submitted", "sent",
+                 "sends", "status")
+    _order = itertools.count()
+
+    def __init__(self, message, priority, key, timeout, retries, seq, on_done=None):
+        self.message = message
+        self.priority = priority
+        self.key = key
+        self.timeout = timeout
+        self.retries = retries
+        self.seq = seq
+        self.on_done = on_done
+        self.order = next(Command._order)
+        self.submitted = time.monotonic()
+        self.sent = None
+        self.sends = 0
+        self.status = None
+
+    def __repr__(self):
+        return (f"Command({type(self.message).__name__}, {PRIORITY_NAMES[self.priority]}, seq={self.seq}, "
+                f"sends={self.sends}, status={self.status!r})")
+
+
+def merge_fields(old, new):
+    """One SetFields carrying the fields of ``old`` and ``new``, ``new``'s values winning."""
+    values = dict(zip(old.ids, old.values))
+    values.update(zip(new.ids, new.values))
+    return SetFields(array("B", values), array("H", values.values()))
+
+
+def without_fields(message, ids):
+    """``message`` without the fields in ``ids``, or None if nothing is left."""
+    kept = [(i, value) for i, value in zip(message.ids, message.values) if i not in ids]
+    if not kept:
+        return None
+    return SetFields(array("B", (i for i, _ in kept)), array("H", (value for _, value in kept)))
+
+
+class PriorityStats:
+    """Counters and Ack latencies for one priority."""
+
+    def __init__(self):
+        self.submitted = 0
+        self.acked = 0
+        self.refused = 0
+        self.resent = 0
+        self.timed_out = 0
+        self.superseded = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # seconds from submit to Ack
+
+    def latency_ms(self):
+        """Return (p50, p99, max) submit-to-Ack latency in ms, or None before the first Ack."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        at = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e3
+        return at(0.5), at(0.99), ordered[-1] * 1e3
+
+
+class CommandScheduler:
+    """Feeds ``link`` (a SerialLink or TcpLink) from priority queues on its own thread."""
+
+    def __init__(self, link, on_done=None, window=WINDOW, bulk_window=BULK_WINDOW):
+        self.link = link
+        if getattr(link, "resend", False):
+            link.resend = False
+        self.on_done = on_done
+        self.window = window
+        self.bulk_window = bulk_window
+        self.queues = [deque() for _ in PRIORITY_NAMES]
+        self.in_flight = {}  # seq -> Command, in the order sent
+        self.stats = [PriorityStats() for _ in PRIORITY_NAMES]
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+    # ----- caller side (any thread) -----
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name=f"CommandScheduler({self.link.url})", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, message, priority=CONTROL, key=None, timeout=ACK_TIMEOUT, retries=RETRIES, on_done=None):
+        """Queue ``message``; returns its Command, whose ``seq`` the device's Ack will carry.
+
+        A waiting command with the same ``key`` is superseded: this one takes
+        its place in the queue and, for SetFields, its fields.
+        """
+        command = Command(message, priority, key, timeout, retries, self.link.next_seq(), on_done)
+        superseded = None
+        with self._cond:
+            queue = self.queues[priority]
+            self.stats[priority].submitted += 1
+            if key is not None:
+                for i, waiting in enumerate(queue):
+                    if waiting.key == key:
+                        if type(waiting.message) is SetFields and type(message) is SetFields:
+                            command.message = merge_fields(waiting.message, message)
+                        command.submitted = waiting.submitted
+                        queue[i] = command
+                        superseded = waiting
+                        break
+            if superseded is None:
+                queue.append(command)
+            self._cond.notify()
+        if superseded is not None:
+            self.stats[priority].superseded += 1
+            self._finish(superseded, SUPERSEDED)
+        return command
+
+    def on_ack(self, ack):
+        """Complete the command ``ack`` answers; returns True if it was one of ours. Any thread."""
+        return self.complete(ack.seq, ack.status)
+
+    def complete(self, seq, status=ACK_OK):
+        """Complete command ``seq``, e.g. when a reply that stands for its Ack arrives; returns True if in flight."""
+        with self._cond:
+            command = self.in_flight.pop(seq, None)
+            if command is None:
+                return False
+            stats = self.stats[command.priority]
+            if status == ACK_OK:
+                stats.acked += 1
+                stats.latencies.append(time.monotonic() - command.submitted)
+            else:
+                stats.refused += 1
+            # Refill the window from here, usually the link's worker, so it writes the next command on its way
+            # back instead of after its next read times out
+            self._dispatch()
+            self._cond.notify()
+        self._finish(command, status)
+        return True
+
+    def depth(self, priority=None):
+        """Commands waiting to be sent, at ``priority`` or in all queues."""
+        with self._cond:
+            if priority is None:
+                return sum(len(queue) for queue in self.queues)
+            return len(self.queues[priority])
+
+    def metrics(self):
+        """Per priority name: queue depth, commands in flight, counters and latency (p50, p99, max) in ms."""
+        with self._cond:
+            flying = [0] * len(PRIORITY_NAMES)
+            for command in self.in_flight.values():
+                flying[command.priority] += 1
+            return {name: {"queued": len(self.queues[p]), "in_flight": flying[p], "submitted": stats.submitted,
+                           "acked": stats.acked, "refused": stats.refused, "resent": stats.resent,
+                           "timed_out": stats.timed_out, "superseded": stats.superseded,
+                           "latency_ms": stats.latency_ms()}
+                    for p, (name, stats) in enumerate(zip(PRIORITY_NAMES, self.stats))}
+
+    def summary(self):
+        parts = []
+        for name, m in self.metrics().items():
+            if not m["submitted"]:
+                continue
+            text = f"{name} {m['queued']} queued"
+            if m["latency_ms"]:
+                text += f", p50 {m['latency_ms'][0]:.0f} / p99 {m['latency_ms'][1]:.0f} ms"
+            if m["timed_out"]:
+                text += f", {m['timed_out']} timed out"
+            parts.append(text)
+        return "  |  ".join(parts)
+
+    # ----- scheduler thread -----
+
+    def _run(self):
+        while True:
+            finished = []
+            with self._cond:
+                if self._stop:
+                    return
+                wait = self._dispatch()
+                wait = min(wait, self._expire(finished))
+                if not finished:
+                    self._cond.wait(None if wait == float("inf") else wait)
+            for command, status in finished:  # outside the lock, so on_done may submit or take its own locks
+                self._finish(command, status)
+
+    def _dispatch(self):
+        """Hand the most urgent waiting commands that fit in the window to the link; returns seconds until a retry."""
+        bulk = sum(command.priority == BULK for command in self.in_flight.values())
+        for priority, queue in enumerate(self.queues):
+            while queue:
+                if priority != SAFETY and len(self.in_flight) >= self.window:
+                    return float("inf")  # woken by the next Ack
+                if priority == BULK and bulk >= self.bulk_window:
+                    return float("inf")
+                command = queue[0]
+                if not self._send(command):
+                    return RETRY_FULL
+                queue.popleft()
+                bulk += priority == BULK
+        return float("inf")
+
+    def _send(self, command):
+        if self.link.send_message(command.message, command.seq) is None:
+            return False
+        if command.sends:
+            self.stats[command.priority].resent += 1
+        command.sends += 1
+        command.sent = time.monotonic()
+        self.in_flight[command.seq] = command
+        return True
+
+    def _expire(self, finished):
+        """Resend or fail commands whose Ack is overdue, appending failed ones to ``finished`` as (command, status).
+
+        Returns seconds until the next one is due.
+        """
+        now = time.monotonic()
+        wait = float("inf")
+        for command in list(self.in_flight.values()):
+            due = command.sent + command.timeout
+            if now < due:
+                wait = min(wait, due - now)
+                continue
+            del self.in_flight[command.seq]
+            if command.sends > command.retries:
+                self.stats[command.priority].timed_out += 1
+                finished.append((command, TIMED_OUT))
+            elif not self._still_needed(command):
+                self.stats[command.priority].superseded += 1
+                finished.append((command, SUPERSEDED))
+            elif self._send(command):
+                wait = min(wait, command.timeout)
+            else:
+                self.queues[command.priority].appendleft(command)
+                wait = min(wait, RETRY_FULL)
+        return wait
+
+    def _still_needed(self, command):
+        """Drop from an overdue ``command`` what newer commands with its key replace; False if nothing is left."""
+        if command.key is None:
+            return True
+        newer = [other for other in itertools.chain(self.in_flight.values(), *self.queues)
+                 if other.key == command.key and other.order > command.order]
+        if not newer:
+            return True
+        if type(command.message) is not SetFields:
+            return False
+        replaced = {i for other in newer if type(other.message) is SetFields for i in other.message.ids}
+        command.message = without_fields(command.message, replaced)
+        return command.message is not None
+
+    def _finish(self, command, status):
+        command.status = status
+        on_done = command.on_done or self.on_done
+        if on_done is not None:
+            on_done(command)
@@ -0,0 +1,218 @@
+"""One NanoLab's link and everything that flows over it, with no GUI code.
+
+``DeviceController`` owns the device link (SerialLink or TcpLink), writes
+what the device streams into the telemetry ring buffers and the captures
+directory, and keeps the saved settings in sync with the device. The GUI
+wraps it in Qt signals; ``nanolabd.py`` runs it headless.
+
+Telemetry and camera chunks are handled on the link's worker thread, since
+passing every batch to another thread would cost more than handling it.
+Every other message goes to ``on_message``, still on the worker thread;
+the owner hands Acks back to ``acknowledge`` from its own thread, the one
+that calls ``sync``, so the two never race.
+
+Commands go out through a CommandScheduler, most urgent first, and are
+resent until acknowledged. A command that is never acknowledged, or that a
+newer one replaced, is reported to ``on_message`` as an Ack whose status
+is ``command_scheduler.TIMED_OUT`` or ``SUPERSEDED``, so whoever waits for
+its Ack stops waiting.
+
+File listings and chunks from the SD card go to the ``sd`` SdCard
+(sd_download.py), also on the worker thread.
+
+``LivePreview`` streams values that are still being edited to the device
+without saving them, e.g. while a slider is dragged.
+"""
+import time
+from array import array
+
+import wire_protocol
+from command_scheduler import CONTROL, SUPERSEDED, TIMED_OUT, CommandScheduler
+from device_link import open_link
+from sd_download import SdCard
+from settings_model import FIELD_IDS, UNSET
+
+PREVIEW_INTERVAL = 0.05  # seconds between preview frames, at most
+PREVIEW_ACK_TIMEOUT = 0.5  # an unanswered preview frame stops holding back the next one after this long
+
+
+class DeviceController:
+    def __init__(self, settings, history, telemetry, captures, on_message=None, on_state=None, record=None):
+        self.settings = settings
+        self.history = history
+        self.telemetry = telemetry
+        self.captures = captures
+        self.on_message = on_message
+        self.on_state = on_state
+        self.record = record  # directory to record each link's traffic in (recording.py), or None
+        self.link = None
+        self.commands = None  # the link's CommandScheduler
+        self.pending_syncs = {}  # seq -> SetFields message awaiting its Ack
+        self.preview = LivePreview(self)
+        self.sd = SdCard(self)
+
+    def connect_to(self, url):
+        """Open a link to ``url`` unless one is already open; returns True if a new link was started.
+
+        A new link may reach a different or restarted device, so every saved
+        setting is pending again.
+        """
+        if self.link is not None and self.link.url == url and self.link.state in ("open", "reconnecting"):
+            return False
+        self.close()
+        self.sd.interrupt("disconnected")
+        self.link = open_link(url, on_message=self._on_message, on_state=self._on_state, record=self.record)
+        self.commands = CommandScheduler(self.link, on_done=self._on_done)
+        self.link.start()
+        self.commands.start()
+        self.settings.invalidate()
+        self.pending_syncs.clear()
+        self.preview.reset()
+        return True
+
+    def _on_message(self, seq, message):
+        # Runs on the link's worker thread
+        if type(message) is wire_protocol.TelemetryBatch:
+            self.telemetry.ingest(message)
+        elif type(message) is wire_protocol.CameraChunk:
+            self.captures.ingest(message)
+        elif type(message) is wire_protocol.FileData:
+            self.commands.complete(seq)  # it answers the FileRead with its seq
+            self.sd.on_message(seq, message)
+        elif type(message) is wire_protocol.FileInfo:
+            self.sd.on_message(seq, message)
+        else:
+            if type(message) is wire_protocol.Ack:
+                self.commands.on_ack(message)
+            if self.on_message is not None:
+                self.on_message(seq, message)
+
+    def _on_done(self, command):
+        # The scheduler gave up on ``command``: answer for the device
+        if command.status in (TIMED_OUT, SUPERSEDED) and self.on_message is not None:
+            self.on_message(command.seq, wire_protocol.Ack(command.seq, command.status))
+
+    def _on_state(self, state, detail):
+        if state == "open":
+            self.sd.resume()
+        elif state in ("error", "closed", "reconnecting"):
+            self.sd.interrupt(detail or state)
+        if self.on_state is not None:
+            self.on_state(state, detail)
+
+    def send(self, message, priority=CONTROL, key=None):
+        """Queue ``message`` (see CommandScheduler.submit); returns its sequence number, or None without a link."""
+        if self.link is None:
+            return None
+        return self.commands.submit(message, priority, key).seq
+
+    def sync(self):
+        """Queue the saved settings the device has not acknowledged yet.
+
+        Returns ``(seq, message)``: message is None when there is nothing to
+        send, and seq is None without a link. A sync still waiting to be sent
+        is merged into this one.
+        """
+        message = self.settings.sync_message()
+        if message is None:
+            return None, None
+        if self.link is None:
+            return None, message
+        command = self.commands.submit(message, CONTROL, key="sync")
+        self.pending_syncs[command.seq] = command.message
+        return command.seq, command.message
+
+    def acknowledge(self, ack):
+        """Record a settings sync as applied once the device acknowledges it; returns True if ``ack`` was for one."""
+        sent = self.pending_syncs.pop(ack.seq, None)
+        if sent is None:
+            self.preview.acknowledge(ack)
+            return False
+        if ack.status == wire_protocol.ACK_OK:
+            self.settings.mark_synced(sent)
+            self.history.record(self.settings.synced)
+        return True
+
+    def expected(self, field_id):
+        """The value the device holds for ``field_id`` once the syncs on the way are applied, or UNSET if unknown."""
+        for message in reversed(self.pending_syncs.values()):
+            for i, value in zip(message.ids, message.values):
+                if i == field_id:
+                    return value
+        return self.settings.synced[field_id]
+
+    def close(self):
+        if self.link is not None:
+            self.commands.stop()
+            self.link.stop()
+            self.link = None
+
+
+class LivePreview:
+    """Show unsaved values on the device while they are edited; the newest value always wins.
+
+    ``offer`` only records the values. ``flush``, called on a timer, sends
+    the newest values that differ from the last frame, in one SetFields
+    frame, at most every ``interval`` seconds and only once the previous
+    frame is acknowledged. However fast a slider moves, the link carries a
+    handful of small frames a second and never queues stale ones.
+
+    The preview is not saved: ``stop`` puts the fields it touched back to
+    what the device held before, so only "Send" changes the device for good.
+    """
+
+    def __init__(self, device, interval=PREVIEW_INTERVAL):
+        self.device = device
+        self.interval = interval
+        self.sent = 0  # frames
+        self.offered = 0  # values passed to offer
+        self.reset()
+
+    def reset(self):
+        self._latest = {}  # field id -> newest value not yet sent
+        self._shown = {}  # field id -> value in the last frame sent
+        self._in_flight = None  # seq of the unacknowledged frame
+        self._sent_at = float("-inf")
+
+    def offer(self, changes):
+        """Record the newest ``{key: value}`` to preview; replaces any values not sent yet."""
+        for key, value in changes.items():
+            self._latest[FIELD_IDS[key]] = value
+        self.offered += len(changes)
+
+    def flush(self, now=None):
+        """Send the newest values if the link is free; returns True while values are still waiting."""
+        now = time.monotonic() if now is None else now
+        changed = {i: value for i, value in self._latest.items() if self._shown.get(i) != value}
+        if not changed:
+            self._latest.clear()
+            return False
+        if now - self._sent_at < self.interval or (
+                self._in_flight is not None and now - self._sent_at < PREVIEW_ACK_TIMEOUT):
+            return True
+        seq = self.device.send(wire_protocol.SetFields(array("B", changed), array("H", changed.values())),
+                               key="preview")
+        if seq is None:
+            self._latest.clear()  # no link to preview on
+            return False
+        self._latest.clear()
+        self._shown.update(changed)
+        self._in_flight, self._sent_at = seq, now
+        self.sent += 1
+        return False
+
+    def acknowledge(self, ack):
+        if ack.seq == self._in_flight:
+            self._in_flight = None
+
+    def stop(self):
+        """End the preview, putting the touched fields back to what the device should hold."""
+        restore = {i: self.device.expected(i) for i in self._shown}
+        restore = {i: value for i, value in restore.items() if value != UNSET}
+        unknown = [i for i in self._shown if i not in restore]
+        self.reset()
+        if restore and self.device.send(
+                wire_protocol.SetFields(array("B", restore), array("H", restore.values())), key="preview") is None:
+            unknown.extend(restore)
+        for i in unknown:
+            self.device.settings.synced[i] = UNSET  # the device holds a preview value: resend on the next sync
@@ -0,0 +1,307 @@
+"""Serial link to the NanoLab's Arduino.
+
+The port is owned by a worker thread so a slow or stalled device never blocks
+the Qt event loop. Callers hand messages to ``SerialLink.send_message``, which
+only encodes them and puts the frame on a queue; everything that touches the
+port happens on the worker. Frames use the binary format in wire_protocol.
+
+Run this file directly to exercise the link against pyserial's ``loop://``
+handler and print throughput and round-trip latency:
+
+    python device_link.py [url] [--frames N]
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import serial
+from serial.tools import list_ports
+
+import wire_protocol
+from wire_protocol import DELIMITER, Ping, Pong, ProtocolError
+
+DEFAULT_BAUDRATE = 115200
+READ_TIMEOUT = 0.01      # seconds the worker waits for input before servicing the queue
+WRITE_TIMEOUT = 0.5      # a write stalled longer than this is dropped and counted
+MAX_WRITE = 1024         # bytes of queued frames coalesced into a single write
+MAX_READ = 65536         # bytes taken at once from a socket:// port
+
+ARDUINO_VIDS = {0x2341, 0x2A03, 0x1A86, 0x0403}  # Arduino, Arduino.org, CH340, FTDI
+
+
+def find_port():
+    """Return the URL of the NanoLab's serial port, or None if none is attached.
+
+    ``NANOLAB_PORT`` overrides detection and may be any pyserial URL
+    (``/dev/ttyACM0``, ``COM3``, ``loop://``, ``socket://host:port``...).
+    """
+    override = os.environ.get("NANOLAB_PORT")
+    if override:
+        return override
+    ports = list(list_ports.comports())
+    for info in ports:
+        if info.vid in ARDUINO_VIDS or "arduino" in (info.description or "").lower():
+            return info.device
+    return ports[0].device if ports else None
+
+
+class LinkStats:
+    """Byte/frame counters and round-trip times for one link."""
+
+    def __init__(self, rtt_samples=256):
+        self.started = time.perf_counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.frames_sent = 0
+        self.frames_received = 0
+        self.writes = 0  # frames_sent / writes is how well small frames are batched
+        self.dropped = 0
+        self.corrupt = 0
+        self.rtts = deque(maxlen=rtt_samples)
+
+    def throughput(self):
+        """Return (tx, rx) bytes per second since the link started."""
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return self.bytes_sent / elapsed, self.bytes_received / elapsed
+
+    def rtt_ms(self):
+        """Return (min, mean, max) round-trip time in ms, or None before the first ping."""
+        if not self.rtts:
+            return None
+        rtts = list(self.rtts)
+        return min(rtts) * 1e3, sum(rtts) / len(rtts) * 1e3, max(rtts) * 1e3
+
+    def summary(self):
+        tx, rx = self.throughput()
+        text = f"TX {tx / 1024:.1f} KiB/s  |  RX {rx / 1024:.1f} KiB/s"
+        rtt = self.rtt_ms()
+        if rtt:
+            text += f"  |  RTT {rtt[1]:.1f} ms"
+        if self.dropped:
+            text += f"  |  {self.dropped} dropped"
+        if self.corrupt:
+            text += f"  |  {self.corrupt} corrupt"
+        return text
+
+
+def open_link(url, **kwargs):
+    """A stopped link to ``url``: TcpLink for ``tcp://host:port``, ReplayLink for ``replay://``, else SerialLink."""
+    if url.startswith("tcp://"):
+        from tcp_link import TcpLink
+        return TcpLink(url, **kwargs)
+    if url.startswith("replay://"):
+        from recording import ReplayLink
+        return ReplayLink(url, **kwargs)
+    return SerialLink(url, **kwargs)
+
+
+class SerialLink:
+    """A serial port serviced by its own worker thread.
+
+    ``on_message(seq, message)`` is called on the worker for every valid frame
+    read from the device, and ``on_state(state, detail)`` whenever the port opens,
+    closes or fails. Both callbacks must be cheap and thread-safe; Qt code
+    should route them through signals. With ``record`` (a directory), every
+    frame received is also written to a recording there (see recording.py).
+    """
+
+    def __init__(self, url, baudrate=DEFAULT_BAUDRATE, on_message=None, on_state=None, queue_size=1024, record=None):
+        self.url = url
+        self.baudrate = baudrate
+        self.on_message = on_message
+        self.on_state = on_state
+        self.stats = LinkStats()
+        self.state = "closed"
+        self._outbox = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+        self._pings = {}
+        self._ping_token = 0
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        self.record = record
+        self.recorder = None  # opened with the first frame
+
+    # ----- caller side (any thread) -----
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.stats = LinkStats()
+        self._thread = threading.Thread(target=self._run, name=f"SerialLink({self.url})", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def send(self, frame):
+        """Queue an encoded ``frame`` for transmission. Never blocks; returns False if the queue is full."""
+        try:
+            self._outbox.put_nowait(bytes(frame))
+            return True
+        except queue.Full:
+            return False
+
+    def next_seq(self):
+        """Allocate the next sequence number, so that a command's is known before it is sent."""
+        with self._seq_lock:
+            self._seq = (self._seq + 1) & 0xFFFF
+            return self._seq
+
+    def send_message(self, message, seq=None):
+        """Encode and queue ``message`` (with a new sequence number unless ``seq`` is given).
+
+        Returns the sequence number, or None if the queue is full.
+        """
+        seq = self.next_seq() if seq is None else seq
+        if not self.send(wire_protocol.encode(message, seq)):
+            return None
+        return seq
+
+    def ping(self):
+        """Queue a ping; its round-trip time lands in ``stats.rtts`` when the Pong (or loopback echo) arrives."""
+        self._ping_token = (self._ping_token + 1) & 0xFFFFFFFF
+        self._pings[self._ping_token] = time.perf_counter()
+        return self.send_message(Ping(self._ping_token)) is not None
+
+    @property
+    def pending(self):
+        return self._outbox.qsize()
+
+    # ----- worker side -----
+
+    def _set_state(self, state, detail=""):
+        self.state = state
+        if self.on_state is not None:
+            self.on_state(state, detail)
+
+    def _run(self):
+        try:
+            port = serial.serial_for_url(self.url, baudrate=self.baudrate,
+                                         timeout=READ_TIMEOUT, write_timeout=WRITE_TIMEOUT)
+        except (serial.SerialException, ValueError) as exc:
+            self._set_state("error", str(exc))
+            return
+
+        self._set_state("open", self.url)
+        buffer = bytearray()
+        drain = self.url.startswith("socket://")  # its in_waiting is 1 however much is buffered
+        try:
+            while not self._stop.is_set():
+                self._flush_outbox(port)
+                chunk = port.read(port.in_waiting or 1)
+                if chunk and drain:
+                    port.timeout = 0
+                    chunk += port.read(MAX_READ)
+                    port.timeout = READ_TIMEOUT
+                if chunk:
+                    self.stats.bytes_received += len(chunk)
+                    buffer += chunk
+                    self._split_frames(buffer)
+        except (serial.SerialException, OSError) as exc:
+            self._set_state("error", str(exc))
+        finally:
+            port.close()
+            if self.state != "error":
+                self._set_state("closed")
+
+    def _flush_outbox(self, port):
+        frames = []
+        size = 0
+        try:
+            while size < MAX_WRITE:
+                frame = self._outbox.get_nowait()
+                frames.append(frame)
+                size += len(frame)
+        except queue.Empty:
+            pass
+        if not frames:
+            return
+        data = b"".join(frames)
+        try:
+            port.write(data)
+        except serial.SerialTimeoutException:
+            self.stats.dropped += len(frames)
+            return
+        self.stats.bytes_sent += len(data)
+        self.stats.frames_sent += len(frames)
+        self.stats.writes += 1
+
+    def _split_frames(self, buffer):
+        start = 0
+        while True:
+            end = buffer.find(DELIMITER, start)
+            if end < 0:
+                break
+            frame = bytes(buffer[start:end])
+            start = end + 1
+            if frame:
+                self.stats.frames_received += 1
+                if self.record is not None:
+                    self._record(frame)
+                self._handle_frame(frame)
+        del buffer[:start]
+
+    def _record(self, frame):
+        if self.recorder is None:
+            from recording import SessionRecorder
+            self.recorder = SessionRecorder.in_directory(self.record)
+        self.recorder.write(frame)
+
+    def _handle_frame(self, frame):
+        try:
+            seq, message = wire_protocol.decode(frame)
+        except ProtocolError:
+            self.stats.corrupt += 1
+            return
+        self._dispatch(seq, message)
+
+    def _dispatch(self, seq, message):
+        if type(message) in (Ping, Pong):
+            sent = self._pings.pop(message.token, None)
+            if sent is not None:
+                self.stats.rtts.append(time.perf_counter() - sent)
+                return
+        if self.on_message is not None:
+            self.on_message(seq, message)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Exercise a NanoLab serial link.")
+    parser.add_argument("url", nargs="?", default="loop://")
+    parser.add_argument("--frames", type=int, default=20000)
+    args = parser.parse_args()
+
+    received = []
+    link = SerialLink(args.url, on_message=lambda seq, message: received.append(seq))
+    link.start()
+    frame = wire_protocol.encode(wire_protocol.LedSettings(255, 128, 0, 12, 2, 12))
+    t0 = time.perf_counter()
+    for _ in range(args.frames):
+        while not link.send(frame):
+            time.sleep(0.001)
+    while len(received) < args.frames and time.perf_counter() - t0 < 30:
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - t0
+    for _ in range(20):  # idle round trips, so queueing behind the flood is not counted
+        link.ping()
+        time.sleep(0.02)
+    link.stop()
+
+    print(f"{len(received)}/{args.frames} frames of {len(frame)} B in {elapsed:.3f} s "
+          f"({len(received) * len(frame) / elapsed / 1024:.1f} KiB/s)")
+    print(link.stats.summary())
+    rtt = link.stats.rtt_ms()
+    if rtt:
+        print("RTT min/mean/max: %.2f / %.2f / %.2f ms" % rtt)
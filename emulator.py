@@ -0,0 +1,557 @@
+"""Stand-in NanoLabs for testing without hardware.
+
+Both speak the binary wire protocol like the firmware: they answer Pings
+with Pongs, apply SetFields to their own copy of the settings, serve the
+files on their emulated SD card (``files``, name -> bytes) and acknowledge
+every other message.
+
+``EmulatedNanoLab`` is a device on a serial port, reached as
+``socket://127.0.0.1:<port>``, which SerialLink opens like a serial port,
+or with ``pty=True`` as a pseudo-terminal that any serial program can open.
+It handles one message at a time, each taking ``latency`` seconds, and
+with ``baud`` set, writes no faster than a serial line would. Like the
+firmware, it can stream sensor readings (``telemetry_hz``, from a
+SensorModel) and camera captures (``camera_fps``). For soak tests it can
+corrupt a ``corrupt`` fraction of what it writes, as line noise would, and
+drop the connection every ``disconnect_every`` seconds on average. Each lab
+costs one or two threads, so hundreds run in one process.
+
+``EmulatedBridge`` is a wireless bridge, reached as ``tcp://127.0.0.1:<port>``
+with TcpLink. It is an asyncio server that delays every reply by
+``latency`` without holding up the frames behind it, like a network would,
+and loses a ``loss`` fraction of frames in each direction.
+
+Run this file to start some emulated labs and print their URLs:
+
+    python emulator.py [--count N] [--latency SECONDS] [--wireless --loss FRACTION]
+                       [--pty] [--telemetry-hz HZ] [--camera-fps FPS] [--noise SCALE]
+                       [--corrupt FRACTION] [--disconnect-every SECONDS]
+"""
+import asyncio
+import itertools
+import math
+import os
+import random
+import select
+import socket
+import struct
+import tempfile
+import threading
+import time
+import tty
+import zlib
+from array import array
+from binascii import crc_hqx
+
+import numpy as np
+
+import wire_protocol
+from camera import split_frame
+from settings_model import FIELD_IDS, SCHEMA, UNSET
+from wire_protocol import (DELIMITER, Ack, FileData, FileInfo, FileRead, ListFiles, Ping, Pong, ProtocolError,
+                           SetFields)
+
+SD_MTIME = 1_700_000_000  # every emulated file's modification time
+BATCH_MS = 100  # telemetry is sent in batches of this many milliseconds of samples
+PUMP_CYCLE_S = 120  # the emulated pump runs for pump.duration_s at the start of every cycle
+CAMERA_SIZE = (160, 120)
+CAMERA_VARIANTS = 8  # distinct captures each lab cycles through
+WRITE_STALL = 0.1  # seconds a pty write may wait for a reader before the bytes are dropped
+
+_pty_names = itertools.count()
+
+
+class SensorModel:
+    """Plausible readings for a TelemetryBatch stream, sampled at ``rate_hz``.
+
+    Temperature follows a ten-minute cycle plus a slow random walk, humidity
+    falls as it rises, pressure drifts over the hour, and the pump runs for
+    its set duration at the start of every PUMP_CYCLE_S. ``noise`` scales
+    the Gaussian sensor noise on top (0 gives smooth curves). Batches cover a
+    whole number of milliseconds, so their ``t0_ms`` stamps are exact and
+    the host sees no gaps.
+    """
+
+    def __init__(self, rate_hz, noise=1.0, seed=None, batch_ms=BATCH_MS):
+        self.dt_us = max(1, round(1e6 / rate_hz))
+        step = 1000 // math.gcd(self.dt_us, 1000)  # samples in the shortest whole-millisecond span
+        self.batch_size = max(step, round(batch_ms * 1000 / self.dt_us) // step * step)
+        self.noise = noise
+        self.samples = 0
+        self._rng = np.random.default_rng(seed)
+        self._walk = 0.0
+
+    @property
+    def batch_seconds(self):
+        return self.batch_size * self.dt_us * 1e-6
+
+    def batch(self, pump_s=30):
+        """The next TelemetryBatch, starting where the last one ended."""
+        n = self.batch_size
+        t0_us = self.samples * self.dt_us
+        t = (t0_us + np.arange(n) * self.dt_us) * 1e-6
+        self.samples += n
+        rng = self._rng
+        walk = self._walk + np.cumsum(rng.normal(0.0, 0.05 * math.sqrt(self.dt_us * 1e-6), n))
+        self._walk = float(walk[-1]) * 0.99  # pulled back slowly, so long soaks stay in range
+        noise = self.noise
+        temperature = 21.5 + 1.5 * np.sin(2 * np.pi * t / 600) + walk + rng.normal(0.0, 0.05 * noise, n)
+        humidity = 55.0 - 2.0 * (temperature - 21.5) + rng.normal(0.0, 0.3 * noise, n)
+        pressure = 1013.25 + 0.8 * np.sin(2 * np.pi * t / 3600) + rng.normal(0.0, 0.03 * noise, n)
+        pump = (t % PUMP_CYCLE_S) < pump_s
+        return wire_protocol.TelemetryBatch(
+            (t0_us // 1000) & 0xFFFFFFFF, self.dt_us,
+            array("h", np.round(temperature * 100).astype("<i2").tobytes()),
+            array("H", np.round(np.clip(humidity, 0, 100) * 100).astype("<u2").tobytes()),
+            array("I", np.round(pressure * 100).astype("<u4").tobytes()),
+            array("B", pump.astype("u1").tobytes()),
+        )
+
+
+def synthetic_png(width, height, shade, size=0):
+    """A valid PNG of a gradient, padded with an ancillary chunk to about ``size`` bytes."""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    pixels = np.empty((height, width, 3), np.uint8)
+    pixels[..., 0] = x
+    pixels[..., 1] = y
+    pixels[..., 2] = shade & 0xFF
+    raw = b"".join(b"\0" + row.tobytes() for row in pixels)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    png = (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+           + chunk(b"IDAT", zlib.compress(raw)))
+    padding = size - len(png) - 24
+    if padding > 0:  # compressed sensor noise, as far as the link is concerned
+        png += chunk(b"nlPd", os.urandom(padding))
+    return png + chunk(b"IEND", b"")
+
+
+class _PtyConnection:
+    """The device end of a pseudo-terminal, with the socket methods EmulatedNanoLab uses.
+
+    The emulator keeps the other end open too, so a client closing the port
+    is not a hangup. Writes nobody reads for WRITE_STALL seconds are dropped,
+    as bytes on a serial line with nothing listening are.
+    """
+
+    def __init__(self):
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self.master, False)
+        self.name = os.ttyname(self._slave)
+        self._timeout = None
+
+    def settimeout(self, timeout):
+        self._timeout = timeout
+
+    def recv(self, size):
+        try:
+            ready = select.select([self.master], [], [], self._timeout)[0]
+            if not ready:
+                raise socket.timeout
+            return os.read(self.master, size)
+        except (ValueError, BlockingIOError) as exc:  # closed, or a spurious wakeup
+            if isinstance(exc, BlockingIOError):
+                raise socket.timeout from None
+            raise OSError("pty closed") from exc
+
+    def sendall(self, data):
+        view = memoryview(data)
+        while view:
+            try:
+                if not select.select([], [self.master], [], WRITE_STALL)[1]:
+                    return  # nobody reading
+                view = view[os.write(self.master, view):]
+            except BlockingIOError:
+                continue
+            except ValueError as exc:
+                raise OSError("pty closed") from exc
+
+    def shutdown(self, how=None):
+        self.close()
+
+    def close(self):
+        for fd in (self.master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.master = self._slave = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def respond(settings, message, seq, status=wire_protocol.ACK_OK, files=None):
+    """Apply ``message`` to ``settings`` as the firmware would; returns the encoded reply (one or more frames).
+
+    ``files`` is the SD card, a list of (name, bytes); a file's id is its index.
+    """
+    if type(message) is Ping:
+        return wire_protocol.encode(Pong(message.token), seq)
+    if type(message) is SetFields and status == wire_protocol.ACK_OK:
+        for i, value in zip(message.ids, message.values):
+            settings[i] = value
+    if type(message) is ListFiles and files is not None:
+        listing = [wire_protocol.encode(FileInfo(i, len(data), SD_MTIME, array("B", name.encode())), seq)
+                   for i, (name, data) in enumerate(files)]
+        return b"".join(listing) + wire_protocol.encode(Ack(seq, status), seq)
+    if type(message) is FileRead and files is not None and message.file_id < len(files):
+        data = files[message.file_id][1][message.offset:message.offset + message.length]
+        return wire_protocol.encode(FileData(message.file_id, message.offset, crc_hqx(data, 0xFFFF),
+                                             array("B", data)), seq)
+    if type(message) is FileRead:
+        status = wire_protocol.ACK_REJECTED
+    return wire_protocol.encode(Ack(seq, status), seq)
+
+
+class EmulatedNanoLab:
+    """One emulated device on a local TCP port or a pty; serves one connection at a time.
+
+    ``latency`` is the seconds each message takes to process before its Ack,
+    and ``status`` the Ack status sent (ACK_REJECTED makes it refuse
+    everything). ``drop_connection()`` hangs up on the current client, as
+    unplugging the cable would. A pty is replaced by a new one when dropped,
+    and ``url`` is a symlink that always points at the current one, like the
+    names in /dev/serial/by-id.
+
+    Streams run on a second thread from the moment the lab starts, as if it
+    had been running all along: samples due while no one is connected are
+    lost, and counted in ``samples_lost``.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, status=wire_protocol.ACK_OK, files=None, baud=None,
+                 pty=False, telemetry_hz=0, camera_fps=0, frame_bytes=20_000, noise=1.0, corrupt=0.0,
+                 disconnect_every=None, seed=None):
+        self.latency = latency
+        self.status = status
+        self.files = list(files.items()) if files else []
+        self.baud = baud
+        self.pty = pty
+        self.camera_fps = camera_fps
+        self.corrupt = corrupt
+        self.disconnect_every = disconnect_every
+        self.sensors = SensorModel(telemetry_hz, noise, seed) if telemetry_hz else None
+        self.captures = ([synthetic_png(*CAMERA_SIZE, shade * 32, frame_bytes) for shade in range(CAMERA_VARIANTS)]
+                         if camera_fps else [])
+        self.settings = array("H", [UNSET]) * len(SCHEMA)
+        self.received = 0
+        self.samples_sent = 0
+        self.samples_lost = 0
+        self.frames_sent = 0
+        self.corrupted = 0
+        self.disconnects = 0
+        self._rng = random.Random(seed)
+        self._send_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stream_thread = None
+        self._conn = None
+        self._server = None
+        if pty:
+            self._link_path = os.path.join(tempfile.gettempdir(), f"nanolab-{os.getpid()}-{next(_pty_names)}")
+            self.host, self.port = None, self._link_path
+        else:
+            self._server = socket.create_server((host, port))
+            self._server.settimeout(0.1)  # so the accept loop notices stop()
+            self.host, self.port = self._server.getsockname()[:2]
+
+    @property
+    def url(self):
+        return self._link_path if self.pty else f"socket://{self.host}:{self.port}"
+
+    def start(self):
+        if self.pty:
+            self._open_pty()
+        self._thread = threading.Thread(target=self._serve, name=f"EmulatedNanoLab({self.port})", daemon=True)
+        self._thread.start()
+        if self.sensors or self.camera_fps or self.disconnect_every:
+            self._stream_thread = threading.Thread(target=self._stream, name=f"EmulatedNanoLab({self.port}) stream",
+                                                   daemon=True)
+            self._stream_thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.close()
+        if self.pty and self._conn is not None:
+            self._conn.close()
+        for thread in (self._thread, self._stream_thread):
+            if thread is not None:
+                thread.join(1.0)
+        self._thread = self._stream_thread = None
+        if self.pty:
+            try:
+                os.unlink(self._link_path)
+            except FileNotFoundError:
+                pass
+
+    def drop_connection(self):
+        conn = self._conn
+        if conn is not None:
+            self.disconnects += 1
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _open_pty(self):
+        conn = _PtyConnection()
+        temporary = self._link_path + ".new"
+        os.symlink(conn.name, temporary)
+        os.replace(temporary, self._link_path)
+        self._conn = conn
+
+    def _serve(self):
+        if self.pty:
+            while not self._stop.is_set():
+                with self._conn as conn:
+                    self._talk(conn)
+                if not self._stop.is_set():
+                    self._open_pty()  # the old pty is gone: plugged back in under a new name
+            return
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            with conn:
+                self._conn = conn
+                self._talk(conn)
+                self._conn = None
+
+    def _talk(self, conn):
+        conn.settimeout(0.1)
+        buffer = bytearray()
+        while not self._stop.is_set():
+            try:
+                data = conn.recv(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            if not data:
+                return
+            buffer += data
+            *frames, rest = bytes(buffer).split(DELIMITER)
+            buffer = bytearray(rest)
+            for frame in frames:
+                if not frame:
+                    continue
+                try:
+                    seq, message = wire_protocol.decode(frame)
+                except ProtocolError:
+                    continue
+                reply = self.handle(message, seq)
+                if reply is not None and not self._write(conn, reply):
+                    return
+
+    def _write(self, conn, data):
+        """Send ``data`` on ``conn`` at the line's speed, maybe corrupted; returns False once it is gone."""
+        with self._send_lock:
+            if self.corrupt and self._rng.random() < self.corrupt:
+                data = bytearray(data)
+                i = self._rng.randrange(len(data))
+                data[i] = (data[i] + self._rng.randrange(1, 255)) % 256 or 1  # never a delimiter
+                self.corrupted += 1
+            if self.baud:
+                time.sleep(len(data) * 10 / self.baud)  # 8N1: ten bits a byte
+            try:
+                conn.sendall(data)
+                return True
+            except OSError:
+                return False
+
+    def _stream(self):
+        """Send telemetry batches and camera captures on schedule, and drop the connection now and then."""
+        start = time.monotonic()
+        next_batch = next_frame = next_drop = start
+        frame_ids = itertools.count(1)
+        if self.disconnect_every:
+            next_drop += self._rng.expovariate(1 / self.disconnect_every)
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if self.sensors is not None and now >= next_batch:
+                pump = self.settings[FIELD_IDS["pump.duration_s"]]
+                batch = self.sensors.batch(30 if pump == UNSET else pump)
+                n = len(batch.temperature)
+                conn = self._conn
+                if conn is not None and self._write(conn, wire_protocol.encode(batch)):
+                    self.samples_sent += n
+                else:
+                    self.samples_lost += n
+                next_batch += self.sensors.batch_seconds
+            if self.camera_fps and now >= next_frame:
+                frame_id = next(frame_ids)
+                data = self.captures[frame_id % len(self.captures)]
+                conn = self._conn
+                if conn is not None and all(self._write(conn, wire_protocol.encode(chunk))
+                                            for chunk in split_frame(data, frame_id, int((now - start) * 1e3))):
+                    self.frames_sent += 1
+                next_frame += 1 / self.camera_fps
+            if self.disconnect_every and now >= next_drop:
+                self.drop_connection()
+                next_drop = now + self._rng.expovariate(1 / self.disconnect_every)
+            due = [next_batch if self.sensors else math.inf, next_frame if self.camera_fps else math.inf,
+                   next_drop if self.disconnect_every else math.inf]
+            self._stop.wait(max(0.0, min(due) - time.monotonic()))
+
+    def handle(self, message, seq):
+        """Apply one message; returns the encoded reply, or None."""
+        self.received += 1
+        if self.latency and type(message) is not Ping:
+            time.sleep(self.latency)
+        return respond(self.settings, message, seq, self.status, self.files)
+
+
+class EmulatedBridge:
+    """An emulated wireless bridge on a local TCP port, served by asyncio on its own thread.
+
+    Every reply is sent ``latency`` seconds after its frame arrives, however
+    many frames are in flight, and each frame, either way, is lost with
+    probability ``loss``. ``drop_connection()`` cuts the current client off,
+    as a Wi-Fi dropout would.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, loss=0.0, status=wire_protocol.ACK_OK, seed=None,
+                 files=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.loss = loss
+        self.status = status
+        self.files = list(files.items()) if files else []
+        self.settings = array("H", [UNSET]) * len(SCHEMA)
+        self.received = 0
+        self.lost = 0
+        self._rng = random.Random(seed)
+        self._loop = None
+        self._server = None
+        self._writers = set()
+        self._ready = threading.Event()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"tcp://{self.host}:{self.port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=asyncio.run, args=(self._main(),), name="EmulatedBridge", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def drop_connection(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._drop_all)
+
+    def _drop_all(self):
+        for writer in list(self._writers):
+            writer.transport.abort()
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._drop_all()
+            self._loop = None
+
+    async def _client(self, reader, writer):
+        self._writers.add(writer)
+        buffer = b""
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                *frames, buffer = (buffer + data).split(DELIMITER)
+                for frame in frames:
+                    if frame:
+                        self._handle(frame, writer)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _handle(self, frame, writer):
+        if self._rng.random() < self.loss:
+            self.lost += 1
+            return
+        try:
+            seq, message = wire_protocol.decode(frame)
+        except ProtocolError:
+            return
+        self.received += 1
+        reply = respond(self.settings, message, seq, self.status, self.files)
+        if self._rng.random() < self.loss:
+            self.lost += 1
+            return
+        self._loop.call_later(self.latency, self._reply, writer, reply)
+
+    def _reply(self, writer, reply):
+        if not writer.is_closing():
+            writer.write(reply)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run emulated NanoLabs on local TCP ports.")
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to process each message")
+    parser.add_argument("--wireless", action="store_true", help="emulate wireless bridges (tcp:// URLs)")
+    parser.add_argument("--loss", type=float, default=0.0, help="fraction of frames a bridge loses each way")
+    parser.add_argument("--pty", action="store_true", help="serve each lab on a pseudo-terminal")
+    parser.add_argument("--telemetry-hz", type=int, default=0, help="sensor samples per second to stream")
+    parser.add_argument("--camera-fps", type=float, default=0, help="camera captures per second to stream")
+    parser.add_argument("--frame-bytes", type=int, default=20_000, help="size of each capture")
+    parser.add_argument("--noise", type=float, default=1.0, help="scale of the sensor noise")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="fraction of writes with a corrupted byte")
+    parser.add_argument("--disconnect-every", type=float, default=None, help="mean seconds between disconnects")
+    parser.add_argument("--status-every", type=float, default=10.0, help="seconds between status lines")
+    args = parser.parse_args()
+
+    if args.wireless:
+        labs = [EmulatedBridge(latency=args.latency, loss=args.loss).start() for _ in range(args.count)]
+    else:
+        labs = [EmulatedNanoLab(latency=args.latency, pty=args.pty, telemetry_hz=args.telemetry_hz,
+                                camera_fps=args.camera_fps, frame_bytes=args.frame_bytes, noise=args.noise,
+                                corrupt=args.corrupt, disconnect_every=args.disconnect_every, seed=i).start()
+                for i in range(args.count)]
+    for lab in labs:
+        print(lab.url)
+    try:
+        while True:
+            time.sleep(args.status_every)
+            if not args.wireless and (args.telemetry_hz or args.camera_fps):
+                print(f"{sum(lab.samples_sent for lab in labs):,} samples sent, "
+                      f"{sum(lab.samples_lost for lab in labs):,} lost while disconnected  |  "
+                      f"{sum(lab.frames_sent for lab in labs):,} captures  |  "
+                      f"{sum(lab.disconnects for lab in labs)} disconnects  |  "
+                      f"{sum(lab.corrupted for lab in labs)} corrupted writes", flush=True)
+    except KeyboardInterrupt:
+        for lab in labs:
+            lab.stop()
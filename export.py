@@ -0,0 +1,115 @@
+"""Streaming export of stored telemetry to CSV or a compact binary file.
+
+Rows are read from the ColumnStore with ``read_chunks`` and written in chunks
+of at most ``chunk_rows``, so memory use does not depend on the size of the
+export.
+Output goes to ``<path>.part`` and is renamed into place only when complete.
+
+The binary format (``.nlb``) is a header followed by chunks:
+
+    b"NLB1"  u16 column count, then per column: u8 name length, name,
+             u8 dtype length, numpy dtype string (e.g. "<f8")
+    chunk:   u32 row count, then each column's rows as raw bytes
+
+which ``read_binary`` (or ``np.frombuffer`` per column) reads back directly.
+"""
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+CHUNK_ROWS = 1 << 16
+BINARY_MAGIC = b"NLB1"
+FORMATS = ("csv", "binary")
+
+# printf format per column in CSV output
+CSV_FORMATS = {"time": "%.3f", "pump": "%.0f"}
+CSV_DEFAULT_FORMAT = "%.2f"
+
+
+class ExportCancelled(Exception):
+    """Raised by ``export`` when its cancel event is set; no output file is left behind."""
+
+
+def export(store, path, t0, t1, columns, fmt="csv", chunk_rows=CHUNK_ROWS, progress=None, cancel=None):
+    """Write ``columns`` for rows with t0 <= time <= t1 to ``path``; returns the row count.
+
+    ``progress(done, total)`` is called after every chunk and ``cancel`` is an
+    optional ``threading.Event`` checked between chunks. Both are called on
+    the exporting thread.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    columns = [store.time_column] + [name for name in columns if name != store.time_column]
+    path = Path(path)
+    part = path.with_name(path.name + ".part")
+    total = store.count(t0, t1)
+    done = 0
+    writer = _write_csv_chunk if fmt == "csv" else _write_binary_chunk
+    try:
+        with open(part, "wb", buffering=1 << 20) as out:
+            if fmt == "csv":
+                out.write((",".join(columns) + "\n").encode())
+                line = ",".join(CSV_FORMATS.get(name, CSV_DEFAULT_FORMAT) for name in columns)
+            else:
+                out.write(_binary_header(store, columns))
+                line = None
+            for chunk in store.read_chunks(t0, t1, columns, chunk_rows):
+                if cancel is not None and cancel.is_set():
+                    raise ExportCancelled()
+                chunk = [chunk[name] for name in columns]
+                writer(out, chunk, line)
+                done += len(chunk[0])
+                if progress is not None:
+                    progress(done, total)
+        os.replace(part, path)
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    return done
+
+
+def _write_csv_chunk(out, chunk, line):
+    line += "\n"
+    out.write("".join(map(line.__mod__, zip(*(column.tolist() for column in chunk)))).encode())
+
+
+def _binary_header(store, columns):
+    parts = [BINARY_MAGIC, struct.pack("<H", len(columns))]
+    for name in columns:
+        dtype = store.columns[name].str.encode()
+        parts += [struct.pack("<B", len(name)), name.encode(), struct.pack("<B", len(dtype)), dtype]
+    return b"".join(parts)
+
+
+def _write_binary_chunk(out, chunk, line):
+    out.write(struct.pack("<I", len(chunk[0])))
+    for column in chunk:
+        out.write(column.tobytes())  # already little-endian in the store
+
+
+def read_binary(path):
+    """Read a ``.nlb`` export back into ``{column: array}``."""
+    data = Path(path).read_bytes()
+    if data[:4] != BINARY_MAGIC:
+        raise ValueError(f"{path} is not a NanoLab binary export")
+    (count,) = struct.unpack_from("<H", data, 4)
+    offset = 6
+    dtypes = {}
+    for _ in range(count):
+        length = data[offset]
+        name = data[offset + 1:offset + 1 + length].decode()
+        offset += 1 + length
+        length = data[offset]
+        dtypes[name] = np.dtype(data[offset + 1:offset + 1 + length].decode())
+        offset += 1 + length
+    parts = {name: [] for name in dtypes}
+    while offset < len(data):
+        (rows,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        for name, dtype in dtypes.items():
+            parts[name].append(np.frombuffer(data, dtype, rows, offset))
+            offset += rows * dtype.itemsize
+    return {name: np.concatenate(chunks) if chunks else np.zeros(0, dtypes[name])
+            for name, chunks in parts.items()}
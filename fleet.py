@@ -0,0 +1,202 @@
+"""Control many NanoLabs at once.
+
+A ``Fleet`` keeps one link open per device URL: a serial port, or a
+``tcp://host:port`` (TcpLink) or ``socket://host:port`` URL for labs on the
+network. Every link already has its own worker thread, so ``push`` simply
+queues the message on all of them and returns a Future per device,
+resolved when that device's Ack arrives, its link fails or the timeout
+passes. Pushing to 40 labs therefore takes about as long as the slowest
+one.
+
+Run this file to push a settings update to emulated labs and print the
+per-device results:
+
+    python fleet.py [--labs 40] [--latency 0.05] [--jitter 0.2]
+"""
+import statistics
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, InvalidStateError
+from functools import partial
+
+import wire_protocol
+from device_link import open_link
+from storage import data_dir
+
+ACK_TIMEOUT = 3.0  # seconds a device has to acknowledge a push
+
+# status is "ok", "rejected", "timeout" or "error"; latency_ms is None unless the device answered
+PushResult = namedtuple("PushResult", "url status latency_ms detail")
+
+
+def default_path():
+    """The saved fleet, one device URL per line: ``data_dir()/fleet.txt``."""
+    return data_dir() / "fleet.txt"
+
+
+def load_urls(path):
+    if not path.exists():
+        return []
+    return [line.strip() for line in path.read_text().splitlines() if line.strip() and not line.startswith("#")]
+
+
+def save_urls(path, urls):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(url + "\n" for url in urls))
+
+
+class Fleet:
+    """A pool of device links, opened on first use and kept open for later pushes."""
+
+    def __init__(self, urls=(), ack_timeout=ACK_TIMEOUT):
+        self.ack_timeout = ack_timeout
+        self.links = {}
+        self._waiting = {}  # (url, seq) -> (Future, time sent)
+        self._lock = threading.Lock()
+        for url in urls:
+            self.add(url)
+
+    def __len__(self):
+        return len(self.links)
+
+    def add(self, url):
+        """Open a link to ``url`` unless the pool already has one."""
+        with self._lock:
+            if url in self.links:
+                return
+            link = self.links[url] = open_link(url, on_message=partial(self._on_message, url),
+                                                on_state=partial(self._on_state, url))
+        link.start()
+
+    def remove(self, url):
+        """Drop ``url`` from the pool; its worker closes the port without anyone waiting for it."""
+        with self._lock:
+            link = self.links.pop(url, None)
+        if link is not None:
+            link.stop(timeout=0)  # pyserial's socket close alone sleeps 0.3 s
+            self._fail(url, "error", "removed from the fleet")
+
+    def wait_open(self, timeout=2.0):
+        """Wait until every link has opened or failed; returns the URLs that are open."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and any(link.state == "closed" for link in self.links.values()):
+            time.sleep(0.005)
+        return [url for url, link in self.links.items() if link.state == "open"]
+
+    def close(self):
+        for url in list(self.links):
+            self.remove(url)
+
+    def push(self, message, urls=None):
+        """Queue ``message`` on every device (or on ``urls``) at once; returns ``{url: Future}``.
+
+        Each Future's result is a PushResult. Futures are resolved on link
+        worker threads, so callbacks added to them must be thread-safe.
+        """
+        futures = {}
+        for url in list(self.links) if urls is None else urls:
+            self.add(url)
+            future = futures[url] = Future()
+            link = self.links[url]
+            if link.state == "error":
+                link.start()  # try again; the device may be back
+            with self._lock:
+                seq = link.send_message(message)
+                if seq is not None:
+                    self._waiting[url, seq] = (future, time.perf_counter())
+            if seq is None:
+                future.set_result(PushResult(url, "error", None, "send queue full"))
+        timer = threading.Timer(self.ack_timeout, self._expire, args=(list(futures.values()),))
+        timer.daemon = True
+        timer.start()
+        return futures
+
+    def push_and_wait(self, message, urls=None):
+        """``push``, then wait for every device; returns the PushResults in URL order."""
+        return [future.result() for future in self.push(message, urls).values()]
+
+    # ----- link worker threads -----
+
+    def _on_message(self, url, seq, message):
+        if type(message) is not wire_protocol.Ack:
+            return
+        with self._lock:
+            entry = self._waiting.pop((url, message.seq), None)
+        if entry is None:
+            return
+        future, sent = entry
+        status = "ok" if message.status == wire_protocol.ACK_OK else "rejected"
+        _resolve(future, PushResult(url, status, (time.perf_counter() - sent) * 1e3, ""))
+
+    def _on_state(self, url, state, detail):
+        if state == "error":
+            self._fail(url, "error", detail)
+
+    def _fail(self, url, status, detail):
+        with self._lock:
+            keys = [key for key in self._waiting if key[0] == url]
+            entries = [self._waiting.pop(key) for key in keys]
+        for future, _ in entries:
+            _resolve(future, PushResult(url, status, None, detail))
+
+    def _expire(self, futures):
+        pending = {id(future) for future in futures if not future.done()}
+        if not pending:
+            return
+        with self._lock:
+            keys = [key for key, (future, _) in self._waiting.items() if id(future) in pending]
+            entries = [(key[0], self._waiting.pop(key)[0]) for key in keys]
+        for url, future in entries:
+            _resolve(future, PushResult(url, "timeout", None, f"no Ack within {self.ack_timeout:g} s"))
+
+
+def _resolve(future, result):
+    # A push can race its own timeout; the first outcome wins
+    try:
+        future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+def summarize(results, elapsed):
+    """One line for a finished push: how many devices acknowledged, latencies and wall time."""
+    ok = [result.latency_ms for result in results if result.status == "ok"]
+    text = f"{len(ok)}/{len(results)} acknowledged in {elapsed * 1e3:.0f} ms"
+    if ok:
+        text += f"  |  median {statistics.median(ok):.0f} ms, slowest {max(ok):.0f} ms"
+    failed = len(results) - len(ok)
+    if failed:
+        text += f"  |  ⚠️ {failed} failed"
+    return text
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    from array import array
+
+    from emulator import EmulatedNanoLab
+
+    parser = argparse.ArgumentParser(description="Push a settings update to emulated NanoLabs.")
+    parser.add_argument("--labs", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.05, help="base seconds each lab takes to apply it")
+    parser.add_argument("--jitter", type=float, default=0.2, help="extra random seconds per lab, up to this")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    labs = [EmulatedNanoLab(latency=args.latency + rng.uniform(0, args.jitter)).start() for _ in range(args.labs)]
+    fleet = Fleet(lab.url for lab in labs)
+    message = wire_protocol.SetFields(array("B", [11, 12]), array("H", [20740, 20747]))  # a week's schedule
+    fleet.wait_open()
+    start = time.perf_counter()
+    results = fleet.push_and_wait(message)
+    elapsed = time.perf_counter() - start
+    for result in results:
+        latency = "—" if result.latency_ms is None else f"{result.latency_ms:.0f} ms"
+        print(f"{result.url:<28} {result.status:<9} {latency:>7}  {result.detail}")
+    print(summarize(results, elapsed))
+    print(f"sum of device times: {sum(lab.latency for lab in labs) * 1e3:.0f} ms")
+    fleet.close()
+    for lab in labs:
+        lab.stop()
@@ -1,17 +1,14 @@
 import sys
 import random
+import numpy as np
+from PyQt6.QtCore import QTimer
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QWidget, QVBoxLayout
 )
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
-from matplotlib.figure import Figure
+from graph_canvas import GraphCanvas
 
-
-class GraphCanvas(FigureCanvasQTAgg):
-    def __init__(self, parent=None):
-        self.fig = Figure(figsize=(5, 4), dpi=100)
-        self.ax = self.fig.add_subplot(111)
-        super().__init__(self.fig)
+LIVE_POINTS = 100_000   # visible points in live mode
+LIVE_FPS = 30
 
 
 class MainWindow(QMainWindow):
@@ -25,16 +22,29 @@ class MainWindow(QMainWindow):
         self.button = QPushButton("Run Experiment")
         self.button.clicked.connect(self.run_experiment)
 
+        self.live_button = QPushButton("Start Live Stream")
+        self.live_button.clicked.connect(self.toggle_live)
+
         self.graph = GraphCanvas(self)
 
         layout.addWidget(self.button)
+        layout.addWidget(self.live_button)
         layout.addWidget(self.graph)
 
         container = QWidget()
         container.setLayout(layout)
         self.setCentralWidget(container)
 
+        # --- live stream: a random walk scrolling through a fixed window ---
+        self.live_timer = QTimer(self)
+        self.live_timer.setInterval(1000 // LIVE_FPS)
+        self.live_timer.timeout.connect(self.live_frame)
+        self.live_x = np.arange(LIVE_POINTS, dtype=float)
+        self.live_y = np.cumsum(np.random.standard_normal(LIVE_POINTS))
+
     def run_experiment(self):
+        self.stop_live()
+
         # Simulate experiment data collection
         data_x = list(range(50))
         data_y = [random.randint(0, 20) for _ in data_x]
@@ -45,8 +55,31 @@ class MainWindow(QMainWindow):
         self.graph.ax.set_title("Experiment Results")
         self.graph.draw()   # refresh canvas
 
+    def toggle_live(self):
+        if self.live_timer.isActive():
+            self.stop_live()
+            return
+        self.graph.start_live(title="Live Stream", xlim=(0, LIVE_POINTS))
+        self.live_button.setText("Stop Live Stream")
+        self.live_timer.start()
+
+    def stop_live(self):
+        if self.live_timer.isActive():
+            self.live_timer.stop()
+            self.graph.stop_live()
+            self.live_button.setText("Start Live Stream")
+
+    def live_frame(self):
+        # Scroll in a few hundred new samples per frame
+        step = np.cumsum(np.random.standard_normal(300)) + self.live_y[-1]
+        self.live_y = np.concatenate((self.live_y[300:], step))
+        self.graph.set_live_data(0, self.live_x, self.live_y)
+        self.graph.draw_live()
+        self.setWindowTitle(f"Experiment Grapher  |  {self.graph.frame_timer.summary()}")
+
 
-app = QApplication(sys.argv)
-window = MainWindow()
-window.show()
-sys.exit(app.exec())
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    window = MainWindow()
+    window.show()
+    sys.exit(app.exec())
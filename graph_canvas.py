@@ -0,0 +1,243 @@
+import time
+from collections import deque
+
+import numpy as np
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+from matplotlib.figure import Figure
+
+
+class FrameTimer:
+    """Rolling frame-time statistics for a live plot."""
+
+    def __init__(self, window=120):
+        self.times = deque(maxlen=window)   # seconds spent drawing each frame
+        self.stamps = deque(maxlen=window)  # when each frame finished
+        self.full_redraws = 0
+        self._start = None
+
+    def start(self):
+        self._start = time.perf_counter()
+
+    def stop(self):
+        now = time.perf_counter()
+        self.times.append(now - self._start)
+        self.stamps.append(now)
+
+    def mean_ms(self):
+        return sum(self.times) / len(self.times) * 1e3 if self.times else 0.0
+
+    def max_ms(self):
+        return max(self.times) * 1e3 if self.times else 0.0
+
+    def fps(self):
+        """Frames actually shown per second, over the window."""
+        if len(self.stamps) < 2:
+            return 0.0
+        return (len(self.stamps) - 1) / (self.stamps[-1] - self.stamps[0])
+
+    def summary(self):
+        return f"{self.fps():.0f} fps  |  frame {self.mean_ms():.1f} ms (max {self.max_ms():.1f})"
+
+
+class GraphCanvas(FigureCanvasQTAgg):
+    """A matplotlib canvas with optional live-plot and review modes.
+
+    In live mode the line artists are created once and only their data
+    changes. Each frame restores a cached background and blits the lines;
+    the whole axes is redrawn only when the data leaves the current limits.
+
+    In review mode the line's data is fetched for the visible x range at
+    screen resolution every time the user zooms (mouse wheel) or pans (drag),
+    so the number of points drawn never depends on the length of the data.
+    """
+
+    # When data leaves the view, the new limits get this much room to grow
+    HEADROOM = 0.1
+    ZOOM_STEP = 1.25
+
+    def __init__(self, parent=None):
+        self.fig = Figure(figsize=(5, 4), dpi=100)
+        self.ax = self.fig.add_subplot(111)
+        super().__init__(self.fig)
+
+        self.live_lines = []
+        self.frame_timer = FrameTimer()
+        self._background = None
+        self._fixed_xlim = None
+        self._fixed_ylim = None
+        self.mpl_connect("draw_event", self._on_draw)
+
+        self.review_line = None
+        self._fetch = None
+        self._pan_from = None
+        self.mpl_connect("scroll_event", self._on_scroll)
+        self.mpl_connect("button_press_event", self._on_press)
+        self.mpl_connect("motion_notify_event", self._on_motion)
+        self.mpl_connect("button_release_event", self._on_release)
+
+    def plot_pixels(self):
+        """Width of the axes in device pixels: the most points worth drawing per line."""
+        return max(int(self.ax.bbox.width), 1)
+
+    # ----- live mode -----
+
+    def start_live(self, labels=(None,), title=None, xlim=None, ylim=None):
+        """Switch to live mode with one line per label; returns the line artists.
+
+        Fixed ``xlim``/``ylim`` never trigger a full redraw; axes left as None
+        autoscale with headroom.
+        """
+        self._fetch = None
+        self.ax.clear()
+        self.live_lines = [self.ax.plot([], [], label=label, animated=True)[0] for label in labels]
+        if title:
+            self.ax.set_title(title)
+        if any(labels):
+            self.ax.legend(loc="upper left")
+        self._fixed_xlim = xlim
+        self._fixed_ylim = ylim
+        self.ax.set_xlim(*(xlim or (0, 1)))
+        self.ax.set_ylim(*(ylim or (0, 1)))
+        self.frame_timer = FrameTimer()
+        self.draw()
+        return self.live_lines
+
+    def stop_live(self):
+        for line in self.live_lines:
+            line.set_animated(False)
+        self.live_lines = []
+        self._background = None
+
+    def set_live_data(self, index, x, y):
+        self.live_lines[index].set_data(x, y)
+
+    def draw_live(self):
+        """Draw one live frame, blitting unless the limits had to change."""
+        self.frame_timer.start()
+        if self._rescale() or self._background is None:
+            self.frame_timer.full_redraws += 1
+            self.draw()  # recaches the background and draws the lines in _on_draw
+        else:
+            self.restore_region(self._background)
+            for line in self.live_lines:
+                self.ax.draw_artist(line)
+            self.blit(self.ax.bbox)
+        self.frame_timer.stop()
+
+    def _rescale(self):
+        """Update the axes limits if the data no longer fits; returns True if they changed."""
+        changed = False
+        if self._fixed_xlim is None:
+            changed |= self._fit_axis(self.ax.get_xlim, self.ax.set_xlim, [line.get_xdata() for line in self.live_lines])
+        if self._fixed_ylim is None:
+            changed |= self._fit_axis(self.ax.get_ylim, self.ax.set_ylim, [line.get_ydata() for line in self.live_lines])
+        return changed
+
+    def _fit_axis(self, get_lim, set_lim, columns):
+        columns = [np.asarray(c) for c in columns if len(c)]
+        if not columns:
+            return False
+        lo = min(float(np.nanmin(c)) for c in columns)
+        hi = max(float(np.nanmax(c)) for c in columns)
+        view_lo, view_hi = get_lim()
+        span = max(hi - lo, abs(hi) * 1e-6, 1e-9)
+        # Keep the limits while the data fits and fills at least half the view
+        if view_lo <= lo and hi <= view_hi and span >= (view_hi - view_lo) / 2:
+            return False
+        pad = span * self.HEADROOM
+        set_lim(lo - pad, hi + pad)
+        return True
+
+    # ----- review mode -----
+
+    def start_review(self, fetch, xlim, title=None):
+        """Plot ``fetch(x0, x1, pixels) -> (x, y)`` over ``xlim`` with wheel zoom and drag pan."""
+        self.stop_live()
+        self.ax.clear()
+        if title:
+            self.ax.set_title(title)
+        self.review_line = self.ax.plot([], [])[0]
+        self._fetch = fetch
+        self.ax.set_xlim(*xlim)
+        self.refetch()
+
+    def refetch(self):
+        """Re-query the review data for the visible range and redraw."""
+        x0, x1 = self.ax.get_xlim()
+        x, y = self._fetch(x0, x1, self.plot_pixels())
+        self.review_line.set_data(x, y)
+        if len(y):
+            lo, hi = float(np.nanmin(y)), float(np.nanmax(y))
+            pad = max(hi - lo, abs(hi) * 1e-6, 1e-9) * self.HEADROOM
+            self.ax.set_ylim(lo - pad, hi + pad)
+        self.draw_idle()
+
+    def _on_scroll(self, event):
+        if self._fetch is None or event.xdata is None:
+            return
+        scale = 1 / self.ZOOM_STEP if event.button == "up" else self.ZOOM_STEP
+        x0, x1 = self.ax.get_xlim()
+        self.ax.set_xlim(event.xdata - (event.xdata - x0) * scale, event.xdata + (x1 - event.xdata) * scale)
+        self.refetch()
+
+    def _on_press(self, event):
+        if self._fetch is not None and event.inaxes is self.ax:
+            self._pan_from = (event.x, self.ax.get_xlim())
+
+    def _on_motion(self, event):
+        if self._pan_from is None:
+            return
+        start_x, (x0, x1) = self._pan_from
+        shift = (event.x - start_x) * (x1 - x0) / self.plot_pixels()
+        self.ax.set_xlim(x0 - shift, x1 - shift)
+        self.refetch()
+
+    def _on_release(self, event):
+        self._pan_from = None
+
+    def _on_draw(self, event):
+        if not self.live_lines:
+            return
+        self._background = self.copy_from_bbox(self.ax.bbox)
+        for line in self.live_lines:
+            self.ax.draw_artist(line)
+
+
+class UsageCanvas(FigureCanvasQTAgg):
+    """What a schedule will use: running totals over the project, next to a sweep of two settings."""
+
+    LABELS = {"water_l": "Water (L/day)", "energy_wh": "Energy (Wh/day)"}
+
+    def __init__(self, parent=None):
+        self.fig = Figure(figsize=(8, 3), dpi=100, layout="constrained")
+        super().__init__(self.fig)
+
+    def show_usage(self, project, sweep, labels):
+        """Draw ``project`` (``(days, Usage)`` or None) and ``sweep``: ``(x key, y key, figure, grid, Usage, current)``.
+
+        ``labels`` names the two swept settings on the axes.
+        """
+        self.fig.clear()
+        totals, swept = self.fig.subplots(1, 2)
+        if project is not None:
+            days, usage = project
+            day = np.arange(1, len(days) + 1)
+            totals.plot(day, np.cumsum(usage.water_l), color="tab:blue")
+            totals.set_xlabel("Project day")
+            totals.set_ylabel("Water (L)", color="tab:blue")
+            energy = totals.twinx()
+            energy.plot(day, np.cumsum(usage.energy_wh) / 1000, color="tab:orange")
+            energy.set_ylabel("Energy (kWh)", color="tab:orange")
+        totals.set_title("Project totals")
+
+        x_key, y_key, figure, grid, usage, current = sweep
+        xs, ys = np.unique(grid[x_key]), np.unique(grid[y_key])
+        values = getattr(usage, figure).reshape(len(xs), len(ys))  # sweep() varies the last key fastest
+        image = swept.imshow(values.T, origin="lower", aspect="auto",
+                             extent=(xs[0] - 0.5, xs[-1] + 0.5, ys[0] - 0.5, ys[-1] + 0.5))
+        self.fig.colorbar(image, ax=swept, label=self.LABELS[figure])
+        swept.plot(*current, "o", color="white", markeredgecolor="black")
+        swept.set_xlabel(labels[0])
+        swept.set_ylabel(labels[1])
+        swept.set_title(f"{len(values.flat):,} candidate settings")
+        self.draw_idle()
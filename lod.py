@@ -0,0 +1,206 @@
+"""Level-of-detail summaries for plotting long time series.
+
+A plot never needs more points than it has pixels. ``MinMaxPyramid`` keeps
+min, max and mean per bucket at power-of-two resolutions and is extended as
+samples arrive, so any time range can be drawn from the finest level that
+fits the screen without touching raw samples. Each level keeps only its
+latest ``capacity`` buckets, so memory is bounded however long a session
+runs: recent ranges come at full resolution, older ones from the coarser
+levels (or from summaries on disk, see ColumnStore.read_summary).
+``decimate`` does the same for a raw window on the fly.
+"""
+import numpy as np
+
+DEFAULT_BASE = 256  # samples per bucket at the finest level
+LEVEL_BUCKETS = 4096  # buckets kept per level; the finest covers the last ~1M samples
+
+
+class _Level:
+    """Bucket summaries (start time, min, max, mean, count) in a ring of at most ``capacity`` buckets.
+
+    Buckets are numbered in the order they are appended; only numbers
+    ``first`` to ``total - 1`` are still held. The columns grow up to
+    ``capacity`` and then wrap, overwriting the oldest buckets.
+    """
+
+    __slots__ = ("capacity", "t", "lo", "hi", "mean", "n", "total")
+    COLUMNS = ("t", "lo", "hi", "mean", "n")
+
+    def __init__(self, capacity=LEVEL_BUCKETS):
+        self.capacity = capacity
+        size = min(capacity, 64)
+        self.t = np.empty(size, np.float64)
+        self.lo = np.empty(size, np.float32)
+        self.hi = np.empty(size, np.float32)
+        self.mean = np.empty(size, np.float32)
+        self.n = np.empty(size, np.int64)
+        self.total = 0  # buckets ever appended
+
+    @property
+    def first(self):
+        return max(self.total - self.capacity, 0)
+
+    def append(self, t, lo, hi, mean, n):
+        k = len(t)
+        need = min(self.total + k, self.capacity)
+        if need > len(self.t):  # not wrapped yet, so bucket i is at i
+            size = min(max(need, 2 * len(self.t)), self.capacity)
+            for name in self.COLUMNS:
+                old = getattr(self, name)
+                new = np.empty(size, old.dtype)
+                new[:self.total] = old[:self.total]
+                setattr(self, name, new)
+        at = self._positions(self.total, self.total + k)
+        self.t[at] = t
+        self.lo[at] = lo
+        self.hi[at] = hi
+        self.mean[at] = mean
+        self.n[at] = n
+        self.total += k  # published last, so readers never see a half-written bucket
+
+    def _positions(self, start, stop):
+        """A slice, or an index array where the ring wraps, for buckets ``start`` to ``stop - 1``."""
+        begin = start % self.capacity
+        if begin + stop - start <= self.capacity:
+            return slice(begin, begin + stop - start)
+        return np.arange(start, stop) % self.capacity
+
+    def take(self, start, stop):
+        """``(t, lo, hi, mean, n)`` for buckets ``start`` to ``stop - 1``; views unless the ring wraps."""
+        at = self._positions(start, stop)
+        return tuple(getattr(self, name)[at] for name in self.COLUMNS)
+
+    def times(self):
+        """Start times of the buckets still held, oldest first."""
+        return self.t[self._positions(self.first, self.total)]
+
+    def find(self, t0, t1):
+        """Bucket numbers ``(start, stop)`` of the held buckets that overlap [t0, t1]."""
+        times = self.times()
+        start = max(int(np.searchsorted(times, t0, side="right")) - 1, 0)
+        stop = int(np.searchsorted(times, t1, side="right"))
+        return self.first + start, self.first + stop
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS)
+
+
+class MinMaxPyramid:
+    """Min/max/mean buckets at ``base * 2**k`` samples for k = 0, 1, 2, ...
+
+    Samples must arrive in time order. Only the unfinished bucket of the
+    finest level is held as raw samples; everything else is summaries, at
+    most ``capacity`` buckets per level, so memory grows with the logarithm
+    of the session's length.
+    """
+
+    def __init__(self, base=DEFAULT_BASE, max_levels=32, capacity=LEVEL_BUCKETS):
+        self.base = base
+        self.max_levels = max_levels
+        self.capacity = capacity
+        self.levels = [_Level(capacity)]
+        self.count = 0
+        self._pending_t = np.empty(0, np.float64)
+        self._pending_v = np.empty(0, np.float32)
+
+    def extend(self, times, values):
+        times = np.concatenate((self._pending_t, times))
+        values = np.concatenate((self._pending_v, np.asarray(values, np.float32)))
+        self.count += len(times) - len(self._pending_t)
+        full = len(values) // self.base * self.base
+        step = (self.capacity - 1) * self.base  # so an unfolded bucket is never overwritten
+        for start in range(0, full, step):
+            stop = min(start + step, full)
+            buckets = values[start:stop].reshape(-1, self.base)
+            self.levels[0].append(times[start:stop:self.base], buckets.min(axis=1), buckets.max(axis=1),
+                                  buckets.mean(axis=1), self.base)
+            self._cascade()
+        self._pending_t = times[full:].copy()
+        self._pending_v = values[full:].copy()
+
+    def _cascade(self):
+        for k, level in enumerate(self.levels):
+            if k + 1 == len(self.levels):
+                if level.total < 2 or k + 1 == self.max_levels:
+                    return
+                self.levels.append(_Level(self.capacity))
+            parent = self.levels[k + 1]
+            start = parent.total * 2
+            stop = start + (level.total - start) // 2 * 2
+            if stop == start:
+                return
+            t, lo, hi, mean, n = level.take(start, stop)
+            n = n.reshape(-1, 2)
+            total = n.sum(axis=1)
+            weighted = (mean.reshape(-1, 2) * n).sum(axis=1) / total
+            parent.append(t[::2], lo.reshape(-1, 2).min(axis=1), hi.reshape(-1, 2).max(axis=1), weighted, total)
+
+    @property
+    def fine_start(self):
+        """Start time of the oldest bucket the finest level still holds, or None if it has dropped none."""
+        level = self.levels[0]
+        return float(level.t[level.first % self.capacity]) if level.first else None
+
+    def finest(self, t0, t1):
+        """Return ``(t, lo, hi, mean)`` for the finest level's buckets that start in (t0, t1]."""
+        level = self.levels[0]
+        times = level.times()
+        start = level.first + int(np.searchsorted(times, t0, side="right"))
+        stop = level.first + int(np.searchsorted(times, t1, side="right"))
+        return level.take(start, stop)[:4]
+
+    def query(self, t0, t1, max_buckets):
+        """Return ``(t, lo, hi, mean)`` for [t0, t1] from the finest level with at most ``max_buckets``.
+
+        Levels that have already dropped the buckets at ``t0`` are skipped.
+        Returns None if no bucket has been completed yet.
+        """
+        if not self.levels[0].total:
+            return None
+        for level in self.levels:
+            if level.first and level.t[level.first % self.capacity] > t0 and level is not self.levels[-1]:
+                continue
+            start, stop = level.find(t0, t1)
+            if stop - start <= max_buckets:
+                break
+        return level.take(start, stop)[:4]
+
+    @property
+    def nbytes(self):
+        return sum(level.nbytes for level in self.levels)
+
+
+def decimate(times, values, max_buckets):
+    """Min/max-reduce a raw window to at most ``max_buckets`` buckets: ``(t, lo, hi)``.
+
+    Windows that already fit are returned as they are, with ``lo is hi``.
+    """
+    n = len(values)
+    if n <= 2 * max_buckets:
+        return times, values, values
+    size = -(-n // max_buckets)
+    full = n // size * size
+    buckets = values[:full].reshape(-1, size)
+    t, lo, hi = times[:full:size], buckets.min(axis=1), buckets.max(axis=1)
+    if full < n:
+        t = np.append(t, times[full])
+        lo = np.append(lo, values[full:].min())
+        hi = np.append(hi, values[full:].max())
+    return t, lo, hi
+
+
+def merge_buckets(t, lo, hi, max_buckets):
+    """Combine runs of adjacent buckets so at most ``max_buckets`` are left: ``(t, lo, hi)``."""
+    n = len(t)
+    if n <= max_buckets:
+        return t, lo, hi
+    starts = np.arange(0, n, -(-n // max_buckets))
+    return t[starts], np.minimum.reduceat(lo, starts), np.maximum.reduceat(hi, starts)
+
+
+def envelope(t, lo, hi):
+    """Interleave bucket minima and maxima into one line that traces the envelope."""
+    if lo is hi:  # undecimated window
+        return t, lo
+    return np.repeat(t, 2), np.column_stack((lo, hi)).ravel()
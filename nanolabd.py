@@ -0,0 +1,253 @@
+"""Headless NanoLab daemon: acquisition, settings sync, scheduling and logging without a GUI.
+
+For lab controllers where the GUI's memory and startup time are not
+affordable. It imports no Qt: the same core modules as the control panel
+do the work, and the two share the data directory, so settings saved in
+the GUI on the same machine are picked up and sent.
+
+- Telemetry is appended to the store and camera captures are saved as they
+  arrive, and the sensor alarms are checked on every sample.
+- Saved settings the device has not acknowledged are sent whenever the
+  link opens or the settings file changes.
+- The schedule is recompiled into ``schedule.nlt`` when the settings change.
+- Alarms are logged as they are raised and cleared, and a status line
+  every ``--status-every`` seconds.
+- When the link fails (device unplugged or reset, or not there yet), it is
+  reopened with jittered exponential backoff until the device is back.
+
+    python nanolabd.py [--port URL | --wireless] [--status-every 60] [--duration SECONDS] [--record DIR]
+
+``--record`` writes the device's raw traffic to ``DIR/session-<time>.nlr``;
+``--port replay://<file>.nlr`` plays such a recording back (recording.py).
+
+``--startup-only`` waits for the link to open, prints the time it took and
+the peak memory as JSON, then exits; benchmarks/bench_headless.py compares
+them with the GUI.
+"""
+import time
+
+STARTED = time.perf_counter()  # before the heavy imports, for the startup time
+
+import argparse
+import json
+import logging
+import queue
+import resource
+import signal
+import sys
+import threading
+
+import camera
+import command_scheduler
+import schedule_compiler
+import sensor_monitor
+import settings_history
+import settings_model
+import wire_protocol
+from controller import DeviceController
+from device_link import find_port
+from storage import ColumnStore, default_root
+from telemetry import Telemetry
+
+TICK = 0.5  # seconds between checks of the settings file and the alarms
+STARTUP_TIMEOUT = 10.0  # seconds --startup-only waits for the link to open
+ACK_OUTCOMES = {
+    wire_protocol.ACK_OK: "applied by the device",
+    command_scheduler.TIMED_OUT: "not acknowledged by the device",
+    command_scheduler.SUPERSEDED: "replaced by a newer sync",
+}
+
+log = logging.getLogger("nanolabd")
+
+
+def max_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Daemon:
+    def __init__(self, url, record=None):
+        self.url = url
+        self.settings = settings_model.DeviceSettings(settings_model.default_path())
+        self.history = settings_history.SettingsHistory(settings_history.default_path())
+        self.store = ColumnStore(default_root())
+        self.monitor = sensor_monitor.SensorMonitor()
+        self.telemetry = Telemetry(store=self.store, monitor=self.monitor)
+        self.captures = camera.CaptureStore(camera.captures_dir())
+        # Callbacks arrive on the link's worker thread; the main loop handles them in order
+        self.inbox = queue.Queue()
+        self.device = DeviceController(self.settings, self.history, self.telemetry, self.captures,
+                                       on_message=lambda seq, message: self.inbox.put(("message", message)),
+                                       on_state=lambda state, detail: self.inbox.put(("state", (state, detail))),
+                                       record=record)
+        self.stop_requested = threading.Event()
+        self.reconnects = 0
+        self._reconnect_at = None  # monotonic time of the next attempt to reopen a failed link
+        self._reconnect_attempt = 0
+        self._active_alarms = set()
+        self._last_samples = 0
+
+    def start(self):
+        self.compile_schedule()
+        self.device.connect_to(self.url)
+
+    def run(self, status_every=60.0, duration=None):
+        """Serve until stop() (or SIGINT/SIGTERM), or for ``duration`` seconds."""
+        deadline = None if duration is None else time.monotonic() + duration
+        next_status = time.monotonic() + status_every
+        next_check = time.monotonic()
+        while not self.stop_requested.is_set():
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            if now < next_check:
+                try:
+                    kind, payload = self.inbox.get(timeout=next_check - now)
+                except queue.Empty:
+                    pass
+                else:
+                    self.handle(kind, payload)
+                continue
+            next_check = now + TICK
+            if self._reconnect_at is not None and now >= self._reconnect_at:
+                self.reconnect()
+            if self.settings.reload():
+                log.info("settings changed on disk")
+                self.compile_schedule()
+                self.sync()
+            self.check_alarms()
+            if time.monotonic() >= next_status:
+                next_status += status_every
+                self.log_status(status_every)
+
+    def wait_open(self, timeout):
+        """Handle events until the link opens; returns False if it has not within ``timeout`` seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                kind, payload = self.inbox.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return False
+            self.handle(kind, payload)
+            if kind == "state" and payload[0] == "open":
+                return True
+
+    def stop(self):
+        self.stop_requested.set()
+
+    def close(self):
+        self.device.close()
+        self.store.close()
+
+    def handle(self, kind, payload):
+        if kind == "state":
+            state, detail = payload
+            log.info("link %s: %s", state, detail)
+            if state == "open":
+                self._reconnect_at = None
+                self._reconnect_attempt = 0
+                self.sync()
+            elif state in ("error", "closed") and not self.stop_requested.is_set():
+                if self.url.startswith("replay://"):
+                    self.stop()  # a replay has nothing to reconnect to once it ends
+                elif self._reconnect_at is None:
+                    from tcp_link import backoff_delay  # asyncio is only imported once a link has failed
+                    delay = backoff_delay(self._reconnect_attempt)
+                    self._reconnect_attempt += 1
+                    self._reconnect_at = time.monotonic() + delay
+                    log.info("reconnecting in %.1f s", delay)
+        elif type(payload) is wire_protocol.Ack:
+            if self.device.acknowledge(payload):
+                log.info("settings %s", ACK_OUTCOMES.get(payload.status, f"refused by the device ({payload.status})"))
+
+    def reconnect(self):
+        """Reopen the link if it is still down."""
+        self._reconnect_at = None
+        link = self.device.link
+        if link is None or link.state in ("error", "closed"):
+            self.reconnects += 1
+            self.device.connect_to(self.url)
+
+    def sync(self):
+        if self.device.pending_syncs or self.device.link is None or self.device.link.state != "open":
+            return  # sent once the outstanding sync is acknowledged, or the link opens
+        _, message = self.device.sync()
+        if message is not None:
+            log.info("sending %d changed settings", len(message.ids))
+
+    def compile_schedule(self):
+        timeline = schedule_compiler.compile_schedule(self.settings)
+        if timeline is None:
+            return
+        table = schedule_compiler.to_table(timeline)
+        path = schedule_compiler.save_table(table)
+        conflicts, examples = schedule_compiler.find_conflicts(timeline, limit=1)
+        log.info("schedule: %d runs, %d bytes in %s", len(timeline), len(table), path)
+        if conflicts:
+            example = examples[0]
+            log.warning("schedule has %d conflicts, e.g. %s overlaps %s: %s",
+                        conflicts, example.device, example.other, example.reason)
+
+    def check_alarms(self):
+        active = set(self.monitor.active_alarms())
+        for alarm in active - self._active_alarms:
+            log.warning("ALARM %s (now %.2f)", alarm, alarm.value)
+        for alarm in self._active_alarms - active:
+            log.info("cleared: %s", alarm)
+        self._active_alarms = active
+
+    def log_status(self, interval):
+        samples = self.telemetry.samples
+        rate = (samples - self._last_samples) / interval
+        self._last_samples = samples
+        link = self.device.link
+        state = "no link" if link is None else f"{link.state}  |  {link.stats.summary()}"
+        if self.reconnects:
+            state += f"  |  {self.reconnects} reconnects"
+        if link is not None and self.device.commands.summary():
+            state += f"  |  {self.device.commands.summary()}"
+        log.info("%s samples (%.0f/s)  |  %d alarms  |  %s", f"{samples:,}", rate, len(self._active_alarms), state)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", help="the NanoLab's port or URL (default: detected, or $NANOLAB_PORT)")
+    parser.add_argument("--wireless", action="store_true", help="connect through the wireless bridge")
+    parser.add_argument("--status-every", type=float, default=60.0, help="seconds between status lines")
+    parser.add_argument("--duration", type=float, help="exit after this many seconds")
+    parser.add_argument("--startup-only", action="store_true", help="print startup time and memory, then exit")
+    parser.add_argument("--record", metavar="DIR", help="record the device's raw traffic to a file in DIR")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING if args.startup_only else logging.INFO,
+                        format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.wireless:
+        from tcp_link import wireless_url  # asyncio is only imported once it is needed
+        url = wireless_url()
+    else:
+        url = args.port or find_port()
+    if url is None:
+        log.error("no NanoLab found on any USB port; pass --port")
+        return 1
+
+    daemon = Daemon(url, args.record)
+    daemon.start()
+    if args.startup_only:
+        opened = daemon.wait_open(STARTUP_TIMEOUT)
+        print(json.dumps({"startup_ms": (time.perf_counter() - STARTED) * 1e3, "max_rss_mib": max_rss_mib(),
+                          "link_open": opened, "qt_imported": any(name.startswith("PyQt6") for name in sys.modules)}))
+        daemon.close()
+        return 0 if opened else 1
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: daemon.stop())
+    log.info("serving %s (data in %s)", url, default_root().parent)
+    try:
+        daemon.run(args.status_every, args.duration)
+    finally:
+        daemon.close()
+        log.info("stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
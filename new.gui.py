@@ -1,25 +1,135 @@
 import sys
+import threading
+import time
+
+STARTED = time.perf_counter()  # before the heavy imports, for the time-to-first-frame
+
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QPushButton, QVBoxLayout,
     QHBoxLayout, QGridLayout, QStackedWidget, QSpacerItem, QSizePolicy, QColorDialog,
-    QLineEdit, QToolBar, QComboBox, QDateEdit, QSpinBox, QSlider
+    QLineEdit, QToolBar, QComboBox, QDateEdit, QSpinBox, QSlider, QMessageBox,
+    QCheckBox, QFileDialog, QProgressBar, QListView, QTableWidget, QTableWidgetItem, QHeaderView
 )
-from PyQt6.QtCore import Qt, QDate
-from PyQt6.QtGui import QColor
+from PyQt6.QtCore import (
+    Qt, QAbstractListModel, QDate, QDateTime, QModelIndex, QObject, QSize, QThread, QTimer, pyqtSignal
+)
+from PyQt6.QtGui import QColor, QImageReader, QPixmap
+
+import camera
+import command_scheduler
+import export
+import fleet
+import schedule_compiler
+import settings_history
+import sensor_monitor
+import settings_model
+import simulator
+import theme
+import wire_protocol
+from controller import PREVIEW_INTERVAL, DeviceController
+from device_link import find_port
+from lod import envelope
+from profiler import HEARTBEAT_MS, PROFILER, traced
+from recording import record_dir
+from storage import ColumnStore, data_dir, default_root
+from telemetry import CHANNELS, Telemetry
 
-# ----- COLORS -----
-LIGHT_BG = "#f2f7f2"
-DARK_BG = "#2c2f2c"
-GREEN = "#a8d5a2"
-GREEN_DARK = "#2f4f2d"
-TEXT_LIGHT = "black"
-TEXT_DARK = "white"
+UNIX_EPOCH_JULIAN_DAY = 2440588  # QDate(1970, 1, 1).toJulianDay()
+FRAME_MS = 16  # coalesced UI updates run at most once per frame
 
 def style_button(button):
     button.setMinimumHeight(48)
     button.setCursor(Qt.CursorShape.PointingHandCursor)
     # No inline styles needed; handled by global stylesheet
 
+def set_style_property(widget, name, value):
+    """Set a property that the stylesheet matches on, re-polishing only ``widget`` and only on a change"""
+    if widget.property(name) == value:
+        return
+    widget.setProperty(name, value)
+    widget.style().unpolish(widget)
+    widget.style().polish(widget)
+
+def set_warning(widget, warning):
+    set_style_property(widget, "warning", warning)
+
+def set_theme_property(widget, name):
+    set_style_property(widget, "theme", name)
+
+
+class FrameCoalescer(QObject):
+    """Run ``callback`` at most once per frame, however often ``request`` is called
+
+    The callback reads the newest state when it runs, so a burst of signals
+    (every step of a slider drag) costs one update instead of one each.
+    """
+
+    def __init__(self, callback, parent, interval_ms=FRAME_MS):
+        super().__init__(parent)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(callback)
+
+    def request(self, *args):
+        if not self.timer.isActive():  # restarting would put the update off for as long as the burst lasts
+            self.timer.start()
+
+class DeviceLinkBridge(QObject):
+    """Re-emits a DeviceController's worker-thread callbacks as Qt signals.
+
+    Signals emitted from the worker are queued onto the GUI thread, so slots
+    connected here never run concurrently with the serial port. Telemetry and
+    camera chunks never come through here: the controller writes them
+    straight into the ring buffers and the captures directory on the worker,
+    since a signal per batch would flood the event loop.
+    """
+    message_received = pyqtSignal(int, object)
+    state_changed = pyqtSignal(str, str)
+
+    def __init__(self, controller):
+        super().__init__()
+        controller.on_message = self.message_received.emit
+        controller.on_state = self.state_changed.emit
+
+
+class ExportWorker(QObject):
+    """Runs one export.export call on its own QThread and reports back with signals.
+
+    Progress is emitted at most every PROGRESS_INTERVAL seconds, so a fast
+    binary export does not flood the GUI's event loop.
+    """
+    PROGRESS_INTERVAL = 0.1
+
+    progress = pyqtSignal("qint64", "qint64")
+    finished = pyqtSignal(str)  # message for the user, whether it worked or not
+
+    def __init__(self, store, path, t0, t1, columns, fmt):
+        super().__init__()
+        self.args = (store, path, t0, t1, columns, fmt)
+        self.cancel = threading.Event()
+        self._last_progress = 0.0
+
+    def run(self):
+        store, path, t0, t1, columns, fmt = self.args
+        message = "⚠️ Export failed"
+        try:
+            rows = export.export(store, path, t0, t1, columns, fmt, progress=self._on_progress, cancel=self.cancel)
+            message = f"✅ Exported {rows:,} readings to {path}"
+        except export.ExportCancelled:
+            message = "Export cancelled"
+        except Exception as exc:  # anything uncaught here would leave the page waiting forever
+            message = f"⚠️ Export failed: {exc}"
+        finally:
+            self.finished.emit(message)
+
+    def _on_progress(self, done, total):
+        now = time.monotonic()
+        if now - self._last_progress >= self.PROGRESS_INTERVAL or done == total:
+            self._last_progress = now
+            self.progress.emit(done, total)
+
+
 class BasePage(QWidget):
     def __init__(self, title):
         super().__init__()
@@ -68,7 +178,7 @@ class WelcomePage(BasePage):
 
 
 class SettingsMenuPage(BasePage):
-    def __init__(self, switch):
+    def __init__(self, switch, send):
         super().__init__("Adjust NanoLab Settings")
 
         # Connection method dropdown
@@ -77,7 +187,7 @@ class SettingsMenuPage(BasePage):
         connection_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
         connection_label = QLabel("Arduino Connection Method:")
-        connection_label.setStyleSheet("font-size: 15px; font-weight: 600;")
+        connection_label.setObjectName("headingLabel")
         
         self.connection_combo = QComboBox()
         self.connection_combo.addItems(["USB Port", "Wireless"])
@@ -101,6 +211,9 @@ class SettingsMenuPage(BasePage):
             ("Fan Settings", "fan"),
             ("Camera Settings", "camera"),
             ("Atmospheric Sensor", "sensor"),
+            ("Compare Settings", "settings_comparison"),
+            ("Camera Captures", "camera_gallery"),
+            ("Fleet", "fleet"),
         ]
 
         row, col = 0, 0
@@ -120,34 +233,41 @@ class SettingsMenuPage(BasePage):
         send_btn = QPushButton("Send to your NanoLab")
         style_button(send_btn)
         send_btn.setMinimumHeight(45)
+        send_btn.clicked.connect(lambda: send(self.connection_combo.currentText()))
         self.body.addWidget(send_btn, alignment=Qt.AlignmentFlag.AlignRight)
 
+        # Link status
+        self.status_label = QLabel()
+        self.status_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+        self.status_label.setObjectName("statusLabel")
+        self.body.addWidget(self.status_label)
 
-class LEDSettingsPage(BasePage):
-    def __init__(self):
-        super().__init__("LED Settings")
+    def set_status(self, text):
+        self.status_label.setText(text)
 
-        self.current_color = QColor("#ffffff")
-        
-        # Description and color button in top row
-        top_row = QHBoxLayout()
-        top_row.setSpacing(20)
-        
-        desc_label = QLabel("Configure LED color and operation parameters")
-        desc_label.setStyleSheet("font-size: 14px;")
-        
-        # Button to open color picker dialog in top right
-        choose_btn = QPushButton("Choose LED Color")
-        style_button(choose_btn)
-        choose_btn.setFixedWidth(180)
-        choose_btn.clicked.connect(self.open_color_picker)
-        
-        top_row.addWidget(desc_label)
-        top_row.addStretch()
-        top_row.addWidget(choose_btn)
-        
-        self.body.addLayout(top_row)
-        self.body.addSpacing(25)
+
+class SliderSettingsPage(BasePage):
+    """One slider per field of a settings group; "Save to Settings" writes them to the settings model
+
+    Labels and the summary follow the sliders once per frame. With "Live
+    preview" checked, the values are also shown on the NanoLab as they
+    change, without being saved, until the box is unchecked or the page is
+    left.
+    """
+    GROUP = None
+    TITLE = None
+    DESCRIPTION = None
+
+    def __init__(self, settings, live_preview=None, connect=None):
+        super().__init__(self.TITLE)
+        self.settings = settings
+        self.live_preview = live_preview
+        self.connect = connect
+        self.coalescer = FrameCoalescer(self.update_values, self)
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setInterval(int(PREVIEW_INTERVAL * 1000))
+        self.preview_timer.timeout.connect(self.flush_preview)
+        self.add_description()
         
         # Container for all sliders with fixed width
         sliders_container = QWidget()
@@ -155,83 +275,39 @@ class LEDSettingsPage(BasePage):
         sliders_layout = QVBoxLayout(sliders_container)
         sliders_layout.setSpacing(25)
         
-        # LED Duration Slider
-        duration_layout = QHBoxLayout()
-        duration_layout.setSpacing(15)
-        
-        duration_label = QLabel("Run Duration (hours):")
-        duration_label.setStyleSheet("font-size: 14px; font-weight: 600;")
-        duration_label.setFixedWidth(230)
-        
-        self.duration_slider = QSlider(Qt.Orientation.Horizontal)
-        self.duration_slider.setMinimum(1)
-        self.duration_slider.setMaximum(24)
-        self.duration_slider.setValue(12)
-        self.duration_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
-        self.duration_slider.setTickInterval(2)
-        
-        self.duration_value_label = QLabel("12")
-        self.duration_value_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        self.duration_value_label.setFixedWidth(30)
-        self.duration_value_label.setAlignment(Qt.AlignmentFlag.AlignRight)
-        
-        duration_layout.addWidget(duration_label)
-        duration_layout.addWidget(self.duration_slider)
-        duration_layout.addWidget(self.duration_value_label)
-        
-        sliders_layout.addLayout(duration_layout)
-        
-        # Run Frequency Slider
-        frequency_layout = QHBoxLayout()
-        frequency_layout.setSpacing(15)
-        
-        frequency_label = QLabel("Run Frequency (times/day):")
-        frequency_label.setStyleSheet("font-size: 14px; font-weight: 600;")
-        frequency_label.setFixedWidth(230)
-        
-        self.frequency_slider = QSlider(Qt.Orientation.Horizontal)
-        self.frequency_slider.setMinimum(1)
-        self.frequency_slider.setMaximum(24)
-        self.frequency_slider.setValue(2)
-        self.frequency_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
-        self.frequency_slider.setTickInterval(2)
-        
-        self.frequency_value_label = QLabel("2")
-        self.frequency_value_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        self.frequency_value_label.setFixedWidth(30)
-        self.frequency_value_label.setAlignment(Qt.AlignmentFlag.AlignRight)
-        
-        frequency_layout.addWidget(frequency_label)
-        frequency_layout.addWidget(self.frequency_slider)
-        frequency_layout.addWidget(self.frequency_value_label)
-        
-        sliders_layout.addLayout(frequency_layout)
-        
-        # Interval Slider
-        interval_layout = QHBoxLayout()
-        interval_layout.setSpacing(15)
-        
-        interval_label = QLabel("Interval (hours):")
-        interval_label.setStyleSheet("font-size: 14px; font-weight: 600;")
-        interval_label.setFixedWidth(230)
-        
-        self.interval_slider = QSlider(Qt.Orientation.Horizontal)
-        self.interval_slider.setMinimum(1)
-        self.interval_slider.setMaximum(24)
-        self.interval_slider.setValue(12)
-        self.interval_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
-        self.interval_slider.setTickInterval(2)
-        
-        self.interval_value_label = QLabel("12")
-        self.interval_value_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        self.interval_value_label.setFixedWidth(30)
-        self.interval_value_label.setAlignment(Qt.AlignmentFlag.AlignRight)
-        
-        interval_layout.addWidget(interval_label)
-        interval_layout.addWidget(self.interval_slider)
-        interval_layout.addWidget(self.interval_value_label)
-        
-        sliders_layout.addLayout(interval_layout)
+        self.sliders = {}
+        self.value_labels = {}
+        for field in settings_model.fields(self.GROUP):
+            if field.label is None:
+                continue
+            name = field.key.split(".", 1)[1]
+            row = QHBoxLayout()
+            row.setSpacing(15)
+            
+            label = QLabel(field.label)
+            label.setObjectName("fieldLabel")
+            label.setFixedWidth(230)
+            
+            slider = QSlider(Qt.Orientation.Horizontal)
+            slider.setMinimum(field.minimum)
+            slider.setMaximum(field.maximum)
+            slider.setValue(settings[field.key])
+            slider.setTickPosition(QSlider.TickPosition.TicksBelow)
+            slider.setTickInterval(field.tick)
+            
+            value_label = QLabel(str(slider.value()))
+            value_label.setObjectName("valueLabel")
+            value_label.setFixedWidth(30)
+            value_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+            
+            row.addWidget(label)
+            row.addWidget(slider)
+            row.addWidget(value_label)
+            sliders_layout.addLayout(row)
+            
+            slider.valueChanged.connect(self.coalescer.request)
+            self.sliders[name] = slider
+            self.value_labels[name] = value_label
         
         self.body.addWidget(sliders_container, alignment=Qt.AlignmentFlag.AlignHCenter)
         self.body.addSpacing(20)
@@ -239,188 +315,182 @@ class LEDSettingsPage(BasePage):
         # Summary Information
         self.summary_label = QLabel()
         self.summary_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        self.summary_label.setStyleSheet("font-size: 13px; font-style: italic; color: #666;")
+        self.summary_label.setObjectName("statusLabel")
         self.summary_label.setWordWrap(True)
         self.update_summary()
         self.body.addWidget(self.summary_label)
         self.body.addSpacing(20)
         
-        # Connect value changes
-        self.duration_slider.valueChanged.connect(self.update_duration_label)
-        self.frequency_slider.valueChanged.connect(self.update_frequency_label)
-        self.interval_slider.valueChanged.connect(self.update_interval_label)
-        
-        self.duration_slider.valueChanged.connect(self.update_summary)
-        self.frequency_slider.valueChanged.connect(self.update_summary)
-        self.interval_slider.valueChanged.connect(self.update_summary)
-
         # Save button
         save_btn = QPushButton("Save to Settings")
         style_button(save_btn)
         save_btn.setFixedWidth(250)
         save_btn.setMinimumHeight(45)
-        save_btn.setStyleSheet("font-weight: bold; background-color: #4CAF50; color: white; border-radius: 12px;")
+        save_btn.setObjectName("saveButton")
         save_btn.clicked.connect(self.save_settings)
         self.body.addWidget(save_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
 
-    def open_color_picker(self):
-        dlg = QColorDialog(self.current_color, self)
-        dlg.setOption(QColorDialog.ColorDialogOption.DontUseNativeDialog, True)
-        dlg.setOption(QColorDialog.ColorDialogOption.ShowAlphaChannel, False)
-
-        if dlg.exec():
-            color = dlg.currentColor()
-            self.current_color = color
-            self.update_ui_color(color)
+        self.preview_check = QCheckBox("Live preview on your NanoLab")
+        self.preview_check.setToolTip("Show changes on the device as you make them; they are not saved")
+        self.preview_check.setEnabled(live_preview is not None)
+        self.preview_check.toggled.connect(self.toggle_preview)
+        self.body.addWidget(self.preview_check, alignment=Qt.AlignmentFlag.AlignHCenter)
 
-    def update_ui_color(self, color: QColor):
-        hex_code = color.name()
-        self.preview.setStyleSheet(f"background-color: {hex_code}; border-radius: 10px; border: 2px solid #aaa;")
-    
-    def update_duration_label(self, value):
-        self.duration_value_label.setText(str(value))
+    def hideEvent(self, event):
+        self.preview_check.setChecked(False)  # a preview ends with the page
+        super().hideEvent(event)
     
-    def update_frequency_label(self, value):
-        self.frequency_value_label.setText(str(value))
+    def add_description(self):
+        desc_label = QLabel(self.DESCRIPTION)
+        desc_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.body.addWidget(desc_label)
+        self.body.addSpacing(25)
     
-    def update_interval_label(self, value):
-        self.interval_value_label.setText(str(value))
+    def slider_values(self):
+        return {name: slider.value() for name, slider in self.sliders.items()}
+
+    @traced
+    def update_values(self):
+        """Show the sliders' values, once per frame during a drag, and preview them"""
+        for name, slider in self.sliders.items():
+            self.value_labels[name].setNum(slider.value())
+        self.update_summary()
+        self.offer_preview(self.preview_values())
+
+    def toggle_preview(self, on):
+        if on:
+            if self.connect is not None:
+                self.connect(self.summary_label.setText)
+            self.offer_preview(self.preview_values())
+        else:
+            self.preview_timer.stop()
+            self.live_preview.stop()
+
+    def preview_values(self):
+        return {f"{self.GROUP}.{name}": value for name, value in self.slider_values().items()}
+
+    def offer_preview(self, changes):
+        """Send ``changes`` to the device as soon as the preview rate allows, if previewing"""
+        if not self.preview_check.isChecked():
+            return
+        self.live_preview.offer(changes)
+        self.flush_preview()
+
+    def flush_preview(self):
+        if self.live_preview.flush():
+            if not self.preview_timer.isActive():
+                self.preview_timer.start()
+        else:
+            self.preview_timer.stop()
     
+    @traced
     def update_summary(self):
         """Update the summary information display"""
-        duration = self.duration_slider.value()
-        frequency = self.frequency_slider.value()
-        interval = self.interval_slider.value()
-        
-        total_runtime = duration * frequency
-        summary_text = f"💡 Total daily runtime: {total_runtime} hours  |  ⏱️ Interval: {interval} hours"
-        self.summary_label.setText(summary_text)
+        self.summary_label.setText(self.summary(self.slider_values()))
     
+    @traced
     def save_settings(self):
-        """Save the LED settings"""
-        color = self.current_color.name()
-        duration = self.duration_slider.value()
-        frequency = self.frequency_slider.value()
-        interval = self.interval_slider.value()
-        print(f"LED Settings: Color={color}, Duration={duration}h, Frequency={frequency}x/day, Interval={interval}h")
+        """Save the slider values into the settings model"""
+        values = self.slider_values()
+        self.settings.update({f"{self.GROUP}.{name}": value for name, value in values.items()})
+        self.summary_label.setText(f"✅ Saved  |  {self.describe(values)}")
+    
+    def summary(self, values):
+        raise NotImplementedError
+    
+    def describe(self, values):
+        raise NotImplementedError
 
 
-class CameraSettingsPage(BasePage):
-    def __init__(self):
-        super().__init__("Camera Settings")
-        
-        # Description
-        desc_label = QLabel("Configure camera recording parameters")
-        desc_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        desc_label.setStyleSheet("font-size: 14px;")
-        self.body.addWidget(desc_label)
-        self.body.addSpacing(25)
-        
-        # Container for all sliders with fixed width
-        sliders_container = QWidget()
-        sliders_container.setFixedWidth(650)
-        sliders_layout = QVBoxLayout(sliders_container)
-        sliders_layout.setSpacing(25)
-        
-        # Recording Frequency Slider
-        frequency_layout = QHBoxLayout()
-        frequency_layout.setSpacing(15)
-        
-        frequency_label = QLabel("Recording Frequency (times/day):")
-        frequency_label.setStyleSheet("font-size: 14px; font-weight: 600;")
-        frequency_label.setFixedWidth(230)
-        
-        self.frequency_slider = QSlider(Qt.Orientation.Horizontal)
-        self.frequency_slider.setMinimum(1)
-        self.frequency_slider.setMaximum(24)
-        self.frequency_slider.setValue(3)
-        self.frequency_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
-        self.frequency_slider.setTickInterval(2)
-        
-        self.frequency_value_label = QLabel("3")
-        self.frequency_value_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        self.frequency_value_label.setFixedWidth(30)
-        self.frequency_value_label.setAlignment(Qt.AlignmentFlag.AlignRight)
-        
-        frequency_layout.addWidget(frequency_label)
-        frequency_layout.addWidget(self.frequency_slider)
-        frequency_layout.addWidget(self.frequency_value_label)
-        
-        sliders_layout.addLayout(frequency_layout)
-        
-        # Interval Slider
-        interval_layout = QHBoxLayout()
-        interval_layout.setSpacing(15)
-        
-        interval_label = QLabel("Interval (hours):")
-        interval_label.setStyleSheet("font-size: 14px; font-weight: 600;")
-        interval_label.setFixedWidth(230)
-        
-        self.interval_slider = QSlider(Qt.Orientation.Horizontal)
-        self.interval_slider.setMinimum(1)
-        self.interval_slider.setMaximum(24)
-        self.interval_slider.setValue(8)
-        self.interval_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
-        self.interval_slider.setTickInterval(2)
-        
-        self.interval_value_label = QLabel("8")
-        self.interval_value_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        self.interval_value_label.setFixedWidth(30)
-        self.interval_value_label.setAlignment(Qt.AlignmentFlag.AlignRight)
-        
-        interval_layout.addWidget(interval_label)
-        interval_layout.addWidget(self.interval_slider)
-        interval_layout.addWidget(self.interval_value_label)
-        
-        sliders_layout.addLayout(interval_layout)
-        
-        self.body.addWidget(sliders_container, alignment=Qt.AlignmentFlag.AlignHCenter)
-        self.body.addSpacing(20)
+class LEDSettingsPage(SliderSettingsPage):
+    GROUP = "led"
+    TITLE = "LED Settings"
+    DESCRIPTION = "Configure LED color and operation parameters"
+
+    def __init__(self, settings, live_preview=None, connect=None):
+        self.current_color = QColor(settings["led.red"], settings["led.green"], settings["led.blue"])
+        self.shown_color = self.current_color  # what the swatch and the preview show while the picker is open
+        super().__init__(settings, live_preview, connect)
+        self.update_ui_color(self.current_color)
+
+    def add_description(self):
+        # Description and color button in top row
+        top_row = QHBoxLayout()
+        top_row.setSpacing(20)
         
-        # Summary Information
-        self.summary_label = QLabel()
-        self.summary_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        self.summary_label.setStyleSheet("font-size: 13px; font-style: italic; color: #666;")
-        self.summary_label.setWordWrap(True)
-        self.update_summary()
-        self.body.addWidget(self.summary_label)
-        self.body.addSpacing(20)
+        desc_label = QLabel(self.DESCRIPTION)
+
+        self.preview = QLabel()
+        self.preview.setObjectName("colorSwatch")
+        self.preview.setFixedSize(48, 48)
         
-        # Connect value changes
-        self.frequency_slider.valueChanged.connect(self.update_frequency_label)
-        self.interval_slider.valueChanged.connect(self.update_interval_label)
+        # Button to open color picker dialog in top right
+        choose_btn = QPushButton("Choose LED Color")
+        style_button(choose_btn)
+        choose_btn.setFixedWidth(180)
+        choose_btn.clicked.connect(self.open_color_picker)
         
-        self.frequency_slider.valueChanged.connect(self.update_summary)
-        self.interval_slider.valueChanged.connect(self.update_summary)
+        top_row.addWidget(desc_label)
+        top_row.addStretch()
+        top_row.addWidget(self.preview)
+        top_row.addWidget(choose_btn)
         
-        # Save button
-        save_btn = QPushButton("Save to Settings")
-        style_button(save_btn)
-        save_btn.setFixedWidth(250)
-        save_btn.setMinimumHeight(45)
-        save_btn.setStyleSheet("font-weight: bold; background-color: #4CAF50; color: white; border-radius: 12px;")
-        save_btn.clicked.connect(self.save_settings)
-        self.body.addWidget(save_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self.body.addLayout(top_row)
+        self.body.addSpacing(25)
+
+    def open_color_picker(self):
+        dlg = QColorDialog(self.current_color, self)
+        dlg.setOption(QColorDialog.ColorDialogOption.DontUseNativeDialog, True)
+        dlg.setOption(QColorDialog.ColorDialogOption.ShowAlphaChannel, False)
+        # The wheel emits a color per mouse move; the swatch and the preview follow once per frame
+        color_coalescer = FrameCoalescer(lambda: self.show_color(dlg.currentColor()), dlg)
+        dlg.currentColorChanged.connect(color_coalescer.request)
+
+        if dlg.exec():
+            self.current_color = dlg.currentColor()
+        self.show_color(self.current_color)
+
+    def show_color(self, color):
+        if color == self.shown_color:
+            return
+        self.shown_color = color
+        self.update_ui_color(color)
+        self.offer_preview({"led.red": color.red(), "led.green": color.green(), "led.blue": color.blue()})
+
+    def update_ui_color(self, color: QColor):
+        # The one inline style: the swatch's color is the data; its shape comes from the theme
+        self.preview.setStyleSheet(f"background-color: {color.name()};")
+
+    def preview_values(self):
+        color = self.shown_color
+        return {**super().preview_values(), "led.red": color.red(), "led.green": color.green(), "led.blue": color.blue()}
     
-    def update_frequency_label(self, value):
-        self.frequency_value_label.setText(str(value))
+    def summary(self, values):
+        total_runtime = values["duration_h"] * values["frequency"]
+        return f"💡 Total daily runtime: {total_runtime} hours  |  ⏱️ Interval: {values['interval_h']} hours"
     
-    def update_interval_label(self, value):
-        self.interval_value_label.setText(str(value))
+    @traced
+    def save_settings(self):
+        """Save the LED settings"""
+        color = self.current_color
+        self.settings.update({"led.red": color.red(), "led.green": color.green(), "led.blue": color.blue()})
+        super().save_settings()
     
-    def update_summary(self):
-        """Update the summary information display"""
-        frequency = self.frequency_slider.value()
-        interval = self.interval_slider.value()
-        
-        summary_text = f"📷 Recordings per day: {frequency}  |  ⏱️ Interval: {interval} hours"
-        self.summary_label.setText(summary_text)
+    def describe(self, values):
+        return (f"LED Settings: Color={self.current_color.name()}, Duration={values['duration_h']}h, "
+                f"Frequency={values['frequency']}x/day, Interval={values['interval_h']}h")
+
+
+class CameraSettingsPage(SliderSettingsPage):
+    GROUP = "camera"
+    TITLE = "Camera Settings"
+    DESCRIPTION = "Configure camera recording parameters"
     
-    def save_settings(self):
-        """Save the camera settings"""
-        frequency = self.frequency_slider.value()
-        interval = self.interval_slider.value()
-        print(f"Camera Settings: Frequency={frequency}x/day, Interval={interval}h")
+    def summary(self, values):
+        return f"📷 Recordings per day: {values['frequency']}  |  ⏱️ Interval: {values['interval_h']} hours"
+    
+    def describe(self, values):
+        return f"Camera Settings: Frequency={values['frequency']}x/day, Interval={values['interval_h']}h"
 
 
 class SimplePage(BasePage):
@@ -431,6 +501,289 @@ class SimplePage(BasePage):
         self.body.addWidget(note)
 
 
+class DataResultsPage(BasePage):
+    REFRESH_MS = 33  # UI refresh rate is fixed, whatever the sample rate
+    SD_REFRESH_MS = 250
+
+    # (label, seconds shown, x-axis unit, seconds per unit); None shows the whole session
+    RANGES = [
+        ("Last minute", 60, "seconds", 1),
+        ("Last hour", 3600, "minutes", 60),
+        ("Last day", 86400, "hours", 3600),
+        ("Whole session (zoom & pan)", None, "hours", 3600),
+    ]
+
+    def __init__(self, telemetry, sd, connect):
+        super().__init__("Data Results")
+        self.telemetry = telemetry
+        self.sd = sd
+        self.connect = connect
+        self._last_total = 0
+        self._rate = 0.0
+
+        desc_label = QLabel("Live readings from your NanoLab")
+        desc_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.body.addWidget(desc_label)
+
+        grid = QGridLayout()
+        grid.setHorizontalSpacing(40)
+        grid.setVerticalSpacing(12)
+        self.value_labels = {}
+        for row, (name, (unit, _)) in enumerate(CHANNELS.items()):
+            name_label = QLabel(name.capitalize() + ":")
+            name_label.setObjectName("fieldLabel")
+            value_label = QLabel("—")
+            value_label.setObjectName("valueLabel")
+            value_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+            grid.addWidget(name_label, row, 0)
+            grid.addWidget(value_label, row, 1)
+            grid.addWidget(QLabel(unit), row, 2)
+            self.value_labels[name] = value_label
+        self.body.addLayout(grid)
+
+        # Plot of one channel; never more points than the plot is pixels wide
+        plot_row = QHBoxLayout()
+        plot_row.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        plot_row.setSpacing(15)
+        self.channel_combo = QComboBox()
+        self.channel_combo.addItems([name.capitalize() for name in CHANNELS])
+        self.range_combo = QComboBox()
+        self.range_combo.addItems([label for label, *_ in self.RANGES])
+        for combo in (self.channel_combo, self.range_combo):
+            combo.setMinimumHeight(40)
+            combo.currentIndexChanged.connect(self.start_plot)
+            plot_row.addWidget(combo)
+        self.body.addLayout(plot_row)
+
+        # matplotlib takes about half a second to import, so only load it with this page
+        from graph_canvas import GraphCanvas
+        self.graph = GraphCanvas(self)
+        self.graph.setMinimumHeight(280)
+        self.body.addWidget(self.graph)
+        self.start_plot()
+
+        self.summary_label = QLabel("Waiting for data")
+        self.summary_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.summary_label.setObjectName("statusLabel")
+        self.body.addWidget(self.summary_label)
+
+        button_row = QHBoxLayout()
+        button_row.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        button_row.setSpacing(15)
+        live_btn = QPushButton("Start Live Data")
+        live_btn.clicked.connect(lambda: connect(self.summary_label.setText))
+        sd_btn = QPushButton("Download SD Card")
+        sd_btn.clicked.connect(self.download_sd)
+        for btn in (live_btn, sd_btn):
+            style_button(btn)
+            btn.setFixedWidth(250)
+            button_row.addWidget(btn)
+        self.body.addLayout(button_row)
+
+        # Files the NanoLab logged while no one was connected (sd_download.py)
+        self.sd_label = QLabel()
+        self.sd_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.sd_label.setObjectName("statusLabel")
+        self.sd_label.hide()
+        self.body.addWidget(self.sd_label)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+        self.sd_timer = QTimer(self)
+        self.sd_timer.setInterval(self.SD_REFRESH_MS)
+        self.sd_timer.timeout.connect(self.show_sd_progress)
+
+    def start_plot(self):
+        name = list(CHANNELS)[self.channel_combo.currentIndex()]
+        unit = CHANNELS[name][0]
+        title = f"{name.capitalize()} ({unit})" if unit else name.capitalize()
+        _, seconds, axis_unit, per_unit = self.RANGES[self.range_combo.currentIndex()]
+        if seconds is None:
+            self.start_review(name, title, per_unit)
+        else:
+            self.graph.start_live(title=title, xlim=(-seconds / per_unit, 0))
+            self.graph.ax.set_xlabel(f"{axis_unit} ago")
+        self._last_total = 0
+
+    def start_review(self, name, title, per_unit):
+        """Static plot of the whole session, refetched at screen resolution on every zoom and pan"""
+        origin = self.telemetry.start_time
+        if origin is None:
+            origin = 0.0
+            span = 1.0
+        else:
+            span = max(float(self.telemetry.time.latest(1)[0]) - origin, 1.0) / per_unit
+
+        def fetch(x0, x1, pixels):
+            t, lo, hi = self.telemetry.window(name, origin + x0 * per_unit, origin + x1 * per_unit, pixels)
+            x, y = envelope(t, lo, hi)
+            return (x - origin) / per_unit, y
+
+        self.graph.start_review(fetch, (0, span), title=title)
+        self.graph.ax.set_xlabel("hours since start")
+
+    def download_sd(self):
+        """Fetch every file on the NanoLab's SD card that is not downloaded yet"""
+        self.sd_label.show()
+        if not self.connect(self.sd_label.setText):
+            return
+        if not self.sd.download_all():
+            self.sd_label.setText("No NanoLab connected")
+            return
+        self.sd_label.setText("💾 Listing the SD card…")
+        self.sd_timer.start()
+
+    def show_sd_progress(self):
+        if not self.isVisible():
+            return
+        busy = self.sd.busy
+        summary = self.sd.summary()
+        if not busy and not summary:
+            summary = f"⚠️ SD card: {self.sd.error}" if self.sd.error else "💾 Nothing new on the SD card"
+        if summary:
+            self.sd_label.setText(summary)
+        if not busy:
+            self.sd_timer.stop()
+
+    @traced
+    def refresh(self):
+        """Show the newest samples; skipped while the page is hidden or nothing new arrived"""
+        if not self.isVisible():
+            return
+        total = self.telemetry.samples
+        if total == self._last_total:
+            return
+        rate = (total - self._last_total) * 1000 / self.REFRESH_MS
+        self._rate = 0.9 * self._rate + 0.1 * rate
+        self._last_total = total
+
+        for name, value in self.telemetry.current().items():
+            self.value_labels[name].setText(f"{value:.2f}")
+
+        _, seconds, _, per_unit = self.RANGES[self.range_combo.currentIndex()]
+        if seconds is not None:
+            name = list(CHANNELS)[self.channel_combo.currentIndex()]
+            now = float(self.telemetry.time.latest(1)[0])
+            t, lo, hi = self.telemetry.window(name, now - seconds, now, self.graph.plot_pixels())
+            x, y = envelope(t, lo, hi)
+            self.graph.set_live_data(0, (x - now) / per_unit, y)
+            self.graph.draw_live()
+
+        summary = f"📈 {total:,} samples  |  {self._rate:,.0f} samples/s  |  {self.graph.frame_timer.summary()}"
+        if self.telemetry.gaps:
+            summary += f"  |  ⚠️ {self.telemetry.gaps} gaps"
+        self.summary_label.setText(summary)
+
+
+class SensorPage(BasePage):
+    REFRESH_MS = 200  # labels refresh at a fixed rate, whatever the sample rate
+
+    WINDOW_NAMES = {10: "Last 10 seconds", 60: "Last minute", 600: "Last 10 minutes"}
+    COLUMNS = ("Now", "Min", "Max", "Mean", "Std dev", "EWMA", "Rate / min")
+
+    def __init__(self, monitor, connect):
+        super().__init__("Atmospheric Sensor")
+        self.monitor = monitor
+        self._last_samples = None
+
+        desc_label = QLabel("Rolling statistics and alarms for every sensor channel")
+        desc_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.body.addWidget(desc_label)
+
+        self.window_combo = QComboBox()
+        self.window_combo.addItems([self.WINDOW_NAMES.get(seconds, f"Last {seconds} s")
+                                    for seconds in sensor_monitor.WINDOWS])
+        self.window_combo.setMinimumHeight(40)
+        self.window_combo.currentIndexChanged.connect(self.show_stats)
+        self.body.addWidget(self.window_combo, alignment=Qt.AlignmentFlag.AlignHCenter)
+
+        grid = QGridLayout()
+        grid.setHorizontalSpacing(25)
+        grid.setVerticalSpacing(12)
+        for column, title in enumerate(self.COLUMNS, start=1):
+            heading = QLabel(title)
+            heading.setObjectName("fieldLabel")
+            heading.setAlignment(Qt.AlignmentFlag.AlignRight)
+            grid.addWidget(heading, 0, column)
+        self.stat_labels = {}
+        for row, (name, (unit, _)) in enumerate(CHANNELS.items(), start=1):
+            name_label = QLabel(f"{name.capitalize()} ({unit})" if unit else name.capitalize())
+            name_label.setObjectName("fieldLabel")
+            grid.addWidget(name_label, row, 0)
+            labels = []
+            for column in range(1, len(self.COLUMNS) + 1):
+                label = QLabel("—")
+                label.setObjectName("valueLabel")
+                label.setAlignment(Qt.AlignmentFlag.AlignRight)
+                grid.addWidget(label, row, column)
+                labels.append(label)
+            self.stat_labels[name] = labels
+        self.body.addLayout(grid)
+        self.body.addSpacing(20)
+
+        alarms_heading = QLabel("Alarms")
+        alarms_heading.setObjectName("headingLabel")
+        alarms_heading.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.body.addWidget(alarms_heading)
+        self.alarm_labels = []
+        for alarm in self.monitor.alarms:
+            label = QLabel()
+            label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+            label.setObjectName("statusLabel")
+            self.body.addWidget(label)
+            self.alarm_labels.append(label)
+        self.body.addSpacing(20)
+
+        self.summary_label = QLabel("Waiting for data")
+        self.summary_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.summary_label.setObjectName("statusLabel")
+        self.body.addWidget(self.summary_label)
+
+        live_btn = QPushButton("Start Live Data")
+        style_button(live_btn)
+        live_btn.setFixedWidth(250)
+        live_btn.clicked.connect(lambda: connect(self.summary_label.setText))
+        self.body.addWidget(live_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
+
+        self.show_alarms()
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start()
+
+    @traced
+    def refresh(self):
+        """Show the latest statistics; skipped while the page is hidden or nothing new arrived"""
+        if not self.isVisible() or self.monitor.samples == self._last_samples:
+            return
+        self._last_samples = self.monitor.samples
+        self.show_stats()
+        self.show_alarms()
+        self.summary_label.setText(f"📈 {self.monitor.samples:,} samples  |  "
+                                   f"🔔 {len(self.monitor.active_alarms())} active alarms")
+
+    def show_stats(self):
+        seconds = sensor_monitor.WINDOWS[self.window_combo.currentIndex()]
+        for name, stats in self.monitor.stats(seconds).items():
+            current = self.monitor.current.get(name)
+            values = (current, stats.min, stats.max, stats.mean, stats.std, stats.ewma, stats.rate)
+            for label, value in zip(self.stat_labels[name], values):
+                label.setText("—" if value is None or not stats.count else f"{value:.2f}")
+
+    def show_alarms(self):
+        for alarm, label in zip(self.monitor.alarms, self.alarm_labels):
+            if alarm.active:
+                when = QDateTime.fromSecsSinceEpoch(int(alarm.since)).toString("HH:mm:ss")
+                label.setText(f"🔔 {alarm} since {when} (raised {alarm.triggered}×)")
+            elif alarm.triggered:
+                label.setText(f"✅ {alarm}: clear (raised {alarm.triggered}×)")
+            else:
+                label.setText(f"✅ {alarm}: clear")
+            set_warning(label, alarm.active)
+
+
 class AboutPage(BasePage):
     def __init__(self):
         super().__init__("About Auxora Nanolabs")
@@ -444,39 +797,178 @@ class AboutPage(BasePage):
             "Savannah Finn and Alexandria Tuell"
         )
         info_text.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        info_text.setStyleSheet("font-size: 15px; line-height: 1.6;")
+        info_text.setObjectName("descriptionLabel")
         
         self.body.addWidget(info_text)
 
 
 class StoragePage(BasePage):
-    def __init__(self):
+    # (label, seconds back from the newest reading); None exports everything
+    EXPORT_RANGES = [
+        ("Last hour", 3600),
+        ("Last day", 86400),
+        ("Last week", 7 * 86400),
+        ("Everything", None),
+    ]
+    EXPORT_FORMATS = [
+        ("CSV (*.csv)", "csv", ".csv"),
+        ("NanoLab binary (*.nlb)", "binary", ".nlb"),
+    ]
+
+    def __init__(self, store):
         super().__init__("Storage Settings")
+        self.store = store
+        self.export_thread = None
+        self.export_worker = None
         
         storage_label = QLabel("Manage your data storage and export settings")
         storage_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         
-        export_btn = QPushButton("Export Data")
-        clear_btn = QPushButton("Clear Storage")
-        
-        for btn in (export_btn, clear_btn):
+        self.stats_label = QLabel()
+        self.stats_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.stats_label.setObjectName("statusLabel")
+        
+        # What to export
+        channel_row = QHBoxLayout()
+        channel_row.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        channel_row.setSpacing(15)
+        self.channel_checks = {}
+        for name in CHANNELS:
+            check = QCheckBox(name.capitalize())
+            check.setChecked(True)
+            channel_row.addWidget(check)
+            self.channel_checks[name] = check
+        
+        option_row = QHBoxLayout()
+        option_row.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        option_row.setSpacing(15)
+        self.range_combo = QComboBox()
+        self.range_combo.addItems([label for label, _ in self.EXPORT_RANGES])
+        self.format_combo = QComboBox()
+        self.format_combo.addItems([label for label, *_ in self.EXPORT_FORMATS])
+        for combo in (self.range_combo, self.format_combo):
+            combo.setMinimumHeight(40)
+            option_row.addWidget(combo)
+        
+        self.export_btn = QPushButton("Export Data")
+        self.export_btn.clicked.connect(self.start_export)
+        self.cancel_btn = QPushButton("Cancel Export")
+        self.cancel_btn.clicked.connect(self.cancel_export)
+        self.cancel_btn.hide()
+        self.clear_btn = QPushButton("Clear Storage")
+        self.clear_btn.clicked.connect(self.clear_storage)
+        
+        for btn in (self.export_btn, self.cancel_btn, self.clear_btn):
             style_button(btn)
             btn.setFixedWidth(250)
         
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFixedWidth(400)
+        self.progress_bar.hide()
+        self.export_label = QLabel()
+        self.export_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.export_label.setObjectName("statusLabel")
+        
         self.body.addWidget(storage_label)
+        self.body.addWidget(self.stats_label)
+        self.body.addSpacing(20)
+        self.body.addLayout(channel_row)
+        self.body.addLayout(option_row)
+        self.body.addWidget(self.export_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self.body.addWidget(self.cancel_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self.body.addWidget(self.progress_bar, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self.body.addWidget(self.export_label)
         self.body.addSpacing(20)
-        self.body.addWidget(export_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
-        self.body.addWidget(clear_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self.body.addWidget(self.clear_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
+    
+    def showEvent(self, event):
+        self.update_stats()
+        super().showEvent(event)
+    
+    def update_stats(self):
+        """Summarise what is on disk; reads only the block index"""
+        span = self.store.span
+        if span is None:
+            self.stats_label.setText(f"No data stored in {self.store.root}")
+            return
+        start, end = (QDateTime.fromSecsSinceEpoch(int(t)).toString("yyyy-MM-dd hh:mm") for t in span)
+        self.stats_label.setText(
+            f"💾 {self.store.rows:,} readings in {len(self.store.index)} blocks  |  "
+            f"{self.store.disk_bytes() / 2**20:,.1f} MiB  |  {start} → {end}"
+        )
+    
+    def clear_storage(self):
+        answer = QMessageBox.question(self, "Clear Storage", "Delete all stored NanoLab readings?")
+        if answer == QMessageBox.StandardButton.Yes:
+            self.store.drop_blocks()
+            self.update_stats()
+    
+    def start_export(self):
+        """Stream the chosen channels and range to a file on a background thread"""
+        self.store.flush()
+        span = self.store.span
+        if span is None:
+            self.export_label.setText("Nothing to export yet")
+            return
+        columns = [name for name, check in self.channel_checks.items() if check.isChecked()]
+        if not columns:
+            self.export_label.setText("Choose at least one channel to export")
+            return
+        file_filter, fmt, suffix = self.EXPORT_FORMATS[self.format_combo.currentIndex()]
+        path, _ = QFileDialog.getSaveFileName(self, "Export Data", "nanolab" + suffix, file_filter)
+        if not path:
+            return
+        _, seconds = self.EXPORT_RANGES[self.range_combo.currentIndex()]
+        t0 = span[0] if seconds is None else span[1] - seconds
+        
+        self.export_thread = QThread(self)
+        self.export_worker = ExportWorker(self.store, path, t0, span[1], columns, fmt)
+        self.export_worker.moveToThread(self.export_thread)
+        self.export_thread.started.connect(self.export_worker.run)
+        self.export_worker.progress.connect(self.show_export_progress)
+        self.export_worker.finished.connect(self.export_finished)
+        self.export_worker.finished.connect(self.export_thread.quit)
+        
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.cancel_btn.show()
+        self.export_btn.setEnabled(False)
+        self.clear_btn.setEnabled(False)
+        self.export_label.setText(f"Exporting to {path}…")
+        self.export_thread.start()
+    
+    def show_export_progress(self, done, total):
+        self.progress_bar.setValue(int(done * 100 / total) if total else 100)
+        self.export_label.setText(f"Exported {done:,} of {total:,} readings")
+    
+    def export_finished(self, message):
+        self.progress_bar.hide()
+        self.cancel_btn.hide()
+        self.export_btn.setEnabled(True)
+        self.clear_btn.setEnabled(True)
+        self.export_label.setText(message)
+    
+    def cancel_export(self):
+        if self.export_worker is not None:
+            self.export_worker.cancel.set()
+    
+    def shutdown(self):
+        """Cancel a running export and wait for its thread; the partial file is removed"""
+        self.cancel_export()
+        if self.export_thread is not None:
+            self.export_thread.quit()
+            self.export_thread.wait()
 
 
 class SchedulePage(BasePage):
-    def __init__(self):
+    def __init__(self, settings):
         super().__init__("Project Schedule")
+        self.settings = settings
         
         # Description
         desc_label = QLabel("Select the start and end dates for your NanoLab project")
         desc_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        desc_label.setStyleSheet("font-size: 15px; margin-bottom: 10px;")
+        desc_label.setObjectName("descriptionLabel")
         self.body.addWidget(desc_label)
         self.body.addSpacing(10)
         
@@ -486,12 +978,12 @@ class SchedulePage(BasePage):
         start_container.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         
         start_label = QLabel("Project Start Date:")
-        start_label.setStyleSheet("font-size: 16px; font-weight: 600;")
+        start_label.setObjectName("headingLabel")
         start_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         
         self.start_date = QDateEdit()
         self.start_date.setCalendarPopup(True)
-        self.start_date.setDate(QDate.currentDate())
+        self.start_date.setDate(self.saved_date("schedule.start_day", QDate.currentDate()))
         self.start_date.setMinimumHeight(45)
         self.start_date.setMinimumWidth(250)
         self.start_date.setDisplayFormat("MMMM dd, yyyy")
@@ -509,12 +1001,12 @@ class SchedulePage(BasePage):
         end_container.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         
         end_label = QLabel("Project End Date:")
-        end_label.setStyleSheet("font-size: 16px; font-weight: 600;")
+        end_label.setObjectName("headingLabel")
         end_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
         
         self.end_date = QDateEdit()
         self.end_date.setCalendarPopup(True)
-        self.end_date.setDate(QDate.currentDate().addDays(30))
+        self.end_date.setDate(self.saved_date("schedule.end_day", QDate.currentDate().addDays(30)))
         self.end_date.setMinimumHeight(45)
         self.end_date.setMinimumWidth(250)
         self.end_date.setDisplayFormat("MMMM dd, yyyy")
@@ -529,7 +1021,7 @@ class SchedulePage(BasePage):
         # Project duration display
         self.duration_label = QLabel()
         self.duration_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        self.duration_label.setStyleSheet("font-size: 14px; font-style: italic; color: #666;")
+        self.duration_label.setObjectName("statusLabel")
         self.update_duration()
         self.body.addWidget(self.duration_label)
         self.body.addSpacing(20)
@@ -543,9 +1035,38 @@ class SchedulePage(BasePage):
         style_button(save_btn)
         save_btn.setFixedWidth(300)
         save_btn.setMinimumHeight(50)
-        save_btn.setStyleSheet("font-weight: bold; background-color: #4CAF50; color: white; border-radius: 12px; padding: 12px 24px;")
+        save_btn.setObjectName("saveButton")
         save_btn.clicked.connect(self.save_schedule)
         self.body.addWidget(save_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self.body.addSpacing(20)
+        
+        # What the compiled timeline looks like
+        self.timeline_label = QLabel()
+        self.timeline_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.timeline_label.setObjectName("statusLabel")
+        self.timeline_label.setWordWrap(True)
+        self.body.addWidget(self.timeline_label)
+        self.body.addSpacing(10)
+        
+        # Predicted water and energy, and what other settings would use
+        self.usage_label = QLabel()
+        self.usage_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.usage_label.setObjectName("statusLabel")
+        self.body.addWidget(self.usage_label)
+        self.sweep_combo = QComboBox()
+        self.sweep_combo.addItems(simulator.SWEEPS)
+        self.sweep_combo.setMinimumHeight(40)
+        self.sweep_combo.currentIndexChanged.connect(self.update_usage)
+        self.body.addWidget(self.sweep_combo, alignment=Qt.AlignmentFlag.AlignHCenter)
+        # matplotlib takes about half a second to import, so only load it with this page
+        from graph_canvas import UsageCanvas
+        self.usage_chart = UsageCanvas(self)
+        self.usage_chart.setMinimumHeight(280)
+        self.body.addWidget(self.usage_chart)
+        if self.settings["schedule.start_day"] is not None:
+            self.compile_schedule()
+        else:
+            self.update_usage()
         
     def update_duration(self):
         """Calculate and display project duration"""
@@ -555,161 +1076,73 @@ class SchedulePage(BasePage):
         
         if days < 0:
             self.duration_label.setText("⚠️ End date must be after start date")
-            self.duration_label.setStyleSheet("font-size: 14px; font-style: italic; color: #d32f2f;")
         else:
             self.duration_label.setText(f"Project Duration: {days} days")
-            self.duration_label.setStyleSheet("font-size: 14px; font-style: italic; color: #666;")
+        set_warning(self.duration_label, days < 0)
     
+    @traced
     def save_schedule(self):
-        """Save the project schedule (placeholder for future implementation)"""
-        start = self.start_date.date().toString("yyyy-MM-dd")
-        end = self.end_date.date().toString("yyyy-MM-dd")
-        # Future: Save to database or file
-        print(f"Schedule saved: {start} to {end}")
-
-
-class WaterPumpSettingsPage(BasePage):
-    def __init__(self):
-        super().__init__("Water Pump Settings")
-        
-        # Description
-        desc_label = QLabel("Configure water pump operation parameters")
-        desc_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        desc_label.setStyleSheet("font-size: 14px;")
-        self.body.addWidget(desc_label)
-        self.body.addSpacing(25)
-        
-        # Container for all sliders with fixed width
-        sliders_container = QWidget()
-        sliders_container.setFixedWidth(650)
-        sliders_layout = QVBoxLayout(sliders_container)
-        sliders_layout.setSpacing(25)
-        
-        # Pump Duration Slider
-        duration_layout = QHBoxLayout()
-        duration_layout.setSpacing(15)
-        
-        duration_label = QLabel("Run Duration (seconds):")
-        duration_label.setStyleSheet("font-size: 14px; font-weight: 600;")
-        duration_label.setFixedWidth(230)
-        
-        self.duration_slider = QSlider(Qt.Orientation.Horizontal)
-        self.duration_slider.setMinimum(1)
-        self.duration_slider.setMaximum(300)  # Max 5 minutes
-        self.duration_slider.setValue(30)
-        self.duration_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
-        self.duration_slider.setTickInterval(30)
-        
-        self.duration_value_label = QLabel("30")
-        self.duration_value_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        self.duration_value_label.setFixedWidth(30)
-        self.duration_value_label.setAlignment(Qt.AlignmentFlag.AlignRight)
-        
-        duration_layout.addWidget(duration_label)
-        duration_layout.addWidget(self.duration_slider)
-        duration_layout.addWidget(self.duration_value_label)
-        
-        sliders_layout.addLayout(duration_layout)
-        
-        # Run Frequency Slider
-        frequency_layout = QHBoxLayout()
-        frequency_layout.setSpacing(15)
-        
-        frequency_label = QLabel("Run Frequency (times/day):")
-        frequency_label.setStyleSheet("font-size: 14px; font-weight: 600;")
-        frequency_label.setFixedWidth(230)
-        
-        self.frequency_slider = QSlider(Qt.Orientation.Horizontal)
-        self.frequency_slider.setMinimum(1)
-        self.frequency_slider.setMaximum(24)
-        self.frequency_slider.setValue(4)
-        self.frequency_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
-        self.frequency_slider.setTickInterval(2)
-        
-        self.frequency_value_label = QLabel("4")
-        self.frequency_value_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        self.frequency_value_label.setFixedWidth(30)
-        self.frequency_value_label.setAlignment(Qt.AlignmentFlag.AlignRight)
-        
-        frequency_layout.addWidget(frequency_label)
-        frequency_layout.addWidget(self.frequency_slider)
-        frequency_layout.addWidget(self.frequency_value_label)
-        
-        sliders_layout.addLayout(frequency_layout)
-        
-        # Interval Slider
-        interval_layout = QHBoxLayout()
-        interval_layout.setSpacing(15)
-        
-        interval_label = QLabel("Interval (hours):")
-        interval_label.setStyleSheet("font-size: 14px; font-weight: 600;")
-        interval_label.setFixedWidth(230)
-        
-        self.interval_slider = QSlider(Qt.Orientation.Horizontal)
-        self.interval_slider.setMinimum(1)
-        self.interval_slider.setMaximum(24)
-        self.interval_slider.setValue(6)  # Default 6 hours
-        self.interval_slider.setTickPosition(QSlider.TickPosition.TicksBelow)
-        self.interval_slider.setTickInterval(2)
-        
-        self.interval_value_label = QLabel("6")
-        self.interval_value_label.setStyleSheet("font-size: 14px; font-weight: bold;")
-        self.interval_value_label.setFixedWidth(30)
-        self.interval_value_label.setAlignment(Qt.AlignmentFlag.AlignRight)
-        
-        interval_layout.addWidget(interval_label)
-        interval_layout.addWidget(self.interval_slider)
-        interval_layout.addWidget(self.interval_value_label)
-        
-        sliders_layout.addLayout(interval_layout)
-        
-        self.body.addWidget(sliders_container, alignment=Qt.AlignmentFlag.AlignHCenter)
-        self.body.addSpacing(20)
-        
-        # Summary Information
-        self.summary_label = QLabel()
-        self.summary_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        self.summary_label.setStyleSheet("font-size: 13px; font-style: italic; color: #666;")
-        self.summary_label.setWordWrap(True)
-        self.update_summary()
-        self.body.addWidget(self.summary_label)
-        self.body.addSpacing(20)
-        
-        # Connect value changes
-        self.duration_slider.valueChanged.connect(self.update_duration_label)
-        self.frequency_slider.valueChanged.connect(self.update_frequency_label)
-        self.interval_slider.valueChanged.connect(self.update_interval_label)
-        
-        self.duration_slider.valueChanged.connect(self.update_summary)
-        self.frequency_slider.valueChanged.connect(self.update_summary)
-        self.interval_slider.valueChanged.connect(self.update_summary)
-        
-        # Save button
-        save_btn = QPushButton("Save to Settings")
-        style_button(save_btn)
-        save_btn.setFixedWidth(250)
-        save_btn.setMinimumHeight(45)
-        save_btn.setStyleSheet("font-weight: bold; background-color: #4CAF50; color: white; border-radius: 12px;")
-        save_btn.clicked.connect(self.save_settings)
-        self.body.addWidget(save_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
+        """Save the project schedule"""
+        if self.start_date.date().daysTo(self.end_date.date()) < 0:
+            return  # update_duration already shows why
+        self.settings.update({
+            "schedule.start_day": self.start_date.date().toJulianDay() - UNIX_EPOCH_JULIAN_DAY,
+            "schedule.end_day": self.end_date.date().toJulianDay() - UNIX_EPOCH_JULIAN_DAY,
+        })
+        self.compile_schedule()
     
-    def update_duration_label(self, value):
-        self.duration_value_label.setText(str(value))
+    @traced
+    def compile_schedule(self):
+        """Expand the saved settings into the device timeline, check it for conflicts and write its table"""
+        self.update_usage()
+        timeline = schedule_compiler.compile_schedule(self.settings)
+        if timeline is None:
+            self.timeline_label.setText("")
+            return
+        count, conflicts = schedule_compiler.find_conflicts(timeline, limit=3)
+        table = schedule_compiler.to_table(timeline)
+        schedule_compiler.save_table(table)
+        text = f"{len(timeline)} runs  |  {len(table) / 1024:.1f} KiB schedule table"
+        if count:
+            text += f"\n⚠️ {count} conflicts, e.g."
+            for conflict in conflicts:
+                when = QDateTime.fromSecsSinceEpoch(conflict.start, Qt.TimeSpec.UTC).toString("MMM dd HH:mm")
+                text += f"\n{conflict.device} at {when} overlaps {conflict.other}: {conflict.reason}"
+        self.timeline_label.setText(text)
+        set_warning(self.timeline_label, count > 0)
     
-    def update_frequency_label(self, value):
-        self.frequency_value_label.setText(str(value))
+    @traced
+    def update_usage(self):
+        """Predict the project's water and energy use, and chart the chosen sweep"""
+        project = simulator.simulate(self.settings)
+        if project is None:
+            self.usage_label.setText("Save the schedule to predict its water and energy use")
+        else:
+            days, usage = project
+            self.usage_label.setText(
+                f"💧 {usage.water_l.sum():,.1f} L water  |  ⚙️ {usage.pump_s.sum() / 3600:,.1f} h pumping  |  "
+                f"💡 {usage.led_s.sum() / 3600:,.0f} h LED  |  ⚡ {usage.energy_wh.sum() / 1000:,.2f} kWh "
+                f"over {len(days)} days")
+        x_key, y_key, figure = simulator.SWEEPS[self.sweep_combo.currentText()]
+        grid, usage = simulator.sweep(self.settings, {key: simulator.full_range(key) for key in (x_key, y_key)})
+        current = (self.settings[x_key], self.settings[y_key])
+        labels = [settings_model.SCHEMA[settings_model.FIELD_IDS[key]].label.rstrip(":") for key in (x_key, y_key)]
+        self.usage_chart.show_usage(project, (x_key, y_key, figure, grid, usage, current), labels)
     
-    def update_interval_label(self, value):
-        self.interval_value_label.setText(str(value))
+    def saved_date(self, key, default):
+        day = self.settings[key]
+        return default if day is None else QDate.fromJulianDay(day + UNIX_EPOCH_JULIAN_DAY)
+
+
+class WaterPumpSettingsPage(SliderSettingsPage):
+    GROUP = "pump"
+    TITLE = "Water Pump Settings"
+    DESCRIPTION = "Configure water pump operation parameters"
     
-    def update_summary(self):
-        """Update the summary information display"""
-        duration = self.duration_slider.value()
-        frequency = self.frequency_slider.value()
-        interval = self.interval_slider.value()
-        
-        # Calculate total daily runtime
-        total_runtime = duration * frequency
+    def summary(self, values):
+        # Daily runtime, counting runs that overlap once
+        total_runtime = int(simulator.daily_on_seconds(simulator.FIRST_RUN["pump"], values["duration_s"],
+                                                       values["frequency"], values["interval_h"]))
         hours = total_runtime // 3600
         minutes = (total_runtime % 3600) // 60
         seconds = total_runtime % 60
@@ -721,59 +1154,377 @@ class WaterPumpSettingsPage(BasePage):
             runtime_str += f"{minutes}m "
         runtime_str += f"{seconds}s"
         
-        summary_text = f"💧 Total runtime: {runtime_str.strip()}  |  ⏱️ Interval: {interval} hours"
-        self.summary_label.setText(summary_text)
+        water = total_runtime * simulator.PUMP_FLOW_ML_S / 1000
+        return (f"💧 Total runtime: {runtime_str.strip()} ({water:.2f} L/day)  |  "
+                f"⏱️ Interval: {values['interval_h']} hours")
     
-    def save_settings(self):
-        """Save the water pump settings"""
-        duration = self.duration_slider.value()
-        frequency = self.frequency_slider.value()
-        interval = self.interval_slider.value()
-        print(f"Water Pump: Duration={duration}s, Frequency={frequency}x/day, Interval={interval}h")
+    def describe(self, values):
+        return (f"Water Pump: Duration={values['duration_s']}s, Frequency={values['frequency']}x/day, "
+                f"Interval={values['interval_h']}h")
 
 
 class SettingsComparisonPage(BasePage):
-    def __init__(self):
+    GROUP_TITLES = {"led": "LED", "pump": "Water pump", "camera": "Camera", "schedule": "Schedule"}
+
+    def __init__(self, history):
         super().__init__("Settings Comparison")
+        self.history = history
         
         # Description
-        desc_label = QLabel(
-            "This page will allow you to compare settings used on different days.\n"
-            "Track and analyze changes in your NanoLab configuration over time."
-        )
+        desc_label = QLabel("Compare the settings your NanoLab was running at the end of two days")
         desc_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        desc_label.setStyleSheet("font-size: 15px; line-height: 1.6;")
+        desc_label.setObjectName("descriptionLabel")
         desc_label.setWordWrap(True)
         self.body.addWidget(desc_label)
-        self.body.addSpacing(20)
         
-        # Placeholder for future functionality
-        placeholder_label = QLabel("⚙️ Coming Soon ⚙️")
-        placeholder_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        placeholder_label.setStyleSheet("font-size: 24px; font-weight: 600; color: #888;")
-        self.body.addWidget(placeholder_label)
-        self.body.addSpacing(10)
+        # The two days to compare
+        date_row = QHBoxLayout()
+        date_row.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        date_row.setSpacing(15)
+        self.day_a = QDateEdit()
+        self.day_a.setDate(QDate.currentDate().addDays(-1))
+        self.day_b = QDateEdit()
+        self.day_b.setDate(QDate.currentDate())
+        for label, date_edit in (("Day A:", self.day_a), ("Day B:", self.day_b)):
+            day_label = QLabel(label)
+            day_label.setObjectName("fieldLabel")
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("MMMM dd, yyyy")
+            date_edit.setMinimumHeight(40)
+            date_edit.setMinimumWidth(220)
+            date_edit.dateChanged.connect(self.update_comparison)
+            date_row.addWidget(day_label)
+            date_row.addWidget(date_edit)
+        self.body.addLayout(date_row)
+        
+        # One row per setting; rows that differ are highlighted
+        grid = QGridLayout()
+        grid.setHorizontalSpacing(40)
+        grid.setVerticalSpacing(6)
+        for col, text in enumerate(("Setting", "Day A", "Day B")):
+            header = QLabel(text)
+            header.setObjectName("fieldLabel")
+            grid.addWidget(header, 0, col)
+        self.rows = {}
+        for row, field in enumerate(settings_model.SCHEMA, start=1):
+            group, name = field.key.split(".", 1)
+            name = field.label.rstrip(":") if field.label else name.replace("_", " ").capitalize()
+            cells = [QLabel(f"{self.GROUP_TITLES[group]}: {name}"), QLabel("—"), QLabel("—")]
+            for col, cell in enumerate(cells):
+                grid.addWidget(cell, row, col)
+            self.rows[field.key] = cells
+        self.body.addLayout(grid)
         
-        feature_list = QLabel(
-            "Future Features:\n\n"
-            "• Select specific dates to compare\n"
-            "• View side-by-side setting comparisons\n"
-            "• Track LED color changes\n"
-            "• Monitor pump and sensor settings\n"
-            "• Export comparison reports"
+        self.summary_label = QLabel()
+        self.summary_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.summary_label.setObjectName("statusLabel")
+        self.body.addWidget(self.summary_label)
+        self.update_comparison()
+    
+    def showEvent(self, event):
+        self.update_comparison()  # revisions may have been recorded while hidden
+        super().showEvent(event)
+    
+    @staticmethod
+    def format_value(key, value):
+        if value is None:
+            return "—"
+        if key.startswith("schedule."):
+            return QDate.fromJulianDay(value + UNIX_EPOCH_JULIAN_DAY).toString("yyyy-MM-dd")
+        return str(value)
+    
+    def update_comparison(self):
+        """Look up both days in the history index and show them side by side"""
+        if not len(self.history):
+            self.summary_label.setText("No settings history yet - it starts with your first send to a NanoLab")
+            return
+        t_a = self.day_a.date().endOfDay().toSecsSinceEpoch()
+        t_b = self.day_b.date().endOfDay().toSecsSinceEpoch()
+        before = self.history.at(t_a) or {}
+        after = self.history.at(t_b) or {}
+        changed = {change.key for change in self.history.diff(t_a, t_b)}
+        for key, (name_cell, a_cell, b_cell) in self.rows.items():
+            a_cell.setText(self.format_value(key, before.get(key)))
+            b_cell.setText(self.format_value(key, after.get(key)))
+            for cell in (name_cell, a_cell, b_cell):
+                set_style_property(cell, "changed", key in changed)
+        first = QDateTime.fromSecsSinceEpoch(int(self.history.times[0])).toString("yyyy-MM-dd")
+        revisions = self.history.count_between(min(t_a, t_b), max(t_a, t_b))
+        self.summary_label.setText(
+            f"🔍 {len(changed)} of {len(self.rows)} settings differ  |  {revisions} revisions between these days  |  "
+            f"{len(self.history)} revisions since {first}"
         )
-        feature_list.setAlignment(Qt.AlignmentFlag.AlignHCenter)
-        feature_list.setStyleSheet("font-size: 14px; line-height: 1.8;")
-        self.body.addWidget(feature_list)
+
+
+class FleetPage(BasePage):
+    """Push the saved settings to every NanoLab in the fleet at once"""
+    result_ready = pyqtSignal(object)  # PushResult; emitted on a link worker thread
+
+    def __init__(self, pool, settings):
+        super().__init__("NanoLab Fleet")
+        self.pool = pool
+        self.settings = settings
+        self.path = fleet.default_path()
+        self.urls = fleet.load_urls(self.path)
+        self.results = []
+        self.pushing = set()  # URLs the push in flight has not heard back from
+        self.push_started = None
+        self.result_ready.connect(self.show_result)  # queued onto the GUI thread
+
+        desc_label = QLabel("Send your saved settings to every NanoLab at once, over USB or the network")
+        desc_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        desc_label.setWordWrap(True)
+        self.body.addWidget(desc_label)
+
+        add_row = QHBoxLayout()
+        add_row.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        add_row.setSpacing(15)
+        self.url_edit = QLineEdit()
+        self.url_edit.setPlaceholderText("/dev/ttyUSB1 or socket://192.168.1.20:5000")
+        self.url_edit.setMinimumWidth(380)
+        self.url_edit.setMinimumHeight(40)
+        self.url_edit.returnPressed.connect(self.add_device)
+        add_btn = QPushButton("Add")
+        add_btn.clicked.connect(self.add_device)
+        remove_btn = QPushButton("Remove Selected")
+        remove_btn.clicked.connect(self.remove_selected)
+        add_row.addWidget(self.url_edit)
+        for btn in (add_btn, remove_btn):
+            style_button(btn)
+            add_row.addWidget(btn)
+        self.body.addLayout(add_row)
+
+        self.table = QTableWidget(0, 3)
+        self.table.setHorizontalHeaderLabels(["Device", "Status", "Ack latency"])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().hide()
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setMinimumSize(700, 300)
+        for url in self.urls:
+            self.add_row(url)
+        self.body.addWidget(self.table)
+
+        self.push_btn = QPushButton("Push Settings to Fleet")
+        style_button(self.push_btn)
+        self.push_btn.setFixedWidth(300)
+        self.push_btn.setObjectName("saveButton")
+        self.push_btn.clicked.connect(self.push_settings)
+        self.body.addWidget(self.push_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
+
+        self.summary_label = QLabel(f"{len(self.urls)} NanoLabs in the fleet")
+        self.summary_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.summary_label.setObjectName("statusLabel")
+        self.body.addWidget(self.summary_label)
+
+    def add_row(self, url):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        for col, text in enumerate((url, "—", "—")):
+            self.table.setItem(row, col, QTableWidgetItem(text))
+
+    def add_device(self):
+        url = self.url_edit.text().strip()
+        if not url or url in self.urls:
+            return
+        self.urls.append(url)
+        self.add_row(url)
+        fleet.save_urls(self.path, self.urls)
+        self.url_edit.clear()
+        self.summary_label.setText(f"{len(self.urls)} NanoLabs in the fleet")
+
+    def remove_selected(self):
+        for row in sorted({index.row() for index in self.table.selectedIndexes()}, reverse=True):
+            self.pool.remove(self.urls.pop(row))
+            self.table.removeRow(row)
+        fleet.save_urls(self.path, self.urls)
+        self.summary_label.setText(f"{len(self.urls)} NanoLabs in the fleet")
+
+    def push_settings(self):
+        """Queue the full configuration on every device; results fill in as each one answers"""
+        if not self.urls:
+            self.summary_label.setText("Add a NanoLab first")
+            return
+        self.results = []
+        self.pushing = set(self.urls)  # devices added or removed meanwhile do not change what this push waits for
+        self.push_started = time.perf_counter()
+        self.push_btn.setEnabled(False)
+        for row in range(self.table.rowCount()):
+            for col, text in ((1, "Sending…"), (2, "—")):
+                item = self.table.item(row, col)
+                item.setText(text)
+                item.setData(Qt.ItemDataRole.ForegroundRole, None)
+        for future in self.pool.push(self.settings.full_message(), self.urls).values():
+            future.add_done_callback(lambda done: self.result_ready.emit(done.result()))
+
+    def show_result(self, result):
+        if result.url not in self.pushing:
+            return
+        self.pushing.remove(result.url)
+        self.results.append(result)
+        if result.url in self.urls:
+            row = self.urls.index(result.url)
+            status = self.table.item(row, 1)
+            status.setText(result.status if not result.detail else f"{result.status}: {result.detail}")
+            if result.status != "ok":
+                status.setForeground(QColor(theme.WARNING_RED))
+            if result.latency_ms is not None:
+                self.table.item(row, 2).setText(f"{result.latency_ms:.0f} ms")
+        if not self.pushing:
+            self.push_btn.setEnabled(True)
+            self.summary_label.setText(fleet.summarize(self.results, time.perf_counter() - self.push_started))
+
+
+THUMBNAIL_SIZE = QSize(160, 120)
+
+def decode_thumbnail(path, size=THUMBNAIL_SIZE):
+    """Read ``path`` straight at thumbnail size; safe on any thread (QImage, not QPixmap)
+
+    JPEGs are decoded at a reduced scale by the codec itself, so a capture
+    never exists in memory at full resolution.
+    """
+    reader = QImageReader(str(path))
+    reader.setAutoTransform(True)
+    full = reader.size()
+    if full.isValid():
+        reader.setScaledSize(full.scaled(size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    return None if image.isNull() else image
+
+
+class CaptureModel(QAbstractListModel):
+    """Camera captures for a QListView; thumbnails are decoded only for the rows the view paints"""
+    thumbnail_ready = pyqtSignal(object, object)  # path, QImage or None; emitted on a decode worker
+
+    def __init__(self, captures, budget=camera.THUMBNAIL_BUDGET):
+        super().__init__()
+        self.captures = captures
+        self.rows = {}
+        self.failed = set()
+        self.cache = camera.ByteLRU(budget)
+        self.pipeline = camera.ThumbnailPipeline(decode_thumbnail, self.thumbnail_ready.emit)
+        self.thumbnail_ready.connect(self.store_thumbnail)  # queued onto the GUI thread
+        self.placeholder = QPixmap(THUMBNAIL_SIZE)
+        self.placeholder.fill(QColor(theme.GREEN))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.captures.paths)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        path = self.captures.paths[index.row()]
+        if role == Qt.ItemDataRole.DecorationRole:
+            pixmap = self.cache.get(path)
+            if pixmap is None:
+                if path not in self.failed:
+                    self.pipeline.request(path)
+                return self.placeholder
+            return pixmap
+        if role == Qt.ItemDataRole.DisplayRole:
+            return path.stem[:15]  # yyyymmdd-hhmmss
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return str(path)
+        return None
+
+    def add_new(self):
+        """Append captures written since the last call"""
+        first = len(self.captures.paths)
+        new = self.captures.scan()
+        if new:
+            self.beginInsertRows(QModelIndex(), first, first + len(new) - 1)
+            for row, path in enumerate(new, start=first):
+                self.rows[path] = row
+            self.endInsertRows()
+        return len(new)
+
+    def store_thumbnail(self, path, image):
+        if image is None:
+            self.failed.add(path)
+            return
+        self.cache.put(path, QPixmap.fromImage(image), image.sizeInBytes())
+        row = self.rows.get(path)
+        if row is not None:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+
+class CaptureGalleryPage(BasePage):
+    SCAN_MS = 1000
+
+    def __init__(self, captures):
+        super().__init__("Camera Captures")
+        self.captures = captures
+
+        desc_label = QLabel(f"Pictures from your NanoLab's camera, saved in {captures.root}")
+        desc_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        desc_label.setWordWrap(True)
+        self.body.addWidget(desc_label)
+
+        self.model = CaptureModel(captures)
+        self.view = QListView()
+        self.view.setViewMode(QListView.ViewMode.IconMode)
+        self.view.setIconSize(THUMBNAIL_SIZE)
+        self.view.setGridSize(THUMBNAIL_SIZE + QSize(24, 36))
+        self.view.setUniformItemSizes(True)  # no per-item size queries, so thousands lay out instantly
+        self.view.setLayoutMode(QListView.LayoutMode.Batched)
+        self.view.setResizeMode(QListView.ResizeMode.Adjust)
+        self.view.setMovement(QListView.Movement.Static)
+        self.view.setMinimumSize(700, 380)
+        self.view.setModel(self.model)
+        self.body.addWidget(self.view)
+
+        self.summary_label = QLabel()
+        self.summary_label.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+        self.summary_label.setObjectName("statusLabel")
+        self.body.addWidget(self.summary_label)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.SCAN_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        self.model.pipeline.cancel_pending()
+        super().hideEvent(event)
+
+    @traced
+    def refresh(self):
+        """Show new captures, following the newest if the view is already at the end"""
+        scroll = self.view.verticalScrollBar()
+        at_end = scroll.value() == scroll.maximum()
+        if self.model.add_new() and at_end:
+            self.view.scrollToBottom()
+        count = len(self.captures.paths)
+        if not count:
+            self.summary_label.setText("No captures yet")
+            return
+        summary = f"📷 {count:,} captures  |  {self.model.cache.summary()}"
+        if self.captures.assembler.dropped:
+            summary += f"  |  ⚠️ {self.captures.assembler.dropped} incomplete"
+        self.summary_label.setText(summary)
+
+    def shutdown(self):
+        """Stop the decode workers"""
+        self.timer.stop()
+        self.model.pipeline.shutdown()
 
 
 class MainWindow(QMainWindow):
+    PREWARM_PAGES = True  # build unvisited pages while the UI is idle after startup
+    # Their matplotlib import and first draw would stall an idle tick for half a second; built on first visit
+    NOT_PREWARMED = ("data", "schedule")
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Auxora Nanolabs Control Panel")
         self.setMinimumSize(900, 650)
 
         self.stack = QStackedWidget()
+        self.stack.currentChanged.connect(self.theme_page)
         self.setCentralWidget(self.stack)
 
         self.history = []
@@ -781,30 +1532,56 @@ class MainWindow(QMainWindow):
 
         self.current_theme = "light"
 
-        self.pages = {
-            "welcome": WelcomePage(self.switch_to),
-            "settings_menu": SettingsMenuPage(self.switch_to),
-            "data": SimplePage("Data Results"),
-            "water": WaterPumpSettingsPage(),
-            "led": LEDSettingsPage(),
-            "fan": SimplePage("Fan Settings"),
-            "camera": CameraSettingsPage(),
-            "sensor": SimplePage("Atmospheric Sensor"),
-            "about": AboutPage(),
-            "storage": StoragePage(),
-            "schedule": SchedulePage(),
-            "settings_comparison": SettingsComparisonPage(),
+        # Settings saved on each page; "Send to your NanoLab" sends what the device has not acknowledged
+        self.settings = settings_model.DeviceSettings(settings_model.default_path())
+        self.settings_history = settings_history.SettingsHistory(settings_history.default_path())
+        self.store = ColumnStore(default_root())
+        self.monitor = sensor_monitor.SensorMonitor()
+        self.telemetry = Telemetry(store=self.store, monitor=self.monitor)
+        self.captures = camera.CaptureStore(camera.captures_dir())
+        self.device = DeviceController(self.settings, self.settings_history, self.telemetry, self.captures,
+                                       record=record_dir())
+        self.bridge = DeviceLinkBridge(self.device)
+        self.bridge.state_changed.connect(self.on_link_state)
+        self.bridge.message_received.connect(self.on_device_message)
+        self.fleet = fleet.Fleet()  # links open on the first push
+
+        # Pages are built on first visit, or one per idle tick once the window is up
+        self.page_factories = {
+            "welcome": lambda: WelcomePage(self.switch_to),
+            "settings_menu": lambda: SettingsMenuPage(self.switch_to, self.send_to_nanolab),
+            "data": lambda: DataResultsPage(self.telemetry, self.device.sd, self.ensure_link),
+            "water": lambda: WaterPumpSettingsPage(self.settings, self.device.preview, self.ensure_link),
+            "led": lambda: LEDSettingsPage(self.settings, self.device.preview, self.ensure_link),
+            "fan": lambda: SimplePage("Fan Settings"),
+            "camera": lambda: CameraSettingsPage(self.settings, self.device.preview, self.ensure_link),
+            "sensor": lambda: SensorPage(self.monitor, self.ensure_link),
+            "about": lambda: AboutPage(),
+            "storage": lambda: StoragePage(self.store),
+            "schedule": lambda: SchedulePage(self.settings),
+            "settings_comparison": lambda: SettingsComparisonPage(self.settings_history),
+            "camera_gallery": lambda: CaptureGalleryPage(self.captures),
+            "fleet": lambda: FleetPage(self.fleet, self.settings),
         }
+        self.pages = {}
 
-        for p in self.pages.values():
-            self.stack.addWidget(p)
+        self.first_frame_ms = None
+        self.prewarm_timer = QTimer(self)
+        self.prewarm_timer.setInterval(0)  # fires only when the event queue is empty
+        self.prewarm_timer.timeout.connect(self.prewarm_next_page)
+
+        # Runs only while profiling; a late beat means the event loop was stalled
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setTimerType(Qt.TimerType.PreciseTimer)
+        self.heartbeat.setInterval(HEARTBEAT_MS)
+        self.heartbeat.timeout.connect(PROFILER.beat)
 
         self.toolbar_setup()
         self.apply_theme()
         self.switch_to("welcome", record=False)
 
     def toolbar_setup(self):
-        toolbar = QToolBar()
+        toolbar = self.toolbar = QToolBar()
         back_btn = QPushButton("← Back")
         forward_btn = QPushButton("→ Forward")
         review_data_btn = QPushButton("Review Data")
@@ -813,8 +1590,11 @@ class MainWindow(QMainWindow):
         about_btn = QPushButton("About")
         storage_btn = QPushButton("Storage")
         theme_btn = QPushButton("Toggle Theme")
+        profile_btn = self.profile_btn = QPushButton("Profile")
+        profile_btn.setCheckable(True)
+        profile_btn.setToolTip("Record slot timings and event-loop stalls to a Chrome trace")
 
-        for btn in (back_btn, forward_btn, review_data_btn, adjust_settings_btn, schedule_btn, about_btn, storage_btn, theme_btn):
+        for btn in (back_btn, forward_btn, review_data_btn, adjust_settings_btn, schedule_btn, about_btn, storage_btn, theme_btn, profile_btn):
             style_button(btn)
 
         back_btn.clicked.connect(self.go_back)
@@ -825,6 +1605,7 @@ class MainWindow(QMainWindow):
         about_btn.clicked.connect(lambda: self.switch_to("about"))
         storage_btn.clicked.connect(lambda: self.switch_to("storage"))
         theme_btn.clicked.connect(self.toggle_theme)
+        profile_btn.toggled.connect(self.toggle_profiling)
 
         toolbar.addWidget(back_btn)
         toolbar.addWidget(forward_btn)
@@ -834,16 +1615,52 @@ class MainWindow(QMainWindow):
         toolbar.addWidget(about_btn)
         toolbar.addWidget(storage_btn)
         toolbar.addWidget(theme_btn)
+        toolbar.addWidget(profile_btn)
         self.addToolBar(toolbar)
 
+    @traced
     def switch_to(self, name, record=True):
         if record:
             current_idx = self.stack.currentIndex()
             if not self.history or self.history[-1] != current_idx:
                 self.history.append(current_idx)
             self.forward_history.clear()
-        self.stack.setCurrentWidget(self.pages[name])
+        self.stack.setCurrentWidget(self.page(name))
+
+    @traced
+    def page(self, name):
+        """Return the page called ``name``, building it on first use"""
+        page = self.pages.get(name)
+        if page is None:
+            page = self.pages[name] = self.page_factories[name]()
+            self.theme_page(page)
+            self.stack.addWidget(page)
+        return page
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.first_frame_ms is None:
+            # Queued behind the first paint
+            QTimer.singleShot(0, self.on_first_frame)
 
+    def on_first_frame(self):
+        if self.first_frame_ms is not None:
+            return
+        self.first_frame_ms = (time.perf_counter() - STARTED) * 1000
+        self.statusBar().showMessage(f"First frame after {self.first_frame_ms:.0f} ms", 5000)
+        if self.PREWARM_PAGES:
+            self.prewarm_timer.start()
+
+    @traced
+    def prewarm_next_page(self):
+        """Build one page that has not been visited yet, so later switches are instant"""
+        for name in self.page_factories:
+            if name not in self.pages and name not in self.NOT_PREWARMED:
+                self.page(name)
+                return
+        self.prewarm_timer.stop()
+
+    @traced
     def go_back(self):
         if not self.history:
             return
@@ -851,6 +1668,7 @@ class MainWindow(QMainWindow):
         self.forward_history.append(self.stack.currentIndex())
         self.stack.setCurrentIndex(idx)
 
+    @traced
     def go_forward(self):
         if not self.forward_history:
             return
@@ -858,394 +1676,118 @@ class MainWindow(QMainWindow):
         self.history.append(self.stack.currentIndex())
         self.stack.setCurrentIndex(idx)
 
+    def connect_device(self, method, report=None):
+        """Open the device link; returns the port URL, or None after reporting why not.
+
+        ``report(text)`` shows the reason, on the settings menu by default.
+        """
+        if method == "Wireless":
+            from tcp_link import wireless_url  # asyncio is only imported once it is needed
+            url = wireless_url()
+        else:
+            url = find_port()
+            if url is None:
+                (report or self.page("settings_menu").set_status)("No NanoLab found on any USB port")
+                return None
+        self.device.connect_to(url)
+        return url
+
+    def ensure_link(self, report=None):
+        """Open the USB link unless a link (USB or wireless) is already open; returns False if there is none."""
+        if self.device.link is not None:
+            return True
+        return self.connect_device("USB Port", report) is not None
+
+    @traced
+    def send_to_nanolab(self, method):
+        """Queue the saved settings the device has not acknowledged yet; returns immediately."""
+        menu = self.page("settings_menu")
+        url = self.connect_device(method)
+        if url is None:
+            return
+        seq, message = self.device.sync()
+        if message is None:
+            menu.set_status("Nothing to send - your NanoLab already has every saved setting")
+            return
+        self.device.link.ping()
+        menu.set_status(f"Queued {len(message.ids)} changed settings "
+                        f"({len(wire_protocol.encode(message))} bytes) for {url}")
+        QTimer.singleShot(500, self.report_link_stats)
+
+    @traced
+    def on_device_message(self, seq, message):
+        if type(message) is wire_protocol.Ack:
+            if self.device.acknowledge(message) and message.status == command_scheduler.TIMED_OUT:
+                self.page("settings_menu").set_status("⚠️ Your NanoLab did not answer - send again to retry")
+
+    def report_link_stats(self):
+        if self.device.link is not None and self.device.link.state == "open":
+            self.page("settings_menu").set_status(
+                f"Sent  |  {self.device.link.stats.summary()}  |  {self.device.commands.summary()}")
+
+    @traced
+    def on_link_state(self, state, detail):
+        menu = self.page("settings_menu")
+        if state == "open":
+            menu.set_status(f"Connected to {detail}")
+        elif state == "error":
+            menu.set_status(f"⚠️ Connection error: {detail}")
+        elif state == "reconnecting":
+            menu.set_status(f"⚠️ Reconnecting: {detail}")
+        elif self.device.link is not None:
+            reason = f" ({detail})" if detail else ""
+            menu.set_status(f"Disconnected{reason}  |  {self.device.link.stats.summary()}")
+
+    def toggle_profiling(self, on):
+        """Start recording a trace, or stop and write it to ``traces/`` in the data directory"""
+        if on:
+            PROFILER.start()
+            self.heartbeat.start()
+            self.profile_btn.setText("■ Stop Profile")
+            return
+        self.heartbeat.stop()
+        PROFILER.stop()
+        self.profile_btn.setText("Profile")
+        stamp = QDateTime.currentDateTime().toString("yyyyMMdd-HHmmss")
+        path = PROFILER.export(data_dir() / "traces" / f"trace-{stamp}.json")
+        self.statusBar().showMessage(f"Trace written to {path}  |  {PROFILER.summary()}", 10000)
+
+    def closeEvent(self, event):
+        if self.profile_btn.isChecked():
+            self.profile_btn.setChecked(False)  # keep the trace of the session being closed
+        self.device.close()
+        self.fleet.close()
+        for name in ("storage", "camera_gallery"):
+            if name in self.pages:
+                self.pages[name].shutdown()
+        self.store.close()
+        super().closeEvent(event)
+
+    @traced
     def toggle_theme(self):
         self.current_theme = "dark" if self.current_theme == "light" else "light"
         self.apply_theme()
 
+    @traced
     def apply_theme(self):
-        if self.current_theme == "light":
-            self.setStyleSheet(f"""
-                QMainWindow {{
-                    background-color: #ffffff;
-                }}
-                QWidget {{
-                    background-color: #ffffff;
-                    color: {TEXT_LIGHT};
-                    font-family: 'Segoe UI', 'SF Pro Display', 'Helvetica Neue', Arial, sans-serif;
-                }}
-                QStackedWidget, QStackedWidget > QWidget {{
-                    background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 #ffffff, stop:1 #f5f5f5);
-                }}
-                QPushButton {{
-                    background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 {GREEN}, stop:1 #86b786);
-                    color: black;
-                    border: none;
-                    border-radius: 14px;
-                    padding: 14px 24px;
-                    font-weight: 600;
-                    font-size: 15px;
-                    letter-spacing: 0.3px;
-                }}
-                QPushButton:hover {{
-                    background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 #2f4f2d, stop:1 #4b6a44);
-                    color: white;
-                    transform: translateY(-2px);
-                }}
-                QPushButton:pressed {{
-                    background-color: #2f4f2d;
-                    transform: translateY(0px);
-                }}
-                QLabel#titleLabel {{
-                    font-size: 36px;
-                    font-weight: 700;
-                    margin-bottom: 20px;
-                    color: #1a1a1a;
-                    letter-spacing: -0.5px;
-                }}
-                QLabel {{
-                    font-size: 14px;
-                    color: #333333;
-                }}
-                QLineEdit {{
-                    background-color: white;
-                    border: 2px solid #e0e0e0;
-                    border-radius: 8px;
-                    padding: 8px 12px;
-                    font-size: 14px;
-                    color: #333333;
-                }}
-                QLineEdit:focus {{
-                    border: 2px solid {GREEN};
-                }}
-                QToolBar {{
-                    background-color: #f8f8f8;
-                    border-bottom: 1px solid #e0e0e0;
-                    spacing: 10px;
-                    padding: 8px;
-                }}
-                QComboBox {{
-                    background-color: white;
-                    border: 2px solid #e0e0e0;
-                    border-radius: 8px;
-                    padding: 8px 12px;
-                    font-size: 14px;
-                    color: #333333;
-                }}
-                QComboBox:hover {{
-                    border: 2px solid {GREEN};
-                }}
-                QComboBox::drop-down {{
-                    border: none;
-                    width: 30px;
-                }}
-                QComboBox::down-arrow {{
-                    image: none;
-                    border-left: 5px solid transparent;
-                    border-right: 5px solid transparent;
-                    border-top: 6px solid #333333;
-                    margin-right: 8px;
-                }}
-                QComboBox QAbstractItemView {{
-                    background-color: white;
-                    border: 2px solid {GREEN};
-                    border-radius: 8px;
-                    selection-background-color: {GREEN};
-                    selection-color: black;
-                    padding: 5px;
-                }}
-                QDateEdit {{
-                    background-color: white;
-                    border: 2px solid #e0e0e0;
-                    border-radius: 8px;
-                    padding: 8px 12px;
-                    font-size: 15px;
-                    font-weight: 600;
-                    color: #333333;
-                }}
-                QDateEdit:hover {{
-                    border: 2px solid {GREEN};
-                }}
-                QDateEdit::drop-down {{
-                    subcontrol-origin: padding;
-                    subcontrol-position: center right;
-                    width: 30px;
-                    border: none;
-                }}
-                QDateEdit::down-arrow {{
-                    image: none;
-                    border-left: 5px solid transparent;
-                    border-right: 5px solid transparent;
-                    border-top: 6px solid #333333;
-                }}
-                QCalendarWidget {{
-                    background-color: white;
-                    border: 2px solid {GREEN};
-                    border-radius: 8px;
-                }}
-                QCalendarWidget QTableView {{
-                    background-color: white;
-                    selection-background-color: {GREEN};
-                    selection-color: black;
-                }}
-                QCalendarWidget QToolButton {{
-                    background-color: {GREEN};
-                    color: black;
-                    border-radius: 6px;
-                    padding: 5px;
-                }}
-                QCalendarWidget QToolButton:hover {{
-                    background-color: #2f4f2d;
-                    color: white;
-                }}
-                QSpinBox {{
-                    background-color: white;
-                    border: 2px solid #e0e0e0;
-                    border-radius: 8px;
-                    padding: 8px 12px;
-                    font-size: 15px;
-                    font-weight: 600;
-                    color: #333333;
-                }}
-                QSpinBox:hover {{
-                    border: 2px solid {GREEN};
-                }}
-                QSpinBox:focus {{
-                    border: 2px solid {GREEN};
-                }}
-                QSpinBox::up-button {{
-                    subcontrol-origin: border;
-                    subcontrol-position: top right;
-                    width: 25px;
-                    border-left: 1px solid #e0e0e0;
-                    border-bottom: 1px solid #e0e0e0;
-                    border-top-right-radius: 8px;
-                    background-color: #f5f5f5;
-                }}
-                QSpinBox::up-button:hover {{
-                    background-color: {GREEN};
-                }}
-                QSpinBox::down-button {{
-                    subcontrol-origin: border;
-                    subcontrol-position: bottom right;
-                    width: 25px;
-                    border-left: 1px solid #e0e0e0;
-                    border-bottom-right-radius: 8px;
-                    background-color: #f5f5f5;
-                }}
-                QSpinBox::down-button:hover {{
-                    background-color: {GREEN};
-                }}
-                QSpinBox::up-arrow {{
-                    image: none;
-                    border-left: 4px solid transparent;
-                    border-right: 4px solid transparent;
-                    border-bottom: 5px solid #333333;
-                    width: 0px;
-                    height: 0px;
-                }}
-                QSpinBox::down-arrow {{
-                    image: none;
-                    border-left: 4px solid transparent;
-                    border-right: 4px solid transparent;
-                    border-top: 5px solid #333333;
-                    width: 0px;
-                    height: 0px;
-                }}
-            """)
-        else:
-            self.setStyleSheet(f"""
-                QMainWindow {{
-                    background-color: #1a1a1a;
-                }}
-                QWidget {{
-                    background-color: #1a1a1a;
-                    color: {TEXT_DARK};
-                    font-family: 'Segoe UI', 'SF Pro Display', 'Helvetica Neue', Arial, sans-serif;
-                }}
-                QStackedWidget, QStackedWidget > QWidget {{
-                    background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 #1a1a1a, stop:1 #0d0d0d);
-                }}
-                QPushButton {{
-                    background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 #2f4f2d, stop:1 #4b6a44);
-                    color: white;
-                    border: none;
-                    border-radius: 14px;
-                    padding: 14px 24px;
-                    font-weight: 600;
-                    font-size: 15px;
-                    letter-spacing: 0.3px;
-                }}
-                QPushButton:hover {{
-                    background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 {GREEN}, stop:1 #86b786);
-                    color: black;
-                    transform: translateY(-2px);
-                }}
-                QPushButton:pressed {{
-                    background-color: {GREEN};
-                    transform: translateY(0px);
-                }}
-                QLabel#titleLabel {{
-                    font-size: 36px;
-                    font-weight: 700;
-                    margin-bottom: 20px;
-                    color: #ffffff;
-                    letter-spacing: -0.5px;
-                }}
-                QLabel {{
-                    font-size: 14px;
-                    color: #e0e0e0;
-                }}
-                QLineEdit {{
-                    background-color: #2a2a2a;
-                    border: 2px solid #404040;
-                    border-radius: 8px;
-                    padding: 8px 12px;
-                    font-size: 14px;
-                    color: #ffffff;
-                }}
-                QLineEdit:focus {{
-                    border: 2px solid {GREEN};
-                }}
-                QToolBar {{
-                    background-color: #252525;
-                    border-bottom: 1px solid #404040;
-                    spacing: 10px;
-                    padding: 8px;
-                }}
-                QComboBox {{
-                    background-color: #2a2a2a;
-                    border: 2px solid #404040;
-                    border-radius: 8px;
-                    padding: 8px 12px;
-                    font-size: 14px;
-                    color: #ffffff;
-                }}
-                QComboBox:hover {{
-                    border: 2px solid {GREEN};
-                }}
-                QComboBox::drop-down {{
-                    border: none;
-                    width: 30px;
-                }}
-                QComboBox::down-arrow {{
-                    image: none;
-                    border-left: 5px solid transparent;
-                    border-right: 5px solid transparent;
-                    border-top: 6px solid #ffffff;
-                    margin-right: 8px;
-                }}
-                QComboBox QAbstractItemView {{
-                    background-color: #2a2a2a;
-                    border: 2px solid {GREEN};
-                    border-radius: 8px;
-                    selection-background-color: {GREEN};
-                    selection-color: black;
-                    padding: 5px;
-                }}
-                QDateEdit {{
-                    background-color: #2a2a2a;
-                    border: 2px solid #404040;
-                    border-radius: 8px;
-                    padding: 8px 12px;
-                    font-size: 15px;
-                    font-weight: 600;
-                    color: #ffffff;
-                }}
-                QDateEdit:hover {{
-                    border: 2px solid {GREEN};
-                }}
-                QDateEdit::drop-down {{
-                    subcontrol-origin: padding;
-                    subcontrol-position: center right;
-                    width: 30px;
-                    border: none;
-                }}
-                QDateEdit::down-arrow {{
-                    image: none;
-                    border-left: 5px solid transparent;
-                    border-right: 5px solid transparent;
-                    border-top: 6px solid #ffffff;
-                }}
-                QCalendarWidget {{
-                    background-color: #2a2a2a;
-                    border: 2px solid {GREEN};
-                    border-radius: 8px;
-                }}
-                QCalendarWidget QTableView {{
-                    background-color: #2a2a2a;
-                    color: #ffffff;
-                    selection-background-color: {GREEN};
-                    selection-color: black;
-                }}
-                QCalendarWidget QToolButton {{
-                    background-color: #2f4f2d;
-                    color: white;
-                    border-radius: 6px;
-                    padding: 5px;
-                }}
-                QCalendarWidget QToolButton:hover {{
-                    background-color: {GREEN};
-                    color: black;
-                }}
-                QCalendarWidget QWidget {{
-                    alternate-background-color: #1a1a1a;
-                }}
-                QSpinBox {{
-                    background-color: #2a2a2a;
-                    border: 2px solid #404040;
-                    border-radius: 8px;
-                    padding: 8px 12px;
-                    font-size: 15px;
-                    font-weight: 600;
-                    color: #ffffff;
-                }}
-                QSpinBox:hover {{
-                    border: 2px solid {GREEN};
-                }}
-                QSpinBox:focus {{
-                    border: 2px solid {GREEN};
-                }}
-                QSpinBox::up-button {{
-                    subcontrol-origin: border;
-                    subcontrol-position: top right;
-                    width: 25px;
-                    border-left: 1px solid #404040;
-                    border-bottom: 1px solid #404040;
-                    border-top-right-radius: 8px;
-                    background-color: #1a1a1a;
-                }}
-                QSpinBox::up-button:hover {{
-                    background-color: {GREEN};
-                }}
-                QSpinBox::down-button {{
-                    subcontrol-origin: border;
-                    subcontrol-position: bottom right;
-                    width: 25px;
-                    border-left: 1px solid #404040;
-                    border-bottom-right-radius: 8px;
-                    background-color: #1a1a1a;
-                }}
-                QSpinBox::down-button:hover {{
-                    background-color: {GREEN};
-                }}
-                QSpinBox::up-arrow {{
-                    image: none;
-                    border-left: 4px solid transparent;
-                    border-right: 4px solid transparent;
-                    border-bottom: 5px solid #ffffff;
-                    width: 0px;
-                    height: 0px;
-                }}
-                QSpinBox::down-arrow {{
-                    image: none;
-                    border-left: 4px solid transparent;
-                    border-right: 4px solid transparent;
-                    border-top: 5px solid #ffffff;
-                    width: 0px;
-                    height: 0px;
-                }}
-            """)
+        """Restyle the window chrome and the visible page; other pages catch up when shown
+
+        The stylesheet is set per page rather than on the window, so a toggle
+        re-polishes one page's widgets instead of every page's.
+        """
+        if not self.styleSheet():
+            self.setStyleSheet(theme.WINDOW_STYLESHEET)  # both themes; never changes
+        set_theme_property(self, self.current_theme)
+        self.toolbar.setStyleSheet(theme.stylesheet(self.current_theme))
+        self.theme_page(self.stack.currentWidget())
 
+    @traced
+    def theme_page(self, page):
+        if isinstance(page, int):  # from QStackedWidget.currentChanged
+            page = self.stack.widget(page)
+        if page is not None and page.property("theme") != self.current_theme:
+            page.setProperty("theme", self.current_theme)
+            page.setStyleSheet(theme.stylesheet(self.current_theme))
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
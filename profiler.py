@@ -0,0 +1,171 @@
+"""Built-in instrumentation for finding out why the UI stutters, without a debugger.
+
+``PROFILER`` records two kinds of trace events while it is running:
+
+- slot calls: every call of a function decorated with ``@traced``, with
+  how long it took. When the profiler is stopped a traced function costs
+  one attribute check.
+- stalls: the GUI thread calls ``beat()`` from a timer every
+  ``HEARTBEAT_MS``. A beat that comes more than ``threshold_ms`` late means
+  the event loop was blocked for that long. A watchdog thread notices the
+  missing beat while the stall is still going on and captures the GUI
+  thread's stack, so the trace shows what it was stuck in.
+
+``export`` writes Chrome trace-event JSON, which chrome://tracing and
+https://ui.perfetto.dev open as a timeline. Events are kept in a bounded
+buffer, so a profile can run for a whole session.
+
+This module has no GUI code; the window drives the heartbeat.
+"""
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+HEARTBEAT_MS = 20
+STALL_THRESHOLD_MS = float(os.environ.get("NANOLAB_STALL_MS", 100))  # a later heartbeat counts as a stall
+MAX_EVENTS = 200_000
+STACK_DEPTH = 30  # innermost frames kept per stall
+
+
+class Profiler:
+    def __init__(self, threshold_ms=STALL_THRESHOLD_MS, max_events=MAX_EVENTS):
+        self.threshold_ms = threshold_ms
+        self.enabled = False
+        self.events = deque(maxlen=max_events)
+        self.calls = 0
+        self.stalls = 0
+        self.worst_stall_ms = 0.0
+        self._origin = time.perf_counter()
+        self._main = threading.main_thread().ident
+        self._last_beat = None
+        self._stack = None  # the GUI thread's stack, captured during the current stall
+        self._watchdog = None
+        self._stop = threading.Event()
+
+    def _us(self, t):
+        return (t - self._origin) * 1e6
+
+    # ----- control -----
+
+    def start(self):
+        """Start recording, discarding the previous recording."""
+        if self.enabled:
+            return
+        self.events.clear()
+        self.calls = self.stalls = 0
+        self.worst_stall_ms = 0.0
+        self._origin = time.perf_counter()
+        self._last_beat = None
+        self._stack = None
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="StallWatchdog", daemon=True)
+        self._watchdog.start()
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join(1.0)
+            self._watchdog = None
+
+    def summary(self):
+        return (f"{self.calls:,} slot calls  |  {self.stalls} stalls over {self.threshold_ms:.0f} ms"
+                + (f" (worst {self.worst_stall_ms:.0f} ms)" if self.stalls else ""))
+
+    # ----- recording -----
+
+    def record(self, name, start, end, category="slot", args=None):
+        """Add a complete event that ran on this thread from ``start`` to ``end`` (perf_counter seconds)."""
+        event = {"name": name, "cat": category, "ph": "X", "ts": self._us(start), "dur": (end - start) * 1e6,
+                 "pid": os.getpid(), "tid": threading.get_ident()}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def beat(self):
+        """Called by the GUI thread every HEARTBEAT_MS; records a stall if this beat is late."""
+        now = time.perf_counter()
+        last, self._last_beat = self._last_beat, now
+        if last is None or not self.enabled:
+            return
+        late_ms = (now - last) * 1e3 - HEARTBEAT_MS
+        if late_ms < self.threshold_ms:
+            self._stack = None
+            return
+        self.stalls += 1
+        self.worst_stall_ms = max(self.worst_stall_ms, late_ms)
+        stack, self._stack = self._stack, None
+        self.events.append({"name": "stall", "cat": "stall", "ph": "X", "ts": self._us(last + HEARTBEAT_MS / 1e3),
+                            "dur": late_ms * 1e3, "pid": os.getpid(), "tid": self._main,
+                            "args": {"late_ms": round(late_ms, 1), "stack": stack or "not captured"}})
+
+    def _watch(self):
+        """Watchdog thread: capture the GUI thread's stack once per stall, while it is stuck"""
+        interval = self.threshold_ms / 4e3
+        while not self._stop.wait(interval):
+            last = self._last_beat
+            if last is None or self._stack is not None:
+                continue
+            if (time.perf_counter() - last) * 1e3 - HEARTBEAT_MS >= self.threshold_ms:
+                frame = sys._current_frames().get(self._main)
+                if frame is not None:
+                    self._stack = "".join(traceback.format_stack(frame)[-STACK_DEPTH:])
+
+    # ----- export -----
+
+    def trace(self):
+        """The recording as a Chrome trace-event document."""
+        names = {self._main: "GUI thread"}
+        for thread in threading.enumerate():
+            names.setdefault(thread.ident, thread.name)
+        tids = {event["tid"] for event in self.events}
+        metadata = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                     "args": {"name": names.get(tid, str(tid))}} for tid in tids]
+        return {"traceEvents": metadata + list(self.events), "displayTimeUnit": "ms"}
+
+    def export(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as out:
+            json.dump(self.trace(), out)
+        return path
+
+
+PROFILER = Profiler()
+
+
+def traced(fn):
+    """Time every call of ``fn`` while PROFILER is running.
+
+    Qt passes a slot the signal's arguments only if it can take them; the
+    wrapper accepts any, so it drops the extras ``fn`` has no room for, the
+    way Qt would have.
+    """
+    parameters = inspect.signature(fn).parameters.values()
+    if any(p.kind == p.VAR_POSITIONAL for p in parameters):
+        accepted = None
+    else:
+        accepted = sum(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD) for p in parameters)
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if accepted is not None:
+            args = args[:accepted]
+        if not PROFILER.enabled:
+            return fn(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            PROFILER.calls += 1
+            shown = [arg for arg in args[1:] if isinstance(arg, (str, int, float, bool))]
+            PROFILER.record(name, start, time.perf_counter(), args={"args": shown} if shown else None)
+
+    return wrapper
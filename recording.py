@@ -0,0 +1,151 @@
+"""Raw device traffic recorded to a file, and played back in place of the device.
+
+A recording (``.nlr``) holds every frame a link received, in order, with
+the time it arrived. The file is an ``NLR1`` header with the wall-clock
+start, then for each frame the microseconds since the previous one
+(uint32) followed by the frame exactly as it came off the wire, delimiter
+included. Nothing is decoded on the way in, so a recording keeps whatever
+the device really sent, corrupt frames included, at about 5 bytes of
+overhead per frame.
+
+A link records when given ``record=<directory>`` (``--record`` for
+nanolabd, ``NANOLAB_RECORD`` for the control panel), one
+``session-<time>.nlr`` per link. ``ReplayLink`` plays one back as a link:
+``replay://<path>`` at the recorded pace, ``replay://<path>?speed=10`` ten
+times faster, or ``?speed=max`` as fast as the receiving side keeps up.
+Since everything downstream of the link is the real code, a replay
+reproduces a field session, bugs included, without the hardware.
+"""
+import os
+import queue
+import struct
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from device_link import SerialLink
+from wire_protocol import DELIMITER
+
+MAGIC = b"NLR1"
+_HEADER = struct.Struct("<4sd")  # magic, wall-clock start
+_DELAY = struct.Struct("<I")  # microseconds since the previous frame
+MAX_DELAY_US = 0xFFFFFFFF
+
+
+def record_dir():
+    """The directory ``$NANOLAB_RECORD`` names for the control panel's recordings, or None to not record."""
+    return os.environ.get("NANOLAB_RECORD") or None
+
+
+class SessionRecorder:
+    """Appends received frames to a recording; used on the link's worker thread."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.frames = 0
+        self._out = open(self.path, "wb", buffering=1 << 16)
+        self._out.write(_HEADER.pack(MAGIC, time.time()))
+        self._last = time.monotonic()
+
+    @classmethod
+    def in_directory(cls, directory):
+        """A new recording named after the current time in ``directory``."""
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = Path(directory) / f"session-{stamp}.nlr"
+        n = 1
+        while path.exists():
+            n += 1
+            path = Path(directory) / f"session-{stamp}-{n}.nlr"
+        return cls(path)
+
+    def write(self, frame):
+        """Record one frame (without its delimiter), as it arrived now."""
+        now = time.monotonic()
+        delay = min(int((now - self._last) * 1e6), MAX_DELAY_US)
+        self._last = now
+        self._out.write(_DELAY.pack(delay) + frame + DELIMITER)
+        self.frames += 1
+
+    def close(self):
+        self._out.close()
+
+
+def read_recording(path):
+    """Return ``(start, frames)``: the wall-clock start and a list of (seconds since start, frame bytes)."""
+    data = Path(path).read_bytes()
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path} is not a NanoLab recording")
+    magic, start = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a NanoLab recording")
+    frames = []
+    at = 0
+    pos = _HEADER.size
+    while pos + _DELAY.size < len(data):
+        at += _DELAY.unpack_from(data, pos)[0]
+        end = data.find(DELIMITER, pos + _DELAY.size)
+        if end < 0:
+            break  # cut off mid-frame, e.g. by a crash
+        frames.append((at * 1e-6, data[pos + _DELAY.size:end]))
+        pos = end + 1
+    return start, frames
+
+
+class ReplayLink(SerialLink):
+    """A recording played back as if it were the device: ``replay://<path>[?speed=N|max]``.
+
+    Frames are handed to ``on_message`` on the worker thread at ``speed``
+    times the recorded pace (None: as fast as they are consumed). Nothing
+    answers what is sent, so commands time out. The link closes with
+    detail "end of recording". While it runs, ``due`` is the
+    ``time.perf_counter()`` at which the frame being handled was due, and
+    ``lag`` the furthest behind schedule it has been, in seconds.
+    """
+
+    def __init__(self, url, speed=1.0, **kwargs):
+        super().__init__(url, **kwargs)
+        parts = urlsplit(url)
+        self.path = parts.netloc + parts.path
+        query = parse_qs(parts.query).get("speed")
+        if query:
+            speed = None if query[0] == "max" else float(query[0])
+        self.speed = speed
+        self.frames_total = 0
+        self.due = None
+        self.lag = 0.0
+
+    def _run(self):
+        try:
+            _, frames = read_recording(self.path)
+        except (OSError, ValueError) as exc:
+            self._set_state("error", str(exc))
+            return
+        self.frames_total = len(frames)
+        self._set_state("open", self.url)
+        start = time.perf_counter()
+        for at, frame in frames:
+            if self._stop.is_set():
+                break
+            now = time.perf_counter()
+            due = now if self.speed is None else start + at / self.speed
+            if due > now and self._stop.wait(due - now):
+                break
+            self._discard_outbox()
+            self.due = due
+            self.lag = max(self.lag, time.perf_counter() - due)
+            self.stats.bytes_received += len(frame) + 1
+            self.stats.frames_received += 1
+            self._handle_frame(frame)
+        self._discard_outbox()
+        self._set_state("closed", "end of recording" if not self._stop.is_set() else "")
+
+    def _discard_outbox(self):
+        # Commands go nowhere, but count as sent, as if the device ignored them
+        try:
+            while True:
+                frame = self._outbox.get_nowait()
+                self.stats.bytes_sent += len(frame)
+                self.stats.frames_sent += 1
+        except queue.Empty:
+            pass
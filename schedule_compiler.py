@@ -0,0 +1,246 @@
+"""Compile the device settings into the NanoLab's event timeline.
+
+Each device runs ``frequency`` times a day, ``interval_h`` hours apart,
+starting at its FIRST_RUN hour, on every day of the project
+(``schedule.start_day`` to ``schedule.end_day`` inclusive). The runs of
+all days are expanded at once with NumPy into a ``Timeline`` of half-open
+``[start, end)`` intervals in seconds since the epoch, sorted by start.
+Times are on the NanoLab's own clock, which has no time zone: read them
+as UTC.
+
+``find_conflicts`` reports runs of one device that overlap each other (a
+duration longer than the interval, or more runs than fit in a day) and,
+through an ``IntervalTree``, runs of devices that must not overlap, such
+as the pump shaking the camera mid-recording.
+
+``to_table`` packs the timeline into the table the Arduino steps through:
+only the moments the outputs change, three bytes each.
+
+    header  b"NLT1", u32 start (epoch seconds), u32 entry count
+    entry   u16 seconds since the previous entry, u8 output mask (bit per DEVICES)
+    trailer u16 CRC-16/CCITT-FALSE over everything above
+
+A gap longer than 65535 s is bridged by repeating the current mask.
+"""
+import struct
+from binascii import crc_hqx
+from collections import namedtuple
+
+import numpy as np
+
+from storage import data_dir
+
+DEVICES = ("led", "pump", "camera")  # bit i of an output mask is DEVICES[i]
+FIRST_RUN = {"led": 6 * 3600, "pump": 7 * 3600, "camera": 8 * 3600}  # seconds after midnight
+CAMERA_RUN_S = 60  # one recording
+
+# Pairs of devices that must never run at the same time, and why
+CONFLICT_RULES = {
+    ("pump", "camera"): "the pump shakes the camera",
+}
+
+DAY = 86400
+MAX_DELTA = 0xFFFF
+
+MAGIC = b"NLT1"
+_HEADER = struct.Struct("<4sII")
+_ENTRY = np.dtype([("delta", "<u2"), ("mask", "u1")])
+_CRC = struct.Struct("<H")
+
+Conflict = namedtuple("Conflict", "device start other other_start reason")
+
+
+class Timeline:
+    """Runs as parallel arrays sorted by start: ``start`` and ``end`` (int64 seconds), ``device`` (index into DEVICES)."""
+
+    def __init__(self, start, end, device):
+        order = np.argsort(start, kind="stable")
+        self.start = start[order]
+        self.end = end[order]
+        self.device = device[order]
+
+    def __len__(self):
+        return len(self.start)
+
+    def of(self, name):
+        """(start, end) of one device's runs."""
+        mask = self.device == DEVICES.index(name)
+        return self.start[mask], self.end[mask]
+
+    def edges(self):
+        """``(times, masks)``: every moment the set of running devices changes, and the set from then on."""
+        if not len(self):
+            return np.zeros(0, np.int64), np.zeros(0, np.uint8)
+        times = np.concatenate([self.end, self.start])
+        steps = np.zeros((len(times), len(DEVICES)), np.int32)
+        rows = np.arange(len(self))
+        steps[rows, self.device] = -1  # ends sort before starts at the same second: half-open runs
+        steps[rows + len(self), self.device] = 1
+        order = np.argsort(times, kind="stable")
+        times = times[order]
+        running = np.cumsum(steps[order], axis=0) > 0
+        masks = (running * (1 << np.arange(len(DEVICES)))).sum(axis=1).astype(np.uint8)
+        last = np.append(times[1:] != times[:-1], True)  # the state after the final change at each time
+        times, masks = times[last], masks[last]
+        changed = np.append(True, masks[1:] != masks[:-1])
+        return times[changed], masks[changed]
+
+
+def runs(first_run, duration_s, frequency, interval_h, days):
+    """Start and end of every run of one device, ``days`` being the epoch days of the project."""
+    offsets = first_run + np.arange(frequency, dtype=np.int64) * int(interval_h * 3600)
+    start = (days[:, None] * DAY + offsets[None, :]).ravel()
+    return start, start + duration_s
+
+
+def compile_schedule(settings):
+    """The Timeline of a DeviceSettings, or None while the project has no start and end date."""
+    first_day, last_day = settings["schedule.start_day"], settings["schedule.end_day"]
+    if first_day is None or last_day is None or last_day < first_day:
+        return None
+    days = np.arange(first_day, last_day + 1, dtype=np.int64)
+    led, pump, camera = settings.group("led"), settings.group("pump"), settings.group("camera")
+    durations = {"led": led["duration_h"] * 3600, "pump": pump["duration_s"], "camera": CAMERA_RUN_S}
+    groups = {"led": led, "pump": pump, "camera": camera}
+    starts, ends, devices = [], [], []
+    for i, name in enumerate(DEVICES):
+        group = groups[name]
+        start, end = runs(FIRST_RUN[name], durations[name], group["frequency"], group["interval_h"], days)
+        starts.append(start)
+        ends.append(end)
+        devices.append(np.full(len(start), i, np.uint8))
+    return Timeline(np.concatenate(starts), np.concatenate(ends), np.concatenate(devices))
+
+
+class IntervalTree:
+    """A static interval tree over half-open ``[start, end)`` intervals.
+
+    The intervals, sorted by start, form an implicit balanced binary tree:
+    the middle of every index range is its root. Each root also stores the
+    largest end in its range, so a query skips whole subtrees that finish
+    before it begins and, by the sort order, everything right of a root
+    that starts after it ends: O(log n + k) for k matches.
+    """
+
+    def __init__(self, starts, ends):
+        order = np.argsort(starts, kind="stable")
+        self.ids = order.tolist()
+        self.starts = starts[order].tolist()
+        self.ends = ends[order].tolist()
+        self.max_end = [0] * len(self.ids)
+        if self.ids:
+            self._build(0, len(self.ids))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _build(self, lo, hi):
+        mid = (lo + hi) // 2
+        largest = self.ends[mid]
+        if lo < mid:
+            largest = max(largest, self._build(lo, mid))
+        if mid + 1 < hi:
+            largest = max(largest, self._build(mid + 1, hi))
+        self.max_end[mid] = largest
+        return largest
+
+    def overlapping(self, start, end):
+        """Indices (into the arrays given) of the intervals that overlap ``[start, end)``."""
+        found = []
+        ranges = [(0, len(self.ids))]
+        while ranges:
+            lo, hi = ranges.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self.max_end[mid] <= start:
+                continue
+            ranges.append((lo, mid))
+            if self.starts[mid] < end:
+                if self.ends[mid] > start:
+                    found.append(self.ids[mid])
+                ranges.append((mid + 1, hi))
+        return found
+
+
+def find_conflicts(timeline, rules=CONFLICT_RULES, limit=20):
+    """``(count, examples)``: how many clashes the timeline has, and the first ``limit`` of them as Conflicts."""
+    count = 0
+    examples = []
+    for name in DEVICES:
+        start, end = timeline.of(name)
+        if len(start) < 2:
+            continue
+        # Sorted by start, a run overlaps an earlier one exactly when it starts before they have all ended
+        clash = np.flatnonzero(start[1:] < np.maximum.accumulate(end[:-1])) + 1
+        count += len(clash)
+        for i in clash[:max(0, limit - len(examples))]:
+            examples.append(Conflict(name, int(start[i - 1]), name, int(start[i]), "runs overlap each other"))
+    for (name, other), reason in rules.items():
+        start, end = timeline.of(name)
+        other_start, other_end = timeline.of(other)
+        if not len(start) or not len(other_start):
+            continue
+        # Most runs clash with nothing: a run overlaps some other run exactly when one of those
+        # starting before it ends is still going when it starts. Only those go to the tree.
+        last = np.searchsorted(other_start, end) - 1
+        latest_end = np.maximum.accumulate(other_end)[np.maximum(last, 0)]
+        hits = (last >= 0) & (latest_end > start)
+        if not hits.any():
+            continue
+        tree = IntervalTree(other_start, other_end)
+        for s, e in zip(start[hits].tolist(), end[hits].tolist()):
+            for j in tree.overlapping(s, e):
+                count += 1
+                if len(examples) < limit:
+                    examples.append(Conflict(name, s, other, int(other_start[j]), reason))
+    return count, examples
+
+
+def to_table(timeline):
+    """The timeline's output changes as the binary table described above."""
+    times, masks = timeline.edges()
+    start = int(times[0]) if len(times) else 0
+    deltas = np.diff(times, prepend=start)
+    # Each change needs 1 + (delta - 1) // MAX_DELTA entries; the extra ones repeat the previous mask
+    extra = np.maximum(deltas - 1, 0) // MAX_DELTA
+    count = len(times) + int(extra.sum())
+    entries = np.zeros(count, _ENTRY)
+    position = np.arange(len(times)) + np.cumsum(extra)  # where each real change lands
+    entries["delta"][position] = deltas - extra * MAX_DELTA
+    entries["mask"][position] = masks
+    if extra.any():
+        filler = np.ones(count, bool)
+        filler[position] = False
+        entries["delta"][filler] = MAX_DELTA
+        previous = np.concatenate([[0], masks[:-1]])
+        entries["mask"][filler] = np.repeat(previous, extra)
+    body = _HEADER.pack(MAGIC, start, count) + entries.tobytes()
+    return body + _CRC.pack(crc_hqx(body, 0xFFFF))
+
+
+def table_path():
+    """Where the compiled table is kept: ``data_dir()/schedule.nlt``."""
+    return data_dir() / "schedule.nlt"
+
+
+def save_table(data, path=None):
+    """Write a table atomically, so the uploader never reads half of one."""
+    path = table_path() if path is None else path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    part = path.with_suffix(".part")
+    part.write_bytes(data)
+    part.replace(path)
+    return path
+
+
+def read_table(data):
+    """Inverse of ``to_table``: ``(times, masks)`` with absolute times, repeats included."""
+    body, (crc,) = data[:-_CRC.size], _CRC.unpack_from(data, len(data) - _CRC.size)
+    if crc_hqx(body, 0xFFFF) != crc:
+        raise ValueError("schedule table CRC mismatch")
+    magic, start, count = _HEADER.unpack_from(body)
+    if magic != MAGIC:
+        raise ValueError("not a schedule table")
+    entries = np.frombuffer(body, _ENTRY, count, _HEADER.size)
+    return start + np.cumsum(entries["delta"], dtype=np.int64), entries["mask"].copy()
@@ -0,0 +1,309 @@
+"""Pull the readings and images a NanoLab has buffered on its SD card.
+
+Files are read in CHUNK-byte pieces with FileRead and arrive as FileData
+(see wire_protocol). ``window`` requests are in flight at once, so the
+device always has the next chunk to send while the last one is on the
+line. A stop-and-wait transfer leaves the line idle for a round trip per
+chunk. Requests go through the link's CommandScheduler at BULK priority:
+they are resent if unanswered, and any other command overtakes them.
+
+Every chunk carries the CRC the device computed when reading the card.
+A chunk that does not match is requested again. Good bytes are appended
+in order to ``<name>.part``, so its length is always the last good offset.
+After a disconnect, or in a later session, the download resumes from
+there. When the last byte arrives, the file is renamed into place: images
+go into the captures folder, where the gallery shows them, and everything
+else into ``sd/`` in the data directory.
+
+All of this runs on the link's worker thread, like telemetry ingest; the
+GUI only polls ``summary()``.
+"""
+import threading
+import time
+from binascii import crc_hqx
+from pathlib import Path
+
+import camera
+from command_scheduler import BULK, BULK_WINDOW
+from storage import data_dir
+from wire_protocol import ACK_OK, FileData, FileInfo, FileRead, ListFiles
+
+CHUNK = 512  # bytes per FileRead; an Arduino has little RAM to buffer more
+WINDOW = BULK_WINDOW  # requests in flight; the scheduler lets no more bulk commands out at once
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png")
+
+
+def downloads_dir():
+    """Where downloaded files other than images go: ``data_dir()/sd``."""
+    return data_dir() / "sd"
+
+
+def destination(name):
+    """The local path for the card's file ``name``."""
+    name = Path(name).name  # never outside the folder, whatever the card says
+    if name.lower().endswith(IMAGE_SUFFIXES):
+        return camera.captures_dir() / name
+    return downloads_dir() / name
+
+
+def line_bandwidth(link):
+    """Bytes per second the link's line can carry, or None when it is not a physical serial line."""
+    baudrate = getattr(link, "baudrate", None)
+    if baudrate is None or "://" in link.url:  # tcp://, socket://, loop://: no baud rate applies
+        return None
+    return baudrate / 10  # 8N1: a start and a stop bit per byte
+
+
+class FileDownload:
+    """One file on the card, fetched chunk by chunk into its ``.part`` file."""
+
+    def __init__(self, info, path, chunk=CHUNK, window=WINDOW):
+        self.file_id = info.file_id
+        self.name = bytes(info.name).decode(errors="replace")
+        self.size = info.size
+        self.path = Path(path)
+        self.part = self.path.with_name(self.path.name + ".part")
+        self.chunk = chunk
+        self.window = window
+        self.offset = self.part.stat().st_size if self.part.exists() else 0  # bytes good on disk
+        self.resumed_from = self.offset
+        self.next_offset = self.offset  # the next chunk to request
+        self.requests = {}  # seq -> offset
+        self.early = {}  # offset -> data that arrived before the chunks ahead of it
+        self.retried = 0
+        self.bad_crc = 0
+        self.state = "waiting"  # then "running", "done", or "failed" (resumable)
+        self.error = None
+        self.started = None
+        self.elapsed = 0.0
+        self.bytes_this_session = 0
+        self._out = None
+
+    @property
+    def done(self):
+        return self.state == "done"
+
+    def rate(self):
+        """Bytes per second received in this session."""
+        elapsed = self.elapsed + (time.monotonic() - self.started if self.state == "running" else 0)
+        return self.bytes_this_session / elapsed if elapsed > 0 else 0.0
+
+    def accept(self, offset, message):
+        """Check a chunk and write what is now contiguous; returns False if it must be requested again."""
+        expected = min(self.chunk, self.size - offset)
+        data = bytes(message.data)
+        if (message.file_id != self.file_id or message.offset != offset or len(data) != expected
+                or crc_hqx(data, 0xFFFF) != message.crc):
+            self.bad_crc += 1
+            return False
+        self.early[offset] = data
+        while self.offset in self.early:
+            data = self.early.pop(self.offset)
+            self._out.write(data)
+            self.offset += len(data)
+            self.bytes_this_session += len(data)
+        return True
+
+    def open(self):
+        self.part.parent.mkdir(parents=True, exist_ok=True)
+        self._out = open(self.part, "ab")
+        self.started = time.monotonic()
+        self.state = "running"
+
+    def pause(self, state, error=None):
+        """Stop requesting; what is on disk stays, to resume from."""
+        if self.state == "running":
+            self.elapsed += time.monotonic() - self.started
+        self.state = state
+        self.error = error
+        self.requests.clear()
+        self.early.clear()
+        self.next_offset = self.offset
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+
+    def finish(self):
+        self.pause("done")
+        self.part.replace(self.path)
+
+
+class SdCard:
+    """The SD card of the device behind ``device`` (a DeviceController): listing and downloads."""
+
+    def __init__(self, device, chunk=CHUNK, window=WINDOW):
+        self.device = device
+        self.chunk = chunk
+        self.window = window
+        self.files = []  # FileInfo, from the last listing
+        self.error = None  # why the last listing failed
+        self.downloads = []
+        self._lock = threading.RLock()
+        self._listing = None  # (seq, FileInfos so far, callback)
+        self._by_seq = {}  # seq -> FileDownload
+
+    # ----- caller side (any thread) -----
+
+    def list_files(self, on_listed=None):
+        """Ask the device for its files; ``on_listed(files)`` is called, on the worker thread, once they are in.
+
+        Returns False if there is no link to ask over.
+        """
+        if self.device.link is None:
+            return False
+        with self._lock:
+            self.error = None
+            command = self.device.commands.submit(ListFiles(), BULK, on_done=self._listed)
+            self._listing = (command.seq, [], on_listed)
+        return True
+
+    def download_all(self):
+        """Fetch every file on the card that is not downloaded yet, one after another; False without a link."""
+        return self.list_files(self._queue_missing)
+
+    def download(self, info, path=None):
+        """Start fetching ``info`` (a FileInfo), resuming a partial download of it; returns its FileDownload."""
+        with self._lock:
+            for download in self.downloads:
+                if download.file_id == info.file_id and not download.done:
+                    if download.state == "failed":  # timed out or refused: try again from where it stopped
+                        download.state = "waiting"
+                        download.resumed_from = download.offset
+                        self._start_next()
+                    return download
+            download = FileDownload(info, path or destination(bytes(info.name).decode(errors="replace")),
+                                    self.chunk, self.window)
+            self.downloads.append(download)
+            self._start_next()
+            return download
+
+    def resume(self):
+        """Carry on with unfinished downloads, e.g. once the link is open again."""
+        with self._lock:
+            for download in self.downloads:
+                if download.state == "failed":
+                    download.state = "waiting"
+                    download.resumed_from = download.offset
+            self._start_next()
+
+    def interrupt(self, reason):
+        """The link went away: requests in flight will never be answered."""
+        with self._lock:
+            for download in self.downloads:
+                if download.state == "running":
+                    download.pause("failed", reason)
+            self._by_seq.clear()
+            if self._listing is not None:
+                self._listing = None
+                self.error = reason
+
+    def summary(self):
+        """One line about the downloads, or "" if there are none."""
+        with self._lock:
+            downloads = list(self.downloads)
+        if not downloads:
+            return ""
+        done = sum(d.done for d in downloads)
+        total = sum(d.size for d in downloads)
+        have = sum(d.size if d.done else d.offset for d in downloads)
+        text = f"💾 {done}/{len(downloads)} files  |  {have / 2**20:,.2f} of {total / 2**20:,.2f} MiB"
+        running = [d for d in downloads if d.state == "running"]
+        if running:
+            rate = running[0].rate()
+            text += f"  |  {running[0].name} at {rate / 1024:,.1f} KiB/s"
+            bandwidth = line_bandwidth(self.device.link)
+            if bandwidth:
+                text += f" ({rate / bandwidth:.0%} of the {bandwidth / 1024:,.1f} KiB/s line)"
+        failed = [d for d in downloads if d.state == "failed"]
+        if failed:
+            text += f"  |  ⚠️ {failed[0].name}: {failed[0].error}"
+        return text
+
+    @property
+    def busy(self):
+        """True while a listing or a download is under way."""
+        return self._listing is not None or any(d.state in ("waiting", "running") for d in self.downloads)
+
+    # ----- worker side -----
+
+    def on_message(self, seq, message):
+        """Handle a FileInfo or FileData from the device."""
+        with self._lock:
+            if type(message) is FileInfo:
+                if self._listing is not None and self._listing[0] == seq:
+                    self._listing[1].append(message)
+            elif type(message) is FileData:
+                download = self._by_seq.pop(seq, None)
+                if download is None or download.state != "running":
+                    return  # the answer to a resent request that was already answered
+                offset = download.requests.pop(seq)
+                if not download.accept(offset, message):
+                    download.retried += 1
+                    self._request(download, offset)
+                elif download.offset >= download.size:
+                    download.finish()
+                    self._start_next()
+                    return
+                self._fill(download)
+
+    def _listed(self, command):
+        with self._lock:
+            if self._listing is None or self._listing[0] != command.seq:
+                return
+            _, files, on_listed = self._listing
+            self._listing = None
+            if command.status == ACK_OK:
+                self.files = files
+            else:
+                self.error = "no answer from the device" if isinstance(command.status, str) else "no SD card"
+        if on_listed is not None and command.status == ACK_OK:
+            on_listed(files)
+
+    def _queue_missing(self, files):
+        for info in files:
+            if not destination(bytes(info.name).decode(errors="replace")).exists():
+                self.download(info)
+
+    def _start_next(self):
+        """Run the first waiting download, unless one is running; one at a time keeps each one fast."""
+        link = self.device.link
+        if link is None or link.state != "open":
+            return  # resume() starts it once the link opens
+        if any(d.state == "running" for d in self.downloads):
+            return
+        for download in self.downloads:
+            if download.state == "waiting":
+                if download.offset >= download.size:
+                    download.open()
+                    download.finish()
+                    continue
+                download.open()
+                self._fill(download)
+                return
+
+    def _fill(self, download):
+        """Keep ``window`` requests in flight."""
+        while len(download.requests) < download.window and download.next_offset < download.size:
+            self._request(download, download.next_offset)
+            download.next_offset += download.chunk
+
+    def _request(self, download, offset):
+        length = min(download.chunk, download.size - offset)
+        command = self.device.commands.submit(FileRead(download.file_id, offset, length), BULK,
+                                              on_done=self._request_done)
+        download.requests[command.seq] = offset
+        self._by_seq[command.seq] = download
+
+    def _request_done(self, command):
+        # ACK_OK means its FileData arrived; anything else is a request that will never be answered
+        if command.status == ACK_OK:
+            return
+        with self._lock:
+            download = self._by_seq.pop(command.seq, None)
+            if download is None or download.state != "running":
+                return
+            reason = "no answer from the device" if isinstance(command.status, str) else "the device refused a read"
+            download.pause("failed", reason)
+            for seq in [seq for seq, other in self._by_seq.items() if other is download]:
+                del self._by_seq[seq]
+            self._start_next()
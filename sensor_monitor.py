@@ -0,0 +1,287 @@
+"""Rolling statistics and alarms over the live sensor stream.
+
+Every channel keeps a ``RollingWindow`` per window length: min, max, mean,
+standard deviation, an EWMA with the window's length as its time constant,
+and the rate of change across the window. Each is updated as batches
+arrive, at O(1) amortized cost per sample, and never by rescanning the
+whole window on a batch:
+
+- mean and variance from running sums, corrected as samples leave the window
+  and summed afresh once every ``RESUM_EVERY`` samples;
+- min and max from a monotonic queue of the batches whose extreme can
+  still be the window's, the oldest one rescanned as its samples leave;
+- the EWMA in closed form over the batch, ``exp(-(t_end - t) / tau)``
+  weighting each sample.
+
+``Alarm``s are evaluated on the same stream, on every sample, so a spike
+between two screen refreshes still raises one. ``SensorMonitor.extend`` is
+fed the rows Telemetry ingests, on the link worker thread; readers call
+``stats`` and read ``alarms`` from any thread.
+
+This module has no GUI code.
+"""
+import math
+import threading
+from collections import deque, namedtuple
+
+import numpy as np
+
+from telemetry import CHANNELS
+
+WINDOWS = (10, 60, 600)  # seconds
+RATE_PER = 60            # rates of change are per minute
+RESUM_EVERY = 1 << 16    # samples between fresh sums, which re-centre them on a drifting signal
+
+Stats = namedtuple("Stats", "count min max mean std ewma rate")
+
+
+class _Queue:
+    """``(time, value)`` samples in growable NumPy columns, appended at the back and dropped from the front."""
+
+    __slots__ = ("t", "v", "head", "tail")
+
+    def __init__(self, capacity=256):
+        self.t = np.empty(capacity, np.float64)
+        self.v = np.empty(capacity, np.float64)
+        self.head = self.tail = 0
+
+    def __len__(self):
+        return self.tail - self.head
+
+    def times(self):
+        return self.t[self.head:self.tail]
+
+    def values(self):
+        return self.v[self.head:self.tail]
+
+    def extend(self, times, values):
+        n = len(times)
+        if self.tail + n > len(self.t):
+            # Move the live part to the front, growing only when it fills more than half the buffer
+            size = len(self)
+            capacity = max(len(self.t), 2 * (size + n))
+            for name in ("t", "v"):
+                old = getattr(self, name)
+                new = old if capacity == len(old) else np.empty(capacity, np.float64)
+                new[:size] = old[self.head:self.tail]
+                setattr(self, name, new)
+            self.head, self.tail = 0, size
+        self.t[self.tail:self.tail + n] = times
+        self.v[self.tail:self.tail + n] = values
+        self.tail += n
+
+
+def _push_extreme(queue, start, end, value):
+    """Append the minimum of samples ``start:end`` to a monotonic queue of ``[start, end, minimum]`` batches.
+
+    A batch can only hold the minimum of a later window while no batch
+    after it has a smaller one, so those that do not are cut off the back.
+    """
+    while queue and queue[-1][2] >= value:
+        queue.pop()
+    queue.append([start, end, value])
+
+
+def _drop_extremes(queue, head, values, minimum):
+    """Drop the batches before sample ``head`` and rescan the one it cuts; ``values`` start at ``head``."""
+    while queue and queue[0][1] <= head:
+        queue.popleft()
+    if queue and queue[0][0] < head:
+        front = queue[0]
+        front[0], front[2] = head, minimum(values[:front[1] - head])
+        if len(queue) > 1 and front[2] >= queue[1][2]:
+            queue.popleft()  # the batches after it are increasing, so the next one holds the minimum now
+
+
+def _negated_max(values):
+    return -float(np.maximum.reduce(values))
+
+
+class RollingWindow:
+    """Statistics over the samples of the last ``seconds``, updated batch by batch."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.samples = _Queue()
+        self.lows = deque()
+        self.highs = deque()  # negated, so maxima are minima too
+        self._added = 0    # samples ever added, so batches are known by their positions in the stream
+        self._dropped = 0  # of which have left the window
+        self.ewma = None
+        self.rate = 0.0
+        self._last_time = None
+        self._shift = 0.0  # sums are of value - shift, which keeps them small and the variance exact
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._until_resum = RESUM_EVERY
+
+    def extend(self, times, values, rates=False):
+        """Add a batch in time order; with ``rates``, returns the rate of change (per RATE_PER) at each sample."""
+        times = np.asarray(times, np.float64)
+        values = np.asarray(values, np.float64)
+        if not len(times):
+            return values if rates else None
+        self._update_ewma(times, values)
+        samples = self.samples
+        if not len(samples):
+            self._shift, self._sum, self._sumsq = float(values[0]), 0.0, 0.0
+        samples.extend(times, values)
+        start, self._added = self._added, self._added + len(times)
+        _push_extreme(self.lows, start, self._added, float(np.minimum.reduce(values)))
+        _push_extreme(self.highs, start, self._added, _negated_max(values))
+
+        window_t, window_v = samples.times(), samples.values()
+        per_sample = self._rates(window_t, window_v, times, values) if rates else None
+
+        # The samples that leave the window, which may include some of this batch; the first one
+        # left is where the latest rate is measured from
+        end = float(times[-1])
+        k = int(window_t.searchsorted(end - self.seconds, "right"))
+        span = end - float(window_t[k])
+        self.rate = (float(values[-1]) - float(window_v[k])) * RATE_PER / span if span > 0 else 0.0
+        samples.head += k
+        self._dropped += k
+        _drop_extremes(self.lows, self._dropped, window_v[k:], np.minimum.reduce)
+        _drop_extremes(self.highs, self._dropped, window_v[k:], _negated_max)
+        shifted = values - self._shift
+        dropped = window_v[:k] - self._shift
+        self._sum += float(np.add.reduce(shifted) - np.add.reduce(dropped))
+        self._sumsq += float(shifted @ shifted - dropped @ dropped)
+
+        # Subtracting leaves rounding behind, and a drifting signal leaves the shift behind: now and then, re-sum
+        self._until_resum -= len(times)
+        if self._until_resum <= 0:
+            window_v = samples.values()
+            self._shift = float(window_v[-1])
+            shifted = window_v - self._shift
+            self._sum, self._sumsq = float(shifted.sum()), float(shifted @ shifted)
+            self._until_resum = RESUM_EVERY
+        return per_sample
+
+    def _rates(self, window_t, window_v, times, values):
+        """Rate of each new sample across its own window, before the oldest samples leave."""
+        first = window_t.searchsorted(times - self.seconds, "right")
+        span = times - window_t.take(first)
+        if not span.all():
+            span[span <= 0] = np.inf  # the window's first sample has no rate yet
+        return (values - window_v.take(first)) * RATE_PER / span
+
+    def _update_ewma(self, times, values):
+        if self.ewma is None:
+            self.ewma, self._last_time = float(values[0]), float(times[0])
+        end = float(times[-1])
+        # Each sample's weight is its gain times its decay to the end, 1 - exp(-dt / tau) times
+        # exp(-(end - t) / tau): the difference of successive decays, summed here by parts
+        decay = np.exp((times - end) / self.seconds)
+        before = math.exp((self._last_time - end) / self.seconds)
+        steps = values[1:] - values[:-1]
+        self.ewma = before * (self.ewma - float(values[0])) + float(values[-1]) - float(decay[:-1] @ steps)
+        self._last_time = end
+
+    def stats(self):
+        n = len(self.samples)
+        if not n:
+            return Stats(0, None, None, None, None, self.ewma, self.rate)
+        mean = self._sum / n
+        variance = max(self._sumsq / n - mean * mean, 0.0)
+        return Stats(n, float(self.lows[0][2]), -self.highs[0][2],
+                     self._shift + mean, variance ** 0.5, self.ewma, self.rate)
+
+
+class Alarm:
+    """Raised when a channel (or, with ``rate``, its rate of change per minute) goes above or below ``limit``.
+
+    ``kind`` is "above" or "below". The alarm clears once the value is back
+    past the limit by ``hysteresis``, so noise around the limit does not
+    make it flicker. Rates are measured across ``window`` seconds.
+    """
+
+    def __init__(self, channel, kind, limit, hysteresis=0.0, rate=False, window=WINDOWS[1]):
+        if kind not in ("above", "below"):
+            raise ValueError(f"unknown alarm kind: {kind}")
+        self.channel = channel
+        self.kind = kind
+        self.limit = limit
+        self.hysteresis = hysteresis
+        self.rate = rate
+        self.window = window
+        self.active = False
+        self.since = None      # time the alarm was last raised
+        self.triggered = 0     # times it has been raised
+        self.value = None      # the latest value checked
+
+    def __str__(self):
+        unit = CHANNELS[self.channel][0]
+        if self.rate:
+            return f"{self.channel} rising faster than {self.limit} {unit}/min" if self.kind == "above" else \
+                f"{self.channel} falling faster than {-self.limit} {unit}/min"
+        return f"{self.channel} {self.kind} {self.limit} {unit}"
+
+    def update(self, times, values):
+        """Check a batch of values (or rates), sample by sample."""
+        if not len(values):
+            return
+        self.value = float(values[-1])
+        sign = 1 if self.kind == "above" else -1
+        level = sign * np.asarray(values)
+        limit = sign * self.limit
+        # +1 raises, -1 clears, 0 leaves the state as it was
+        events = np.where(level > limit, 1, np.where(level < limit - self.hysteresis, -1, 0))
+        changes = np.flatnonzero(events)
+        if not len(changes):
+            return
+        states = np.concatenate(([self.active], events[changes] > 0))
+        raised = changes[~states[:-1] & states[1:]]
+        self.triggered += len(raised)
+        if len(raised):
+            self.since = float(times[raised[-1]])
+        self.active = bool(states[-1])
+
+
+def default_alarms():
+    """The alarms the control panel starts with."""
+    return [
+        Alarm("temperature", "above", 35.0, hysteresis=0.5),
+        Alarm("temperature", "below", 10.0, hysteresis=0.5),
+        Alarm("temperature", "above", 2.0, hysteresis=0.5, rate=True),
+        Alarm("humidity", "above", 90.0, hysteresis=2.0),
+        Alarm("humidity", "below", 20.0, hysteresis=2.0),
+    ]
+
+
+class SensorMonitor:
+    """Rolling windows of every channel and the alarms on them, fed one telemetry row at a time."""
+
+    def __init__(self, windows=WINDOWS, alarms=None):
+        self.alarms = default_alarms() if alarms is None else list(alarms)
+        lengths = sorted(set(windows) | {alarm.window for alarm in self.alarms if alarm.rate})
+        self.windows = {name: {seconds: RollingWindow(seconds) for seconds in lengths} for name in CHANNELS}
+        # Rates sample by sample are only worked out where an alarm checks them
+        self._rate_windows = {name: {alarm.window for alarm in self.alarms if alarm.rate and alarm.channel == name}
+                              for name in CHANNELS}
+        self.current = {}
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def extend(self, row):
+        """Add a row of ``{"time": times, channel: values}``, as Telemetry passes to its store."""
+        times = row["time"]
+        with self._lock:
+            for name, windows in self.windows.items():
+                values = row[name]
+                needed = self._rate_windows[name]
+                rates = {seconds: window.extend(times, values, seconds in needed)
+                         for seconds, window in windows.items()}
+                for alarm in self.alarms:
+                    if alarm.channel == name:
+                        alarm.update(times, rates[alarm.window] if alarm.rate else values)
+                self.current[name] = float(values[-1])
+            self.samples += len(times)
+
+    def stats(self, seconds):
+        """``{channel: Stats}`` over the last ``seconds`` (one of the monitor's windows)."""
+        with self._lock:
+            return {name: windows[seconds].stats() for name, windows in self.windows.items()}
+
+    def active_alarms(self):
+        return [alarm for alarm in self.alarms if alarm.active]
@@ -0,0 +1,123 @@
+"""Append-only history of the settings the NanoLab has applied.
+
+Every time the device acknowledges a change, the complete configuration is
+appended as a new revision: a timestamp and one value per SCHEMA field.
+Timestamps never decrease, so "the settings in effect at time T" is a
+binary search over the time column, and comparing two days is two searches
+and one pass over the fields. Nothing is scanned, however long the history.
+
+On disk the history is a small header followed by fixed-size records:
+
+    b"NLH1"  u16 field count
+    record:  f8 time (epoch seconds), then one u16 per field (UNSET if unknown)
+
+Fields added to SCHEMA later read as UNSET in older revisions.
+"""
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+import numpy as np
+
+from settings_model import SCHEMA, UNSET
+from storage import data_dir
+
+MAGIC = b"NLH1"
+_HEADER = struct.Struct("<4sH")
+
+Change = namedtuple("Change", "key before after")  # values are None when unknown
+
+
+def default_path():
+    return data_dir() / "settings_history.bin"
+
+
+class SettingsHistory:
+    """Revisions of the full device configuration, indexed by time."""
+
+    def __init__(self, path):
+        self.path = path
+        self.field_count = len(SCHEMA)
+        self.times = array("d")
+        self.values = array("H")  # revision i is values[i * field_count:(i + 1) * field_count]
+        self._record = struct.Struct(f"<d{self.field_count}H")
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        data = self.path.read_bytes()
+        magic, stored = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a settings history")
+        record = np.dtype([("time", "<f8"), ("values", "<u2", (stored,))])
+        body = data[_HEADER.size:]
+        rows = np.frombuffer(body, record, len(body) // record.itemsize)
+        if len(body) % record.itemsize:
+            # Cut a torn last record off, so the next one is appended where it belongs
+            os.truncate(self.path, _HEADER.size + len(rows) * record.itemsize)
+        values = np.full((len(rows), self.field_count), UNSET, np.uint16)
+        kept = min(stored, self.field_count)
+        values[:, :kept] = rows["values"][:, :kept]
+        self.times.frombytes(rows["time"].astype(np.float64).tobytes())
+        self.values.frombytes(values.tobytes())
+        if stored != self.field_count:
+            self._rewrite()
+
+    def _rewrite(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as out:
+            out.write(_HEADER.pack(MAGIC, self.field_count))
+            for i, when in enumerate(self.times):
+                out.write(self._record.pack(when, *self.revision(i)))
+        tmp.replace(self.path)
+
+    def __len__(self):
+        return len(self.times)
+
+    def revision(self, i):
+        """The values of revision ``i``."""
+        start = i * self.field_count
+        return self.values[start:start + self.field_count]
+
+    def record(self, values, when=None):
+        """Append ``values`` as a new revision unless they equal the latest one; returns True if appended."""
+        values = array("H", values)
+        if len(self) and values == self.revision(len(self) - 1):
+            return False
+        when = time.time() if when is None else when
+        if len(self):
+            when = max(when, self.times[-1])  # keep the index sorted if the clock steps back
+        if not self.path.exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_bytes(_HEADER.pack(MAGIC, self.field_count))
+        with open(self.path, "ab") as out:
+            out.write(self._record.pack(when, *values))
+        self.times.append(when)
+        self.values.extend(values)
+        return True
+
+    def index_at(self, when):
+        """Index of the revision in effect at ``when``, or None before the first one."""
+        i = bisect_right(self.times, when) - 1
+        return i if i >= 0 else None
+
+    def at(self, when):
+        """``{key: value}`` in effect at ``when`` (None for unknown fields), or None before the first revision."""
+        i = self.index_at(when)
+        if i is None:
+            return None
+        return {field.key: None if value == UNSET else value for field, value in zip(SCHEMA, self.revision(i))}
+
+    def diff(self, t0, t1):
+        """The Changes between the settings in effect at ``t0`` and at ``t1``."""
+        before, after = self.at(t0) or {}, self.at(t1) or {}
+        return [Change(field.key, before.get(field.key), after.get(field.key)) for field in SCHEMA
+                if before.get(field.key) != after.get(field.key)]
+
+    def count_between(self, t0, t1):
+        """Number of revisions recorded in (t0, t1]."""
+        return bisect_right(self.times, t1) - bisect_right(self.times, t0)
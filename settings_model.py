@@ -0,0 +1,154 @@
+"""The NanoLab's device settings as one typed, compact model.
+
+``SCHEMA`` lists every setting once, with its wire id (its position in the
+schema), range, default and how the GUI labels it. ``DeviceSettings`` holds
+the saved value of every field in an ``array('H')`` next to the value the
+device last acknowledged, so the fields that need sending are just the ones
+where the two differ, and "Send to your NanoLab" can transmit those alone
+in a single SetFields frame. Given a path, the saved values persist there,
+so the GUI and the headless daemon (``nanolabd.py``) share them.
+
+This module has no GUI code; the settings pages and any headless tool share
+it.
+"""
+import sys
+from array import array
+from collections import namedtuple
+
+import wire_protocol
+from storage import data_dir
+
+# key is "<group>.<name>"; label None means the field has no slider of its own
+Field = namedtuple("Field", "key label unit minimum maximum default tick")
+
+# Append only: a field's wire id is its index, and the firmware knows them by id
+SCHEMA = (
+    Field("led.red", None, "", 0, 255, 255, None),
+    Field("led.green", None, "", 0, 255, 255, None),
+    Field("led.blue", None, "", 0, 255, 255, None),
+    Field("led.duration_h", "Run Duration (hours):", "h", 1, 24, 12, 2),
+    Field("led.frequency", "Run Frequency (times/day):", "x/day", 1, 24, 2, 2),
+    Field("led.interval_h", "Interval (hours):", "h", 1, 24, 12, 2),
+    Field("pump.duration_s", "Run Duration (seconds):", "s", 1, 300, 30, 30),
+    Field("pump.frequency", "Run Frequency (times/day):", "x/day", 1, 24, 4, 2),
+    Field("pump.interval_h", "Interval (hours):", "h", 1, 24, 6, 2),
+    Field("camera.frequency", "Recording Frequency (times/day):", "x/day", 1, 24, 3, 2),
+    Field("camera.interval_h", "Interval (hours):", "h", 1, 24, 8, 2),
+    Field("schedule.start_day", None, "", 0, 0xFFFE, None, None),  # days since 1970-01-01
+    Field("schedule.end_day", None, "", 0, 0xFFFE, None, None),
+)
+
+FIELD_IDS = {field.key: i for i, field in enumerate(SCHEMA)}
+
+# As a saved value: never set, so never sent. As a synced value: the device's value is unknown.
+UNSET = 0xFFFF
+
+
+def default_path():
+    """Where the saved settings are kept: ``data_dir()/settings.bin``."""
+    return data_dir() / "settings.bin"
+
+
+def fields(group):
+    """The schema fields of ``group``, e.g. "led", in schema order."""
+    prefix = group + "."
+    return [field for field in SCHEMA if field.key.startswith(prefix)]
+
+
+class DeviceSettings:
+    """Saved settings and the values the device has acknowledged, one slot per SCHEMA field.
+
+    Until the first acknowledged sync the device's values are unknown, so
+    every field that has a value is pending.
+    """
+
+    __slots__ = ("values", "synced", "path")
+
+    def __init__(self, path=None):
+        """With a ``path``, the saved values are read from it and written back on every change."""
+        self.values = array("H", (UNSET if field.default is None else field.default for field in SCHEMA))
+        self.synced = array("H", [UNSET]) * len(SCHEMA)
+        self.path = path
+        if path is not None:
+            self.reload()
+
+    def __getitem__(self, key):
+        value = self.values[FIELD_IDS[key]]
+        return None if value == UNSET else value
+
+    def group(self, name):
+        """``{field name: value}`` for one group, e.g. ``group("pump")["duration_s"]``."""
+        return {field.key.split(".", 1)[1]: self[field.key] for field in fields(name)}
+
+    def update(self, changes):
+        """Save ``{key: value}``; returns the keys whose value actually changed."""
+        for key, value in changes.items():
+            field = SCHEMA[FIELD_IDS[key]]
+            if not field.minimum <= value <= field.maximum:
+                raise ValueError(f"{key}={value} is outside {field.minimum}..{field.maximum}")
+        changed = []
+        for key, value in changes.items():
+            i = FIELD_IDS[key]
+            if self.values[i] != value:
+                self.values[i] = value
+                changed.append(key)
+        if changed and self.path is not None:
+            self.save()
+        return changed
+
+    def save(self):
+        """Write the saved values to ``path`` (little-endian u16 per field, in schema order)."""
+        data = array("H", self.values)
+        if sys.byteorder == "big":
+            data.byteswap()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_bytes(data.tobytes())
+        tmp.replace(self.path)
+
+    def reload(self):
+        """Read the saved values from ``path``, e.g. after another process saved; returns True if any changed.
+
+        A file from before fields were appended to the schema leaves the new
+        fields as they were.
+        """
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return False
+        stored = array("H")
+        stored.frombytes(data[:len(data) // 2 * 2])
+        if sys.byteorder == "big":
+            stored.byteswap()
+        kept = min(len(stored), len(SCHEMA))
+        if self.values[:kept] == stored[:kept]:
+            return False
+        self.values[:kept] = stored[:kept]
+        return True
+
+    def pending(self):
+        """Ids of the saved fields whose value the device has not acknowledged."""
+        return [i for i, (value, synced) in enumerate(zip(self.values, self.synced))
+                if value != synced and value != UNSET]
+
+    def sync_message(self):
+        """A SetFields message carrying only the pending fields, or None if there are none."""
+        ids = self.pending()
+        if not ids:
+            return None
+        return wire_protocol.SetFields(array("B", ids), array("H", (self.values[i] for i in ids)))
+
+    def full_message(self):
+        """A SetFields message carrying every saved field, e.g. for a device whose settings are unknown."""
+        ids = [i for i, value in enumerate(self.values) if value != UNSET]
+        return wire_protocol.SetFields(array("B", ids), array("H", (self.values[i] for i in ids)))
+
+    def mark_synced(self, message):
+        """Record the values in an acknowledged SetFields ``message`` as the device's."""
+        for i, value in zip(message.ids, message.values):
+            self.synced[i] = value
+
+    def invalidate(self):
+        """Forget what the device holds, e.g. after connecting to another one; everything is pending again."""
+        for i in range(len(self.synced)):
+            self.synced[i] = UNSET
@@ -0,0 +1,138 @@
+"""Predict the water and energy a schedule will use.
+
+``simulate`` evaluates a whole project from its compiled timeline
+(``schedule_compiler``). Every run starts and ends on a whole second, so
+integrating the timeline between its edges gives each device's on-time
+per day to the second, without sampling 86,400 points a day.
+
+``typical_day`` gives the same figures for one day in the middle of a
+project, when the runs spilling over from earlier days are included.
+It takes arrays of settings, one element per candidate, so ``sweep`` can
+evaluate every combination of a few settings in one pass.
+
+Only runs are modelled: the figures below are nominal for the NanoLab's
+parts; measure your own pump's flow and change PUMP_FLOW_ML_S to suit.
+
+This module has no GUI code.
+"""
+import itertools
+from collections import namedtuple
+
+import numpy as np
+
+import schedule_compiler
+from schedule_compiler import CAMERA_RUN_S, DAY, DEVICES, FIRST_RUN
+from settings_model import FIELD_IDS, SCHEMA
+
+PUMP_FLOW_ML_S = 1.6          # water moved per second of pumping
+POWER_W = {"led": 4.8, "pump": 2.5, "camera": 1.2}  # LED at full white; it scales with brightness
+IDLE_W = 0.6                  # Arduino, sensors and fan, always on
+
+MAX_RUNS = max(field.maximum for field in SCHEMA if field.key.endswith(".frequency"))
+
+# Seconds on per day of each device, and what that costs; arrays, one element per day or per candidate
+Usage = namedtuple("Usage", "led_s pump_s camera_s water_l energy_wh")
+
+# Sweeps offered on the schedule page: the two settings varied over their whole range, and the figure shown
+SWEEPS = {
+    "Pump: run duration × runs per day": ("pump.duration_s", "pump.frequency", "water_l"),
+    "Pump: runs per day × interval": ("pump.frequency", "pump.interval_h", "water_l"),
+    "LED: run duration × runs per day": ("led.duration_h", "led.frequency", "energy_wh"),
+    "Camera: recordings per day × interval": ("camera.frequency", "camera.interval_h", "energy_wh"),
+}
+
+
+def led_brightness(red, green, blue):
+    """Fraction of full-white LED power drawn for a colour."""
+    return (np.asarray(red) + np.asarray(green) + np.asarray(blue)) / (3 * 255)
+
+
+def usage(led_s, pump_s, camera_s, brightness):
+    """The Usage of the given on-times (seconds per day)."""
+    joules = (POWER_W["led"] * brightness * led_s + POWER_W["pump"] * pump_s + POWER_W["camera"] * camera_s
+              + IDLE_W * DAY)
+    return Usage(led_s, pump_s, camera_s, pump_s * PUMP_FLOW_ML_S / 1000, joules / 3600)
+
+
+def simulate(settings):
+    """``(days, Usage)`` for the project, one element per epoch day, or None without a schedule.
+
+    The days run from the start day to the last day a run is still going,
+    which can be after the end day.
+    """
+    timeline = schedule_compiler.compile_schedule(settings)
+    if timeline is None or not len(timeline):
+        return None
+    first = settings["schedule.start_day"]
+    times, masks = timeline.edges()
+    count = int(-(-times[-1] // DAY)) - first  # days up to the one in which the last run ends
+    bounds = (first + np.arange(count + 1, dtype=np.int64)) * DAY
+    # Split the timeline at every midnight, then add up how long each device is on in each day
+    grid = np.union1d(times, bounds)
+    state = masks[np.searchsorted(times, grid[:-1], side="right") - 1]
+    lengths = np.diff(grid)
+    day = grid[:-1] // DAY - first
+    on = [np.bincount(day, weights=lengths * ((state >> i) & 1), minlength=count)[:count]
+          for i in range(len(DEVICES))]
+    brightness = led_brightness(settings["led.red"], settings["led.green"], settings["led.blue"])
+    return first + np.arange(count), usage(*on, brightness)
+
+
+def daily_on_seconds(first_run, duration_s, frequency, interval_h):
+    """Seconds per typical day a device is on, for arrays of candidate settings (broadcast together).
+
+    A run that overlaps another only counts once. The day repeats, so each
+    run is folded into [0, DAY) and one that passes midnight wraps to the
+    start; the union of a candidate's runs is then taken with a running
+    maximum over its runs sorted by start.
+    """
+    first_run, duration_s, frequency, interval_h = np.broadcast_arrays(
+        *(np.asarray(a, dtype=np.int64) for a in (first_run, duration_s, frequency, interval_h)))
+    k = np.arange(MAX_RUNS)
+    start = (first_run[..., None] + k * interval_h[..., None] * 3600) % DAY
+    end = start + duration_s[..., None]
+    used = k < frequency[..., None]
+    start = np.where(used, start, 0)
+    # Each run as the part before midnight and the part wrapped after it (empty if it fits)
+    starts = np.concatenate([start, np.zeros_like(start)], axis=-1)
+    ends = np.concatenate([np.where(used, np.minimum(end, DAY), 0), np.where(used, np.maximum(end - DAY, 0), 0)],
+                          axis=-1)
+    order = np.argsort(starts, axis=-1)
+    starts = np.take_along_axis(starts, order, axis=-1)
+    ends = np.take_along_axis(ends, order, axis=-1)
+    covered = np.maximum.accumulate(ends, axis=-1)
+    before = np.concatenate([np.zeros_like(covered[..., :1]), covered[..., :-1]], axis=-1)
+    return np.maximum(ends - np.maximum(starts, before), 0).sum(axis=-1)
+
+
+def typical_day(values):
+    """The Usage of a typical day for ``values``: ``{key: value or array}`` over the whole SCHEMA."""
+    led_s = daily_on_seconds(FIRST_RUN["led"], np.asarray(values["led.duration_h"]) * 3600,
+                             values["led.frequency"], values["led.interval_h"])
+    pump_s = daily_on_seconds(FIRST_RUN["pump"], values["pump.duration_s"],
+                              values["pump.frequency"], values["pump.interval_h"])
+    camera_s = daily_on_seconds(FIRST_RUN["camera"], CAMERA_RUN_S,
+                                values["camera.frequency"], values["camera.interval_h"])
+    brightness = led_brightness(values["led.red"], values["led.green"], values["led.blue"])
+    return usage(led_s, pump_s, camera_s, brightness)
+
+
+def sweep(settings, ranges):
+    """Every combination of ``ranges`` (``{key: values}``) applied to ``settings``.
+
+    Returns ``(grid, Usage)``: ``grid`` maps each swept key to an array of
+    its value in every candidate, and the Usage arrays hold each
+    candidate's typical day, in the same order.
+    """
+    keys = list(ranges)
+    combos = np.array(list(itertools.product(*(list(ranges[key]) for key in keys))), dtype=np.int64)
+    grid = {key: combos[:, i] for i, key in enumerate(keys)}
+    values = {field.key: settings[field.key] for field in SCHEMA}
+    values.update(grid)
+    return grid, typical_day(values)
+
+
+def full_range(key):
+    """Every value a setting can take."""
+    field = SCHEMA[FIELD_IDS[key]]
+    return range(field.minimum, field.maximum + 1)
@@ -0,0 +1,356 @@
+"""Append-only columnar storage for telemetry.
+
+Rows are grouped into blocks of BLOCK_ROWS. Each block is a directory with
+one raw little-endian file per column, so a column is just a fixed-width
+array on disk:
+
+    telemetry/
+        index.bin           one BLOCK_INDEX record per block
+        blk_000000/
+            time.f8
+            temperature.f4
+            temperature.sum     min/max/mean per SUMMARY_ROWS rows, once the block is full
+            ...
+
+Reads memory-map the column files, so opening a range costs a binary search
+on the block index and on the block's time column. Nothing is parsed and
+only the pages actually touched are read. Plots of long ranges read the
+summaries instead, about 1/50 of the column. Deleting data drops whole
+blocks.
+"""
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+from pathlib import Path
+
+import numpy as np
+
+from lod import DEFAULT_BASE
+
+BLOCK_ROWS = 1 << 20
+FLUSH_INTERVAL = 1.0  # seconds between making appended rows visible to readers
+MAX_OPEN_MAPS = 64
+SUMMARY_ROWS = DEFAULT_BASE  # rows per summary bucket, the finest level of the plots' pyramids
+
+SUMMARY = np.dtype([("t", "<f8"), ("lo", "<f4"), ("hi", "<f4"), ("mean", "<f4")])
+
+BLOCK_INDEX = np.dtype([("block", "<u4"), ("rows", "<u4"), ("t_min", "<f8"), ("t_max", "<f8")])
+
+TELEMETRY_COLUMNS = {
+    "time": "<f8",
+    "temperature": "<f4",
+    "humidity": "<f4",
+    "pressure": "<f4",
+    "pump": "<f4",
+}
+
+
+def data_dir():
+    """Where the control panel keeps its data: ``$NANOLAB_DATA``, or ``~/.nanolab``."""
+    return Path(os.environ.get("NANOLAB_DATA", Path.home() / ".nanolab"))
+
+
+def default_root():
+    """Where telemetry is kept: ``data_dir()/telemetry``."""
+    return data_dir() / "telemetry"
+
+
+class ColumnStore:
+    """Time-ordered, append-only column files in fixed-size blocks.
+
+    The first column is the timestamp and must not decrease. One thread
+    appends; any thread may read. Appended rows become visible to readers
+    at the next ``flush``, which ``append`` triggers every FLUSH_INTERVAL.
+    """
+
+    def __init__(self, root, columns=None, block_rows=BLOCK_ROWS):
+        self.root = Path(root)
+        self.columns = {name: np.dtype(dtype) for name, dtype in (columns or TELEMETRY_COLUMNS).items()}
+        self.time_column = next(iter(self.columns))
+        self.block_rows = block_rows
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self.index = np.zeros(0, BLOCK_INDEX)
+        self._files = {}          # column -> append handle for the active block
+        self._unflushed = 0       # rows written to the handles but not yet in the index
+        self._last_flush = time.monotonic()
+        self._maps = OrderedDict()  # (block, column, suffix) -> (rows, memmap)
+        self._maps_lock = threading.Lock()  # readers may be on several threads
+        self._write_lock = threading.RLock()  # the writer vs. flush/drop from other threads
+        self._load_index()
+
+    # ----- index -----
+
+    def _block_dir(self, block):
+        return self.root / f"blk_{block:06d}"
+
+    def _load_index(self):
+        path = self.root / "index.bin"
+        if path.exists():
+            self.index = np.fromfile(path, BLOCK_INDEX)
+        if len(self.index):
+            self._recover(len(self.index) - 1)
+
+    def _recover(self, i):
+        """Trim block ``i`` to the rows that every column holds in full, e.g. after a crash."""
+        folder = self._block_dir(int(self.index["block"][i]))
+        folder.mkdir(exist_ok=True)
+        paths = {name: folder / self._filename(name) for name in self.columns}
+        rows = min(path.stat().st_size // self.columns[name].itemsize if path.exists() else 0
+                   for name, path in paths.items())
+        for name, path in paths.items():
+            if path.exists() and path.stat().st_size != rows * self.columns[name].itemsize:
+                os.truncate(path, rows * self.columns[name].itemsize)
+        if rows != self.index["rows"][i]:
+            self.index["rows"][i] = rows
+            if rows:
+                times = np.memmap(paths[self.time_column], self.columns[self.time_column], "r", shape=(rows,))
+                self.index["t_min"][i], self.index["t_max"][i] = times[0], times[-1]
+            self._write_index()
+
+    def _write_index(self):
+        tmp = self.root / "index.bin.tmp"
+        self.index.tofile(tmp)
+        os.replace(tmp, self.root / "index.bin")
+
+    def _filename(self, name):
+        dtype = self.columns[name]
+        return f"{name}.{dtype.kind}{dtype.itemsize}"
+
+    @property
+    def rows(self):
+        return int(self.index["rows"].sum())
+
+    @property
+    def span(self):
+        """(first, last) timestamp stored, or None when empty."""
+        full = self.index[self.index["rows"] > 0]
+        if not len(full):
+            return None
+        return float(full["t_min"][0]), float(full["t_max"][-1])
+
+    def disk_bytes(self):
+        return sum(f.stat().st_size for f in self.root.rglob("*") if f.is_file())
+
+    # ----- writing -----
+
+    def append(self, columns):
+        """Append rows given as ``{column: array}``; every column must be present."""
+        with self._write_lock:
+            self._append(columns)
+
+    def _append(self, columns):
+        times = np.asarray(columns[self.time_column])
+        n = len(times)
+        done = 0
+        while done < n:
+            self._open_active_block()
+            index = self.index
+            filled = int(index["rows"][-1]) + self._unflushed
+            take = min(self.block_rows - filled, n - done)
+            for name, dtype in self.columns.items():
+                chunk = np.asarray(columns[name][done:done + take], dtype)
+                self._files[name].write(chunk.tobytes())
+            if filled == 0:
+                index["t_min"][-1] = times[done]
+            index["t_max"][-1] = times[done + take - 1]
+            self._unflushed += take
+            done += take
+            if filled + take == self.block_rows:
+                self._flush()
+                self._close_files()
+                self._summarize(self.index[-1])
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self._flush()
+
+    def _open_active_block(self):
+        """Open append handles on the last block, starting a new block if it is full."""
+        if self._files:
+            return
+        if not len(self.index) or self.index["rows"][-1] >= self.block_rows:
+            block = int(self.index["block"][-1]) + 1 if len(self.index) else 0
+            self.index = np.append(self.index, np.array([(block, 0, np.nan, np.nan)], BLOCK_INDEX))
+            self._block_dir(block).mkdir(exist_ok=True)
+        folder = self._block_dir(int(self.index["block"][-1]))
+        self._files = {name: open(folder / self._filename(name), "ab", buffering=1 << 16)
+                       for name in self.columns}
+
+    def flush(self):
+        """Make appended rows visible to readers and durable in the index."""
+        with self._write_lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._files:
+            return
+        for handle in self._files.values():
+            handle.flush()
+        if self._unflushed:
+            self.index["rows"][-1] += self._unflushed
+            self._unflushed = 0
+            self._write_index()
+
+    def _close_files(self):
+        for handle in self._files.values():
+            handle.close()
+        self._files = {}
+
+    def close(self):
+        with self._write_lock:
+            self._flush()
+            self._close_files()
+        with self._maps_lock:
+            self._maps.clear()
+
+    def _summarize(self, record):
+        """Write the summary of every value column of the full block ``record``."""
+        rows = int(record["rows"])
+        folder = self._block_dir(int(record["block"]))
+        starts = np.arange(0, rows, SUMMARY_ROWS)
+        counts = np.diff(np.append(starts, rows))
+        times = self._column(record, self.time_column)
+        for name in self.columns:
+            if name == self.time_column:
+                continue
+            values = self._column(record, name)
+            summary = np.empty(len(starts), SUMMARY)
+            summary["t"] = times[starts]
+            summary["lo"] = np.minimum.reduceat(values, starts)
+            summary["hi"] = np.maximum.reduceat(values, starts)
+            summary["mean"] = np.add.reduceat(values, starts, dtype=np.float64) / counts
+            tmp = folder / f"{name}.sum.tmp"
+            summary.tofile(tmp)
+            os.replace(tmp, folder / f"{name}.sum")
+
+    # ----- reading -----
+
+    def _column(self, record, name, suffix=None):
+        """Memory map of column ``name`` (or its summary, for suffix "sum") in block ``record``, cached."""
+        rows = int(record["rows"])
+        key = (int(record["block"]), name, suffix)
+        if suffix is not None:
+            rows = -(-rows // SUMMARY_ROWS)
+        with self._maps_lock:
+            cached = self._maps.get(key)
+            if cached is not None and cached[0] == rows:
+                self._maps.move_to_end(key)
+                return cached[1]
+            if suffix is None:
+                path, dtype = self._block_dir(key[0]) / self._filename(name), self.columns[name]
+            else:
+                path, dtype = self._block_dir(key[0]) / f"{name}.{suffix}", SUMMARY
+            data = np.memmap(path, dtype, "r", shape=(rows,))
+            self._maps[key] = (rows, data)
+            if len(self._maps) > MAX_OPEN_MAPS:
+                self._maps.popitem(last=False)
+            return data
+
+    def blocks_in(self, t0, t1):
+        """Index records (a copy) of the non-empty blocks that overlap [t0, t1]."""
+        index = self.index
+        index = index[index["rows"] > 0]
+        first = int(np.searchsorted(index["t_max"], t0, side="left"))
+        last = int(np.searchsorted(index["t_min"], t1, side="right"))
+        return index[first:last]
+
+    def iter_range(self, t0, t1, names=None):
+        """Yield one ``{column: read-only array}`` per block for rows with t0 <= time <= t1.
+
+        The arrays are views of the memory-mapped files; nothing is copied.
+        """
+        names = list(names or self.columns)
+        for record in self.blocks_in(t0, t1):
+            times = self._column(record, self.time_column)
+            start = int(np.searchsorted(times, t0, side="left"))
+            stop = int(np.searchsorted(times, t1, side="right"))
+            if start < stop:
+                yield {name: self._column(record, name)[start:stop] for name in names}
+
+    def read_chunks(self, t0, t1, names=None, chunk_rows=1 << 16):
+        """Yield ``{column: array}`` copies of at most ``chunk_rows`` rows for [t0, t1].
+
+        Unlike ``iter_range`` the rows are read with plain file reads, so a
+        scan over the whole store keeps no more than one chunk in memory.
+        """
+        names = list(names or self.columns)
+        for record in self.blocks_in(t0, t1):
+            times = self._column(record, self.time_column)
+            start = int(np.searchsorted(times, t0, side="left"))
+            stop = int(np.searchsorted(times, t1, side="right"))
+            folder = self._block_dir(int(record["block"]))
+            with ExitStack() as stack:
+                files = {name: stack.enter_context(open(folder / self._filename(name), "rb")) for name in names}
+                for first in range(start, stop, chunk_rows):
+                    count = min(chunk_rows, stop - first)
+                    chunk = {}
+                    for name, handle in files.items():
+                        dtype = self.columns[name]
+                        handle.seek(first * dtype.itemsize)
+                        chunk[name] = np.fromfile(handle, dtype, count)
+                    yield chunk
+
+    def read(self, t0, t1, names=None):
+        """Return ``{column: array}`` for [t0, t1], copied into memory; for small ranges."""
+        names = list(names or self.columns)
+        parts = list(self.iter_range(t0, t1, names))
+        if not parts:
+            return {name: np.zeros(0, self.columns[name]) for name in names}
+        return {name: np.concatenate([part[name] for part in parts]) for name in names}
+
+    def read_summary(self, name, t0, t1, limit=None):
+        """Return ``(t, lo, hi, mean)`` for the summary buckets of column ``name`` that overlap [t0, t1].
+
+        Only full blocks have summaries; the block still being appended to is
+        left out. Returns None if the range holds more than ``limit`` buckets.
+        """
+        records = [record for record in self.blocks_in(t0, t1) if self._full(record)]
+        if limit is not None and sum(-(-int(r["rows"]) // SUMMARY_ROWS) for r in records) > limit:
+            return None
+        parts = []
+        for record in records:
+            if not (self._block_dir(int(record["block"])) / f"{name}.sum").exists():
+                with self._write_lock:  # written by an older version, or before a crash
+                    self._summarize(record)
+            parts.append(self._column(record, name, "sum"))
+        summary = np.concatenate(parts) if parts else np.zeros(0, SUMMARY)
+        start = max(int(np.searchsorted(summary["t"], t0, side="right")) - 1, 0)
+        stop = int(np.searchsorted(summary["t"], t1, side="right"))
+        summary = summary[start:stop]
+        return summary["t"], summary["lo"], summary["hi"], summary["mean"]
+
+    def _full(self, record):
+        return record["rows"] >= self.block_rows or record["block"] != self.index["block"][-1]
+
+    def count(self, t0, t1):
+        """Number of rows with t0 <= time <= t1, without reading any other column."""
+        return sum(len(part[self.time_column]) for part in self.iter_range(t0, t1, [self.time_column]))
+
+    # ----- deleting -----
+
+    def drop_blocks(self, before=None):
+        """Delete every block whose rows all precede ``before`` (all blocks if None); returns rows dropped."""
+        with self._write_lock:
+            return self._drop_blocks(before)
+
+    def _drop_blocks(self, before):
+        self._flush()
+        if before is None:
+            doomed = np.ones(len(self.index), bool)
+            self._close_files()
+        else:
+            doomed = self.index["t_max"] < before
+            if self._files:
+                doomed[-1] = False  # keep appending where we were
+        dropped = int(self.index["rows"][doomed].sum())
+        for block in self.index["block"][doomed]:
+            with self._maps_lock:
+                for key in [key for key in self._maps if key[0] == int(block)]:
+                    del self._maps[key]
+            shutil.rmtree(self._block_dir(int(block)), ignore_errors=True)
+        self.index = self.index[~doomed]
+        self._write_index()
+        return dropped
@@ -0,0 +1,327 @@
+"""Wireless link to a NanoLab through a TCP serial bridge (e.g. an ESP8266/ESP32).
+
+``TcpLink`` is a drop-in SerialLink for ``tcp://host:port`` URLs; the frames
+on the socket are the same as on the USB port. Its socket is driven by an
+asyncio loop on the link's own thread, so the Qt event loop never waits on
+the network.
+
+Commands are pipelined: up to ``window`` messages may be waiting for their
+Ack at once, matched by sequence number, so a burst of N commands costs
+about one round trip instead of N. Frames queued together go out in one
+write. A command whose Ack does not come back within the resend timeout
+(estimated from measured round trips as TCP does, doubling per attempt) is
+sent again with the same sequence number, up to MAX_ATTEMPTS times,
+followed by every command sent after it so the device still ends up with
+the newest values; radio links lose frames that TCP never sees.
+
+Only one layer resends. A link used on its own (e.g. by the fleet) does it
+itself. Once a CommandScheduler drives the link, it owns retransmission and
+sets ``resend`` to False: the link then only tracks its commands for the
+window and the round-trip estimate. A command the scheduler queues again
+with a seq already in flight counts as another send of that command, so
+Karn's rule still keeps resent commands out of the estimate.
+
+When the connection drops, the link reports state "reconnecting" and
+retries with jittered exponential backoff; if it resends, commands still
+waiting for an Ack are resent once it is back.
+"""
+import asyncio
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+import wire_protocol
+from device_link import MAX_WRITE, LinkStats, SerialLink
+from wire_protocol import Ack, FileData, Ping, Pong
+
+DEFAULT_PORT = 5000
+CONNECT_TIMEOUT = 3.0
+ACK_TIMEOUT = 0.5       # seconds before the first resend, until round trips have been measured
+MIN_ACK_TIMEOUT = 0.1
+MAX_ATTEMPTS = 4        # sends per command before it is counted as dropped
+MAX_IN_FLIGHT = 32      # commands awaiting their Ack at once
+BACKOFF_BASE = 0.25     # seconds; reconnect delays are drawn from [0, base * 2**attempt]
+BACKOFF_MAX = 10.0
+TICK = 0.05             # how often resends are checked when nothing else happens
+
+
+def wireless_url():
+    """The NanoLab bridge's URL: ``$NANOLAB_WIRELESS``, or the bridge's mDNS name."""
+    return os.environ.get("NANOLAB_WIRELESS", f"tcp://nanolab.local:{DEFAULT_PORT}")
+
+
+def backoff_delay(attempt, rng=random):
+    """Seconds to wait before reconnect ``attempt`` (0-based): "full jitter" exponential backoff.
+
+    Spreading retries uniformly stops a fleet of panels that lost the same
+    access point from reconnecting in lockstep.
+    """
+    return rng.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class TcpLink(SerialLink):
+    """A SerialLink over TCP with pipelined, resent commands and automatic reconnects.
+
+    States are "open", "reconnecting" (detail says when the next attempt
+    is), "closed" and "error" (bad URL only).
+    """
+
+    def __init__(self, url, on_message=None, on_state=None, queue_size=1024, window=MAX_IN_FLIGHT,
+                 ack_timeout=ACK_TIMEOUT, record=None, resend=True):
+        super().__init__(url, on_message=on_message, on_state=on_state, queue_size=queue_size, record=record)
+        self.window = window
+        self.ack_timeout = ack_timeout
+        self.resend = resend  # False when a CommandScheduler resends instead
+        self.retransmits = 0
+        self.reconnects = 0
+        self.srtt = None  # smoothed command round trip and its variation, in seconds
+        self.rttvar = None
+        self.in_flight = {}  # seq -> [frame, time sent, sends, acked], oldest first; loop thread only
+        self._held = None  # a command that did not fit in the window
+        self._loop = None
+        self._wake = None
+
+    # ----- caller side (any thread) -----
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self.stats = LinkStats()
+        self._thread = threading.Thread(target=asyncio.run, args=(self._main(),), name=f"TcpLink({self.url})",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        self._wakeup()
+        super().stop(timeout)  # joins the thread and closes the recorder
+
+    def send(self, frame):
+        """Queue an encoded ``frame`` as is; it is not tracked or resent."""
+        return self._enqueue(bytes(frame), None)
+
+    def send_message(self, message, seq=None):
+        """Encode and queue ``message``; returns its sequence number, or None if the queue is full.
+
+        Everything except Ping and Pong is tracked until its Ack arrives.
+        """
+        seq = self.next_seq() if seq is None else seq
+        tracked = type(message) not in (Ping, Pong)
+        if not self._enqueue(wire_protocol.encode(message, seq), seq if tracked else None):
+            return None
+        return seq
+
+    def _enqueue(self, frame, seq):
+        try:
+            self._outbox.put_nowait((frame, seq))
+        except queue.Full:
+            return False
+        self._wakeup()
+        return True
+
+    def _wakeup(self):
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:  # the loop has already finished
+                pass
+
+    # ----- loop thread -----
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        parts = urlsplit(self.url)
+        if parts.scheme != "tcp" or not parts.hostname:
+            self._set_state("error", f"not a tcp://host:port URL: {self.url}")
+            return
+        host, port = parts.hostname, parts.port or DEFAULT_PORT
+        attempt = 0
+        try:
+            while not self._stop.is_set():
+                try:
+                    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), CONNECT_TIMEOUT)
+                except (OSError, asyncio.TimeoutError) as exc:
+                    reason = str(exc) or "connection timed out"
+                else:
+                    attempt = 0
+                    reason = await self._serve(reader, writer)
+                    self.reconnects += 1
+                if self._stop.is_set():
+                    break
+                delay = backoff_delay(attempt)
+                attempt += 1
+                self._set_state("reconnecting", f"{reason}; retrying in {delay:.1f} s")
+                await self._sleep(delay)
+        finally:
+            self._loop = None
+            self._set_state("closed")
+
+    async def _sleep(self, seconds):
+        """Sleep, but wake at once for stop()"""
+        deadline = time.monotonic() + seconds
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                pass
+
+    async def _serve(self, reader, writer):
+        """Run one connection until it fails or the link is stopped; returns why it ended"""
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # batching is done here, not by Nagle
+        if self.resend:
+            for entry in self.in_flight.values():
+                entry[1] = float("-inf")  # resend everything unacknowledged on the new connection
+        self._set_state("open", self.url)
+        read_task = asyncio.create_task(self._read(reader))
+        write_task = asyncio.create_task(self._write(writer))
+        done, pending = await asyncio.wait((read_task, write_task), return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        writer.close()
+        reason = "stopped"
+        for task in done:
+            exc = task.exception()
+            reason = str(exc) if exc else task.result()
+        return reason or "connection lost"
+
+    async def _read(self, reader):
+        buffer = bytearray()
+        while True:
+            chunk = await reader.read(4096)
+            if not chunk:
+                return "connection closed by the bridge"
+            self.stats.bytes_received += len(chunk)
+            buffer += chunk
+            self._split_frames(buffer)
+
+    async def _write(self, writer):
+        while not self._stop.is_set():
+            frames = self._due_resends()
+            frames += self._take_outbox(MAX_WRITE - sum(map(len, frames)))
+            if frames:
+                data = b"".join(frames)
+                writer.write(data)
+                await writer.drain()
+                self.stats.bytes_sent += len(data)
+                self.stats.frames_sent += len(frames)
+                self.stats.writes += 1
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), TICK)
+            except asyncio.TimeoutError:
+                pass
+        return "stopped"
+
+    def _take_outbox(self, budget):
+        """Queued frames up to ``budget`` bytes, holding back commands while the window is full"""
+        frames = []
+        now = time.monotonic()
+        while budget > 0:
+            if self._held is not None:
+                item, self._held = self._held, None
+            else:
+                try:
+                    item = self._outbox.get_nowait()
+                except queue.Empty:
+                    break
+            frame, seq = item
+            if seq is not None:
+                entry = self.in_flight.get(seq)
+                if entry is not None:  # queued again by the caller: another send of the same command
+                    self.retransmits += 1
+                    entry[0] = frame
+                    entry[1] = now
+                    entry[2] += 1
+                elif len(self.in_flight) >= self.window:
+                    self._held = item
+                    break
+                else:
+                    self.in_flight[seq] = [frame, now, 1, False]
+            frames.append(frame)
+            budget -= len(frame)
+        return frames
+
+    def resend_timeout(self):
+        """Seconds before a first resend: srtt + 4 * rttvar (RFC 6298), or ack_timeout before any sample"""
+        if self.srtt is None:
+            return self.ack_timeout
+        return max(MIN_ACK_TIMEOUT, self.srtt + 4 * self.rttvar)
+
+    def _sample_rtt(self, rtt):
+        if self.srtt is None:
+            self.srtt, self.rttvar = rtt, rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+
+    def _due_resends(self):
+        """Go-back-N: the oldest overdue command and every command sent after it, in order.
+
+        The device applies commands in the order they arrive, so resending
+        one alone could let an old value overwrite a newer one. Without
+        ``resend``, a command is only dropped from the window once it has gone
+        unanswered for as long as MAX_ATTEMPTS sends would have waited.
+        """
+        now = time.monotonic()
+        timeout = self.resend_timeout()
+        entries = list(self.in_flight.items())
+        for first, (seq, (frame, sent, sends, acked)) in enumerate(entries):
+            backoff = 2 ** (sends - 1) if self.resend else 2 ** (MAX_ATTEMPTS - 1)
+            if not acked and now - sent >= timeout * backoff:
+                break
+        else:
+            return []
+        if sends >= MAX_ATTEMPTS or not self.resend:
+            del self.in_flight[seq]
+            self.stats.dropped += 1
+            self._release()
+            return []
+        frames = []
+        for seq, entry in entries[first:]:
+            if entry[1] != float("-inf"):
+                self.retransmits += 1
+            entry[1] = now
+            entry[2] += 1
+            frames.append(entry[0])
+        return frames
+
+    def _release(self):
+        """Forget acknowledged commands once every command before them is acknowledged too
+
+        Without ``resend`` there is no go-back-N to keep them for, so they
+        are forgotten at once and a lost frame does not hold up the window.
+        """
+        if not self.resend:
+            for seq in [seq for seq, entry in self.in_flight.items() if entry[3]]:
+                del self.in_flight[seq]
+            return
+        while self.in_flight:
+            seq = next(iter(self.in_flight))
+            if not self.in_flight[seq][3]:
+                break
+            del self.in_flight[seq]
+
+    def _dispatch(self, seq, message):
+        if type(message) in (Ack, FileData):  # a FileData answers the FileRead with its seq
+            entry = self.in_flight.get(message.seq if type(message) is Ack else seq)
+            # An Ack for a command already dropped or acknowledged only skips the bookkeeping: the device
+            # did apply it, and the caller (e.g. CommandScheduler) ignores answers it is not waiting for
+            if entry is not None and not entry[3]:
+                entry[3] = True
+                if entry[2] == 1:  # Karn: a resent command's round trip is ambiguous
+                    self._sample_rtt(time.monotonic() - entry[1])
+                self._release()
+                self._wake.set()  # maybe room in the window
+        super()._dispatch(seq, message)
@@ -0,0 +1,211 @@
+"""Live sensor telemetry held in fixed-size ring buffers.
+
+Every channel is a preallocated NumPy column, so memory stays flat however
+long an experiment runs and no Python object is kept per sample. Batches are
+written by the device link's worker thread as they arrive; widgets read the
+latest N samples as read-only views, without copying and without locks.
+
+Alongside the ring buffers each channel feeds a MinMaxPyramid, so the whole
+session can still be plotted at screen resolution after the raw samples
+have been overwritten. The pyramid's levels are fixed-size rings too; once
+its finest level has moved past a range, that range is drawn from the
+summaries the ColumnStore keeps of every full block, if there is a store.
+When given a ColumnStore, every sample is also appended to disk, and when
+given a SensorMonitor, it updates the rolling statistics and alarms.
+"""
+import time
+
+import numpy as np
+
+from lod import MinMaxPyramid, decimate, merge_buckets
+
+# channel -> (unit, scale from the wire value in TelemetryBatch)
+CHANNELS = {
+    "temperature": ("°C", 0.01),
+    "humidity": ("%RH", 0.01),
+    "pressure": ("hPa", 0.01),
+    "pump": ("", 1.0),
+}
+
+DEFAULT_CAPACITY = 1 << 18  # samples per channel, ~17 minutes at 250 Hz
+
+MAX_STORED_BUCKETS = 1 << 16  # summary buckets read from disk per plot (~17M samples); wider ranges use the pyramid
+
+_WRAP_MS = 1 << 32  # the Arduino's millis() counter wraps after ~49.7 days
+
+
+class RingBuffer:
+    """A fixed-capacity column whose latest samples are always contiguous.
+
+    Storage is mirrored: sample ``i`` is written at ``i % capacity`` and again
+    ``capacity`` slots later, so any window of up to ``capacity`` most recent
+    samples is a single slice of the backing array. There is one writer;
+    readers may see the oldest samples of a view overwritten if they hold it
+    for longer than a full lap of the buffer.
+    """
+
+    __slots__ = ("capacity", "total", "_data")
+
+    def __init__(self, capacity, dtype=np.float64):
+        self.capacity = capacity
+        self.total = 0  # samples ever written
+        self._data = np.zeros(2 * capacity, dtype=dtype)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def extend(self, values):
+        values = np.asarray(values)
+        n = len(values)
+        if n == 0:
+            return
+        cap = self.capacity
+        if n > cap:
+            self.total += n - cap
+            values = values[-cap:]
+            n = cap
+        data = self._data
+        pos = self.total % cap
+        first = min(n, cap - pos)
+        data[pos:pos + first] = values[:first]
+        data[pos + cap:pos + cap + first] = values[:first]
+        rest = n - first
+        if rest:
+            data[:rest] = values[first:]
+            data[cap:cap + rest] = values[first:]
+        self.total += n
+
+    def latest(self, n=None, end=None):
+        """Return a read-only view of the ``n`` most recent samples, oldest first.
+
+        ``end`` ends the window at an earlier ``total``, which lets a reader
+        line this column up with another one that is written after it.
+        """
+        end = self.total if end is None else min(end, self.total)
+        count = min(end, self.capacity - (self.total - end))
+        n = count if n is None else min(n, count)
+        if n <= 0:
+            return self._data[:0]
+        stop = (end - 1) % self.capacity + self.capacity + 1
+        view = self._data[stop - n:stop]
+        view.flags.writeable = False
+        return view
+
+    def since(self, mark):
+        """Return ``(view, total)`` of samples written after ``total`` was ``mark``.
+
+        Samples that have already been overwritten are skipped; callers can
+        detect that as ``total - mark > len(view)``.
+        """
+        total = self.total
+        return self.latest(total - mark), total
+
+
+class Telemetry:
+    """Ring buffers for every sensor channel plus a shared time column.
+
+    ``ingest`` is called from the link worker thread. The time column is
+    written last, so a reader that sizes its window from ``time.total`` never
+    sees a timestamp without its samples.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, store=None, monitor=None):
+        self.capacity = capacity
+        self.store = store
+        self.monitor = monitor
+        self.time = RingBuffer(capacity, np.float64)  # host epoch seconds
+        self.channels = {name: RingBuffer(capacity, np.float32) for name in CHANNELS}
+        self.history = {name: MinMaxPyramid() for name in CHANNELS}
+        self.batches = 0
+        self.gaps = 0  # batches that did not start where the previous one ended
+        self.start_time = None  # host time of the first sample
+        self._epoch = None  # host time of device t = 0
+        self._last_t0 = None
+        self._next_t0 = None
+        self._wraps = 0
+
+    @property
+    def samples(self):
+        return self.time.total
+
+    def ingest(self, batch):
+        """Append a TelemetryBatch to every channel."""
+        n = len(batch.temperature)
+        if n == 0:
+            return
+        if self._last_t0 is not None and batch.t0_ms < self._last_t0 - _WRAP_MS // 2:
+            self._wraps += 1
+        self._last_t0 = batch.t0_ms
+        t0 = (batch.t0_ms + self._wraps * _WRAP_MS) / 1000.0
+        if self._epoch is None:
+            self._epoch = time.time() - t0
+        dt = batch.dt_us * 1e-6
+        if self._next_t0 is not None and abs(t0 - self._next_t0) > dt:
+            self.gaps += 1
+        self._next_t0 = t0 + n * dt
+
+        times = self._epoch + t0 + np.arange(n) * dt
+        if self.start_time is None:
+            self.start_time = float(times[0])
+        row = {"time": times}
+        for name, (_, scale) in CHANNELS.items():
+            column = np.frombuffer(getattr(batch, name), dtype=getattr(batch, name).typecode)
+            values = row[name] = column * np.float32(scale)
+            self.channels[name].extend(values)
+            self.history[name].extend(times, values)
+        self.time.extend(times)
+        if self.store is not None:
+            self.store.append(row)
+        if self.monitor is not None:
+            self.monitor.extend(row)
+        self.batches += 1
+
+    def latest(self, name, n=None):
+        """Return ``(times, values)`` views of the ``n`` most recent samples of ``name``."""
+        end = self.time.total
+        times = self.time.latest(n, end)
+        return times, self.channels[name].latest(len(times), end)
+
+    def window(self, name, t0, t1, max_buckets):
+        """Return ``(t, lo, hi)`` for ``name`` over [t0, t1] with at most ``max_buckets`` buckets.
+
+        Served from the raw ring buffer while it still covers ``t0``, and from
+        the history pyramid beyond that. Where the pyramid's finest level has
+        already dropped ``t0``, the store's block summaries are used instead,
+        unless the range is too long to read them all. Raw windows that
+        already fit come back with ``lo is hi``.
+        """
+        times, values = self.latest(name)
+        if len(times) and times[0] <= t0:
+            start, stop = np.searchsorted(times, (t0, t1))
+            return decimate(times[start:stop], values[start:stop], max_buckets)
+        pyramid = self.history[name]
+        fine_start = pyramid.fine_start
+        if self.store is not None and fine_start is not None and t0 < fine_start:
+            stored = self.store.read_summary(name, t0, t1, limit=MAX_STORED_BUCKETS)
+            if stored is not None and len(stored[0]):
+                t, lo, hi, _ = stored
+                # The block being appended to has no summary yet, but the finest level still holds it
+                recent_t, recent_lo, recent_hi, _ = pyramid.finest(t[-1], t1)
+                return merge_buckets(np.concatenate((t, recent_t)), np.concatenate((lo, recent_lo)),
+                                     np.concatenate((hi, recent_hi)), max_buckets)
+        summary = pyramid.query(t0, t1, max_buckets)
+        if summary is None:
+            return times, values, values
+        t, lo, hi, _ = summary
+        return t, lo, hi
+
+    def current(self):
+        """Return the most recent value of every channel, or None before any data."""
+        end = self.time.total
+        if not end:
+            return None
+        return {name: float(buf.latest(1, end)[0]) for name, buf in self.channels.items()}
+
+    def nbytes(self):
+        return (self.time.nbytes + sum(buf.nbytes for buf in self.channels.values())
+                + sum(pyramid.nbytes for pyramid in self.history.values()))
@@ -0,0 +1,468 @@
+"""Light and dark stylesheets for the control panel.
+
+Each theme's stylesheet is built once and cached, and widgets carry no inline
+styles of their own: they are matched by object name (``QLabel#statusLabel``)
+or by a dynamic property (``[warning="true"]``), so switching theme only
+has to swap the cached string on the widgets that are actually shown.
+"""
+from functools import lru_cache
+
+# ----- COLORS -----
+LIGHT_BG = "#f2f7f2"
+DARK_BG = "#2c2f2c"
+GREEN = "#a8d5a2"
+GREEN_DARK = "#2f4f2d"
+TEXT_LIGHT = "black"
+TEXT_DARK = "white"
+SAVE_GREEN = "#4CAF50"
+WARNING_RED = "#d32f2f"
+CHANGED_ORANGE = "#ef6c00"
+
+THEMES = ("light", "dark")
+
+# Set once on the main window. Pages get the full sheet themselves, since a
+# change here would re-polish every widget in the window.
+WINDOW_STYLESHEET = """
+    QMainWindow { background-color: #ffffff; }
+    QMainWindow[theme="dark"] { background-color: #1a1a1a; }
+"""
+
+
+def _light():
+    return f"""
+        QMainWindow {{
+            background-color: #ffffff;
+        }}
+        QWidget {{
+            background-color: #ffffff;
+            color: {TEXT_LIGHT};
+            font-family: 'Segoe UI', 'SF Pro Display', 'Helvetica Neue', Arial, sans-serif;
+        }}
+        QStackedWidget, QStackedWidget > QWidget {{
+            background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 #ffffff, stop:1 #f5f5f5);
+        }}
+        QPushButton {{
+            background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 {GREEN}, stop:1 #86b786);
+            color: black;
+            border: none;
+            border-radius: 14px;
+            padding: 14px 24px;
+            font-weight: 600;
+            font-size: 15px;
+            letter-spacing: 0.3px;
+        }}
+        QPushButton:hover {{
+            background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 #2f4f2d, stop:1 #4b6a44);
+            color: white;
+        }}
+        QPushButton:pressed {{
+            background-color: #2f4f2d;
+        }}
+        QLabel#titleLabel {{
+            font-size: 36px;
+            font-weight: 700;
+            margin-bottom: 20px;
+            color: #1a1a1a;
+            letter-spacing: -0.5px;
+        }}
+        QLabel {{
+            font-size: 14px;
+            color: #333333;
+        }}
+        QLineEdit {{
+            background-color: white;
+            border: 2px solid #e0e0e0;
+            border-radius: 8px;
+            padding: 8px 12px;
+            font-size: 14px;
+            color: #333333;
+        }}
+        QLineEdit:focus {{
+            border: 2px solid {GREEN};
+        }}
+        QToolBar {{
+            background-color: #f8f8f8;
+            border-bottom: 1px solid #e0e0e0;
+            spacing: 10px;
+            padding: 8px;
+        }}
+        QComboBox {{
+            background-color: white;
+            border: 2px solid #e0e0e0;
+            border-radius: 8px;
+            padding: 8px 12px;
+            font-size: 14px;
+            color: #333333;
+        }}
+        QComboBox:hover {{
+            border: 2px solid {GREEN};
+        }}
+        QComboBox::drop-down {{
+            border: none;
+            width: 30px;
+        }}
+        QComboBox::down-arrow {{
+            image: none;
+            border-left: 5px solid transparent;
+            border-right: 5px solid transparent;
+            border-top: 6px solid #333333;
+            margin-right: 8px;
+        }}
+        QComboBox QAbstractItemView {{
+            background-color: white;
+            border: 2px solid {GREEN};
+            border-radius: 8px;
+            selection-background-color: {GREEN};
+            selection-color: black;
+            padding: 5px;
+        }}
+        QDateEdit {{
+            background-color: white;
+            border: 2px solid #e0e0e0;
+            border-radius: 8px;
+            padding: 8px 12px;
+            font-size: 15px;
+            font-weight: 600;
+            color: #333333;
+        }}
+        QDateEdit:hover {{
+            border: 2px solid {GREEN};
+        }}
+        QDateEdit::drop-down {{
+            subcontrol-origin: padding;
+            subcontrol-position: center right;
+            width: 30px;
+            border: none;
+        }}
+        QDateEdit::down-arrow {{
+            image: none;
+            border-left: 5px solid transparent;
+            border-right: 5px solid transparent;
+            border-top: 6px solid #333333;
+        }}
+        QCalendarWidget {{
+            background-color: white;
+            border: 2px solid {GREEN};
+            border-radius: 8px;
+        }}
+        QCalendarWidget QTableView {{
+            background-color: white;
+            selection-background-color: {GREEN};
+            selection-color: black;
+        }}
+        QCalendarWidget QToolButton {{
+            background-color: {GREEN};
+            color: black;
+            border-radius: 6px;
+            padding: 5px;
+        }}
+        QCalendarWidget QToolButton:hover {{
+            background-color: #2f4f2d;
+            color: white;
+        }}
+        QSpinBox {{
+            background-color: white;
+            border: 2px solid #e0e0e0;
+            border-radius: 8px;
+            padding: 8px 12px;
+            font-size: 15px;
+            font-weight: 600;
+            color: #333333;
+        }}
+        QSpinBox:hover {{
+            border: 2px solid {GREEN};
+        }}
+        QSpinBox:focus {{
+            border: 2px solid {GREEN};
+        }}
+        QSpinBox::up-button {{
+            subcontrol-origin: border;
+            subcontrol-position: top right;
+            width: 25px;
+            border-left: 1px solid #e0e0e0;
+            border-bottom: 1px solid #e0e0e0;
+            border-top-right-radius: 8px;
+            background-color: #f5f5f5;
+        }}
+        QSpinBox::up-button:hover {{
+            background-color: {GREEN};
+        }}
+        QSpinBox::down-button {{
+            subcontrol-origin: border;
+            subcontrol-position: bottom right;
+            width: 25px;
+            border-left: 1px solid #e0e0e0;
+            border-bottom-right-radius: 8px;
+            background-color: #f5f5f5;
+        }}
+        QSpinBox::down-button:hover {{
+            background-color: {GREEN};
+        }}
+        QSpinBox::up-arrow {{
+            image: none;
+            border-left: 4px solid transparent;
+            border-right: 4px solid transparent;
+            border-bottom: 5px solid #333333;
+            width: 0px;
+            height: 0px;
+        }}
+        QSpinBox::down-arrow {{
+            image: none;
+            border-left: 4px solid transparent;
+            border-right: 4px solid transparent;
+            border-top: 5px solid #333333;
+            width: 0px;
+            height: 0px;
+        }}
+            """
+
+
+def _dark():
+    return f"""
+        QMainWindow {{
+            background-color: #1a1a1a;
+        }}
+        QWidget {{
+            background-color: #1a1a1a;
+            color: {TEXT_DARK};
+            font-family: 'Segoe UI', 'SF Pro Display', 'Helvetica Neue', Arial, sans-serif;
+        }}
+        QStackedWidget, QStackedWidget > QWidget {{
+            background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 #1a1a1a, stop:1 #0d0d0d);
+        }}
+        QPushButton {{
+            background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 #2f4f2d, stop:1 #4b6a44);
+            color: white;
+            border: none;
+            border-radius: 14px;
+            padding: 14px 24px;
+            font-weight: 600;
+            font-size: 15px;
+            letter-spacing: 0.3px;
+        }}
+        QPushButton:hover {{
+            background-color: qlineargradient(spread:pad, x1:0, y1:0, x2:0, y2:1, stop:0 {GREEN}, stop:1 #86b786);
+            color: black;
+        }}
+        QPushButton:pressed {{
+            background-color: {GREEN};
+        }}
+        QLabel#titleLabel {{
+            font-size: 36px;
+            font-weight: 700;
+            margin-bottom: 20px;
+            color: #ffffff;
+            letter-spacing: -0.5px;
+        }}
+        QLabel {{
+            font-size: 14px;
+            color: #e0e0e0;
+        }}
+        QLineEdit {{
+            background-color: #2a2a2a;
+            border: 2px solid #404040;
+            border-radius: 8px;
+            padding: 8px 12px;
+            font-size: 14px;
+            color: #ffffff;
+        }}
+        QLineEdit:focus {{
+            border: 2px solid {GREEN};
+        }}
+        QToolBar {{
+            background-color: #252525;
+            border-bottom: 1px solid #404040;
+            spacing: 10px;
+            padding: 8px;
+        }}
+        QComboBox {{
+            background-color: #2a2a2a;
+            border: 2px solid #404040;
+            border-radius: 8px;
+            padding: 8px 12px;
+            font-size: 14px;
+            color: #ffffff;
+        }}
+        QComboBox:hover {{
+            border: 2px solid {GREEN};
+        }}
+        QComboBox::drop-down {{
+            border: none;
+            width: 30px;
+        }}
+        QComboBox::down-arrow {{
+            image: none;
+            border-left: 5px solid transparent;
+            border-right: 5px solid transparent;
+            border-top: 6px solid #ffffff;
+            margin-right: 8px;
+        }}
+        QComboBox QAbstractItemView {{
+            background-color: #2a2a2a;
+            border: 2px solid {GREEN};
+            border-radius: 8px;
+            selection-background-color: {GREEN};
+            selection-color: black;
+            padding: 5px;
+        }}
+        QDateEdit {{
+            background-color: #2a2a2a;
+            border: 2px solid #404040;
+            border-radius: 8px;
+            padding: 8px 12px;
+            font-size: 15px;
+            font-weight: 600;
+            color: #ffffff;
+        }}
+        QDateEdit:hover {{
+            border: 2px solid {GREEN};
+        }}
+        QDateEdit::drop-down {{
+            subcontrol-origin: padding;
+            subcontrol-position: center right;
+            width: 30px;
+            border: none;
+        }}
+        QDateEdit::down-arrow {{
+            image: none;
+            border-left: 5px solid transparent;
+            border-right: 5px solid transparent;
+            border-top: 6px solid #ffffff;
+        }}
+        QCalendarWidget {{
+            background-color: #2a2a2a;
+            border: 2px solid {GREEN};
+            border-radius: 8px;
+        }}
+        QCalendarWidget QTableView {{
+            background-color: #2a2a2a;
+            color: #ffffff;
+            selection-background-color: {GREEN};
+            selection-color: black;
+        }}
+        QCalendarWidget QToolButton {{
+            background-color: #2f4f2d;
+            color: white;
+            border-radius: 6px;
+            padding: 5px;
+        }}
+        QCalendarWidget QToolButton:hover {{
+            background-color: {GREEN};
+            color: black;
+        }}
+        QCalendarWidget QWidget {{
+            alternate-background-color: #1a1a1a;
+        }}
+        QSpinBox {{
+            background-color: #2a2a2a;
+            border: 2px solid #404040;
+            border-radius: 8px;
+            padding: 8px 12px;
+            font-size: 15px;
+            font-weight: 600;
+            color: #ffffff;
+        }}
+        QSpinBox:hover {{
+            border: 2px solid {GREEN};
+        }}
+        QSpinBox:focus {{
+            border: 2px solid {GREEN};
+        }}
+        QSpinBox::up-button {{
+            subcontrol-origin: border;
+            subcontrol-position: top right;
+            width: 25px;
+            border-left: 1px solid #404040;
+            border-bottom: 1px solid #404040;
+            border-top-right-radius: 8px;
+            background-color: #1a1a1a;
+        }}
+        QSpinBox::up-button:hover {{
+            background-color: {GREEN};
+        }}
+        QSpinBox::down-button {{
+            subcontrol-origin: border;
+            subcontrol-position: bottom right;
+            width: 25px;
+            border-left: 1px solid #404040;
+            border-bottom-right-radius: 8px;
+            background-color: #1a1a1a;
+        }}
+        QSpinBox::down-button:hover {{
+            background-color: {GREEN};
+        }}
+        QSpinBox::up-arrow {{
+            image: none;
+            border-left: 4px solid transparent;
+            border-right: 4px solid transparent;
+            border-bottom: 5px solid #ffffff;
+            width: 0px;
+            height: 0px;
+        }}
+        QSpinBox::down-arrow {{
+            image: none;
+            border-left: 4px solid transparent;
+            border-right: 4px solid transparent;
+            border-top: 5px solid #ffffff;
+            width: 0px;
+            height: 0px;
+        }}
+            """
+
+
+def _roles(muted):
+    """Rules for named widgets, the same in both themes apart from the muted text color"""
+    return f"""
+        QLabel#headingLabel {{
+            font-size: 16px;
+            font-weight: 600;
+        }}
+        QLabel#descriptionLabel {{
+            font-size: 15px;
+        }}
+        QLabel#fieldLabel {{
+            font-size: 14px;
+            font-weight: 600;
+        }}
+        QLabel#valueLabel {{
+            font-size: 14px;
+            font-weight: bold;
+        }}
+        QLabel#colorSwatch {{
+            border-radius: 10px;
+            border: 2px solid #aaaaaa;
+        }}
+        QLabel#statusLabel {{
+            font-size: 13px;
+            font-style: italic;
+            color: {muted};
+        }}
+        QLabel#statusLabel[warning="true"] {{
+            color: {WARNING_RED};
+        }}
+        QLabel#placeholderLabel {{
+            font-size: 24px;
+            font-weight: 600;
+            color: #888888;
+        }}
+        QLabel[changed="true"] {{
+            font-weight: bold;
+            color: {CHANGED_ORANGE};
+        }}
+        QPushButton#saveButton, QPushButton#saveButton:hover, QPushButton#saveButton:pressed {{
+            font-weight: bold;
+            background-color: {SAVE_GREEN};
+            color: white;
+            border-radius: 12px;
+        }}
+    """
+
+
+@lru_cache(maxsize=None)
+def stylesheet(theme):
+    """The complete stylesheet for ``theme`` ("light" or "dark"), built on first use."""
+    if theme == "light":
+        return _light() + _roles("#666666")
+    if theme == "dark":
+        return _dark() + _roles("#9e9e9e")
+    raise ValueError(f"unknown theme {theme!r}")
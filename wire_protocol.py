@@ -0,0 +1,210 @@
+"""Binary wire protocol between the control panel and the NanoLab.
+
+Every message is one frame. Before framing, a frame is (little-endian):
+
+    version  u8     PROTOCOL_VERSION
+    type     u8     message type id, see MESSAGE_TYPES
+    seq      u16    sender's sequence number, echoed back in Ack
+    payload  ...    fixed layout per message type
+    crc16    u16    CRC-16/CCITT-FALSE over everything above
+
+The frame is then COBS-encoded, so it contains no zero bytes, and terminated
+by a single 0x00 delimiter. The Arduino decodes it in place with no string
+parsing, and a corrupt or truncated frame is dropped at the next delimiter.
+
+Most payloads are a fixed struct. Sample streams (TelemetryBatch), partial
+settings updates (SetFields), camera captures (CameraChunk) and SD card
+files (FileInfo, FileData) are columnar instead: a small header followed by one packed array per column, which the
+host reads straight into ``array.array`` columns without touching each
+element.
+"""
+import struct
+import sys
+from array import array
+from binascii import crc_hqx
+from collections import namedtuple
+
+PROTOCOL_VERSION = 1
+DELIMITER = b"\x00"
+
+_HEADER = struct.Struct("<BBH")
+_CRC = struct.Struct("<H")
+
+
+class ProtocolError(ValueError):
+    """Raised for frames that are corrupt, truncated or of an unknown type."""
+
+
+# ----- MESSAGES -----
+
+Ping = namedtuple("Ping", "token")
+Pong = namedtuple("Pong", "token")
+Ack = namedtuple("Ack", "seq status")
+LedSettings = namedtuple("LedSettings", "red green blue duration_h frequency interval_h")
+PumpSettings = namedtuple("PumpSettings", "duration_s frequency interval_h")
+CameraSettings = namedtuple("CameraSettings", "frequency interval_h")
+Schedule = namedtuple("Schedule", "start_day end_day")  # days since 1970-01-01
+# Changed settings only: parallel columns of field ids (see settings_model.SCHEMA) and values
+SetFields = namedtuple("SetFields", "ids values")
+
+# A block of evenly spaced sensor samples. Columns are array.array:
+#   temperature 'h' (0.01 degC), humidity 'H' (0.01 %RH), pressure 'I' (Pa), pump 'B' (0/1)
+TelemetryBatch = namedtuple("TelemetryBatch", "t0_ms dt_us temperature humidity pressure pump")
+# One piece of a camera capture (usually a JPEG); data is array('B'), pieces index 0..count-1
+CameraChunk = namedtuple("CameraChunk", "frame_id t_ms index count data")
+
+# Files on the device's SD card. ListFiles is answered with one FileInfo per
+# file (name is array('B'), UTF-8; mtime in seconds since 1970) and then an
+# Ack. FileRead asks for ``length`` bytes at ``offset`` and is answered by a
+# FileData carrying the request's seq, with crc = CRC-16/CCITT-FALSE of the
+# data as read from the card; a short FileData is the end of the file.
+ListFiles = namedtuple("ListFiles", "")
+FileInfo = namedtuple("FileInfo", "file_id size mtime name")
+FileRead = namedtuple("FileRead", "file_id offset length")
+FileData = namedtuple("FileData", "file_id offset crc data")
+
+ACK_OK = 0
+ACK_REJECTED = 1
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+class _Columns:
+    """Payload layout for a fixed header followed by equal-length little-endian columns.
+
+    The sample count is written after the header; each column is an
+    ``array.array`` of the given typecode.
+    """
+
+    def __init__(self, header, typecodes):
+        self.header = struct.Struct("<" + header + "H")
+        self.typecodes = typecodes
+        self.widths = [array(tc).itemsize for tc in typecodes]
+        self.row_size = sum(self.widths)
+        self.size = None
+
+    def pack(self, *fields):
+        head = fields[:-len(self.typecodes)]
+        columns = fields[-len(self.typecodes):]
+        n = len(columns[0])
+        if any(len(column) != n for column in columns):
+            raise ProtocolError("columns differ in length")
+        parts = [self.header.pack(*head, n)]
+        for tc, column in zip(self.typecodes, columns):
+            column = column if isinstance(column, array) and column.typecode == tc else array(tc, column)
+            if _BIG_ENDIAN:
+                column = array(tc, column)
+                column.byteswap()
+            parts.append(column.tobytes())
+        return b"".join(parts)
+
+    def unpack_from(self, body, offset):
+        *head, n = self.header.unpack_from(body, offset)
+        offset += self.header.size
+        if len(body) - offset != n * self.row_size:
+            raise ProtocolError("bad column length")
+        columns = []
+        for tc, width in zip(self.typecodes, self.widths):
+            column = array(tc)
+            column.frombytes(body[offset:offset + n * width])
+            if _BIG_ENDIAN:
+                column.byteswap()
+            columns.append(column)
+            offset += n * width
+        return (*head, *columns)
+
+
+# message class -> (type id, payload layout)
+MESSAGE_TYPES = {
+    Ping: (0x01, struct.Struct("<I")),
+    Pong: (0x02, struct.Struct("<I")),
+    Ack: (0x03, struct.Struct("<HB")),
+    LedSettings: (0x10, struct.Struct("<BBBBBB")),
+    PumpSettings: (0x11, struct.Struct("<HBB")),
+    CameraSettings: (0x12, struct.Struct("<BB")),
+    Schedule: (0x13, struct.Struct("<HH")),
+    SetFields: (0x14, _Columns("", "BH")),
+    TelemetryBatch: (0x20, _Columns("IH", "hHIB")),
+    CameraChunk: (0x21, _Columns("IIHH", "B")),
+    ListFiles: (0x30, struct.Struct("<")),
+    FileInfo: (0x31, _Columns("HII", "B")),
+    FileRead: (0x32, struct.Struct("<HIH")),
+    FileData: (0x33, _Columns("HIH", "B")),
+}
+_BY_ID = {type_id: (cls, layout) for cls, (type_id, layout) in MESSAGE_TYPES.items()}
+
+
+# ----- COBS -----
+
+def cobs_encode(data):
+    """Consistent Overhead Byte Stuffing: returns ``data`` with every zero byte removed."""
+    out = bytearray()
+    for block in bytes(data).split(b"\x00"):
+        while len(block) >= 254:
+            out.append(0xFF)
+            out += block[:254]
+            block = block[254:]
+        out.append(len(block) + 1)
+        out += block
+    return bytes(out)
+
+
+def cobs_decode(data):
+    """Inverse of ``cobs_encode``; raises ProtocolError on malformed input."""
+    out = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        code = data[i]
+        end = i + code
+        if code == 0 or end > n:
+            raise ProtocolError("malformed COBS block")
+        out += data[i + 1:end]
+        i = end
+        if code < 0xFF and i < n:
+            out.append(0)
+    return bytes(out)
+
+
+# ----- FRAMES -----
+
+def encode(message, seq=0):
+    """Return ``message`` as a delimited, ready-to-write frame."""
+    try:
+        type_id, layout = MESSAGE_TYPES[type(message)]
+    except KeyError:
+        raise ProtocolError(f"no wire format for {type(message).__name__}") from None
+    body = _HEADER.pack(PROTOCOL_VERSION, type_id, seq & 0xFFFF) + layout.pack(*message)
+    return cobs_encode(body + _CRC.pack(crc_hqx(body, 0xFFFF))) + DELIMITER
+
+
+def decode(frame):
+    """Decode one frame (with or without its delimiter) into ``(seq, message)``."""
+    if frame.endswith(DELIMITER):
+        frame = frame[:-1]
+    body = cobs_decode(frame)
+    if len(body) < _HEADER.size + _CRC.size:
+        raise ProtocolError("frame too short")
+    (crc,) = _CRC.unpack_from(body, len(body) - _CRC.size)
+    body = body[:-_CRC.size]
+    if crc_hqx(body, 0xFFFF) != crc:
+        raise ProtocolError("CRC mismatch")
+    version, type_id, seq = _HEADER.unpack_from(body)
+    if version != PROTOCOL_VERSION:
+        raise ProtocolError(f"unsupported protocol version {version}")
+    try:
+        cls, layout = _BY_ID[type_id]
+    except KeyError:
+        raise ProtocolError(f"unknown message type 0x{type_id:02x}") from None
+    if layout.size is not None and len(body) - _HEADER.size != layout.size:
+        raise ProtocolError(f"bad payload length for {cls.__name__}")
+    try:
+        return seq, cls._make(layout.unpack_from(body, _HEADER.size))
+    except struct.error as exc:
+        raise ProtocolError(f"bad payload for {cls.__name__}: {exc}") from None
+
+
+def led_from_hex(hex_code, duration_h, frequency, interval_h):
+    """Build LedSettings from a ``#rrggbb`` colour."""
+    rgb = int(hex_code.lstrip("#"), 16)
+    return LedSettings(rgb >> 16, (rgb >> 8) & 0xFF, rgb & 0xFF, duration_h, frequency, interval_h)